@@ -0,0 +1,218 @@
+"""Incrementally maintained review aggregates.
+
+One row per scope (a product_id, or GLOBAL_SCOPE for every review) holds
+the counts, histograms and power sums the dashboard needs, and
+review_value_counts holds how often each rating / polarity value occurs
+(for medians and variance checks). Both are updated in the same
+transaction as the review inserts, so reading the dashboard never scans
+reviews.
+
+Ratings are counted per distinct value. Polarity is a continuous score
+with as many distinct values as reviews, so it is counted in fixed buckets
+of POLARITY_RESOLUTION instead: at most ~200 rows per scope, at the cost of
+a polarity median that is exact only to within half a bucket (0.005).
+"""
+import math
+
+GLOBAL_SCOPE = "*"
+
+SENTIMENT_COLUMNS = ["positive", "negative", "neutral"]
+STAR_COLUMNS = [f"star_{i}" for i in range(1, 6)]
+# Width of the polarity buckets in review_value_counts
+POLARITY_RESOLUTION = 0.01
+
+POLARITY_BUCKET_COLUMNS = ["very_positive", "pol_positive", "pol_neutral", "pol_negative", "very_negative"]
+MOMENT_COLUMNS = (
+    ["n"]
+    + [f"rating_sum{k}" for k in range(1, 5)]
+    + [f"polarity_sum{k}" for k in range(1, 5)]
+    + ["length_sum1", "length_sum2", "rating_polarity_sum", "rating_length_sum"]
+)
+STAR_POLARITY_COLUMNS = [f"star_polarity_sum_{i}" for i in range(1, 6)]
+
+AGGREGATE_COLUMNS = (
+    ["total"] + SENTIMENT_COLUMNS + STAR_COLUMNS + POLARITY_BUCKET_COLUMNS
+    + MOMENT_COLUMNS + STAR_POLARITY_COLUMNS
+)
+
+CREATE_AGGREGATES_TABLE = (
+    "CREATE TABLE IF NOT EXISTS review_aggregates (\n"
+    "    scope TEXT PRIMARY KEY,\n"
+    + ",\n".join(f"    {col} REAL NOT NULL DEFAULT 0" for col in AGGREGATE_COLUMNS)
+    + "\n)"
+)
+
+CREATE_VALUE_COUNTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS review_value_counts (
+        scope TEXT NOT NULL,
+        field TEXT NOT NULL,
+        value REAL NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, field, value)
+    )
+"""
+
+
+def _star(rating):
+    # Same bucketing as services.stats: Python's round(), 1..5 only
+    try:
+        star = int(round(rating))
+    except (TypeError, ValueError):
+        return None
+    return star if 1 <= star <= 5 else None
+
+
+def _polarity_bucket(polarity):
+    if polarity > 0.5:
+        return "very_positive"
+    if polarity > 0.1:
+        return "pol_positive"
+    if polarity >= -0.1:
+        return "pol_neutral"
+    if polarity >= -0.5:
+        return "pol_negative"
+    return "very_negative"
+
+
+def polarity_value(polarity):
+    """Centre of the POLARITY_RESOLUTION bucket holding `polarity`.
+
+    Rounds halves up (floor(x + 0.5)) rather than to even, so the same
+    bucket can be computed in SQL.
+    """
+    steps = round(1 / POLARITY_RESOLUTION)
+    return math.floor(polarity * steps + 0.5) / steps
+
+
+def polarity_value_sql(column="polarity"):
+    """SQL expression computing polarity_value(column); floor() via CAST."""
+    steps = round(1 / POLARITY_RESOLUTION)
+    x = f"({column} * {steps} + 0.5)"
+    return f"((CAST({x} AS INTEGER) - ({x} < CAST({x} AS INTEGER))) / {steps}.0)"
+
+
+def _empty():
+    return {col: 0 for col in AGGREGATE_COLUMNS}
+
+
+def accumulate(acc, values, review):
+    """Add one review (dict with sentiment, rating, polarity, review_text) to `acc`.
+
+    `values` collects (field, value) -> count for the distinct-value table.
+    """
+    acc["total"] += 1
+    sentiment = (review.get("sentiment") or "").lower()
+    if sentiment in SENTIMENT_COLUMNS:
+        acc[sentiment] += 1
+
+    rating = review.get("rating")
+    polarity = review.get("polarity")
+    length = len(review.get("review_text") or "")
+
+    star = _star(rating)
+    if star is not None:
+        acc[f"star_{star}"] += 1
+        acc[f"star_polarity_sum_{star}"] += polarity or 0
+
+    acc[_polarity_bucket(polarity or 0)] += 1
+
+    # Moments and co-moments only cover reviews with both numbers present
+    if rating is None or polarity is None:
+        return
+    acc["n"] += 1
+    r_pow = p_pow = 1.0
+    for k in range(1, 5):
+        r_pow *= rating
+        p_pow *= polarity
+        acc[f"rating_sum{k}"] += r_pow
+        acc[f"polarity_sum{k}"] += p_pow
+    acc["length_sum1"] += length
+    acc["length_sum2"] += length * length
+    acc["rating_polarity_sum"] += rating * polarity
+    acc["rating_length_sum"] += rating * length
+
+    for field, value in (("rating", rating), ("polarity", polarity_value(polarity))):
+        values[(field, value)] = values.get((field, value), 0) + 1
+
+
+def _apply(cursor, per_scope):
+    columns = ", ".join(AGGREGATE_COLUMNS)
+    placeholders = ", ".join("?" * len(AGGREGATE_COLUMNS))
+    updates = ", ".join(f"{col} = {col} + excluded.{col}" for col in AGGREGATE_COLUMNS)
+    cursor.executemany(
+        f"INSERT INTO review_aggregates (scope, {columns}) VALUES (?, {placeholders}) "
+        f"ON CONFLICT(scope) DO UPDATE SET {updates}",
+        [(scope, *(acc[col] for col in AGGREGATE_COLUMNS)) for scope, (acc, _) in per_scope.items()],
+    )
+    cursor.executemany(
+        "INSERT INTO review_value_counts (scope, field, value, count) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(scope, field, value) DO UPDATE SET count = count + excluded.count",
+        [
+            (scope, field, value, count)
+            for scope, (_, values) in per_scope.items()
+            for (field, value), count in values.items()
+        ],
+    )
+
+
+def update_aggregates(cursor, reviews):
+    """Fold newly inserted reviews into their product scope and the global scope.
+
+    Must run in the same transaction as the insert.
+    """
+    per_scope = {}
+    for review in reviews:
+        for scope in (GLOBAL_SCOPE, review.get("product_id")):
+            if scope is None:
+                continue
+            if scope not in per_scope:
+                per_scope[scope] = (_empty(), {})
+            acc, values = per_scope[scope]
+            accumulate(acc, values, review)
+    if per_scope:
+        _apply(cursor, per_scope)
+
+
+def rebuild_aggregates(cursor):
+    """Recompute every aggregate from the reviews table."""
+    cursor.execute("DELETE FROM review_aggregates")
+    cursor.execute("DELETE FROM review_value_counts")
+    cursor.execute("SELECT product_id, sentiment, rating, polarity, review_text FROM reviews")
+    while True:
+        rows = cursor.fetchmany(5000)
+        if not rows:
+            break
+        update_aggregates(cursor.connection.cursor(), [{
+            "product_id": row[0],
+            "sentiment": row[1],
+            "rating": row[2],
+            "polarity": row[3],
+            "review_text": row[4],
+        } for row in rows])
+
+
+def clear_aggregates(cursor):
+    cursor.execute("DELETE FROM review_aggregates")
+    cursor.execute("DELETE FROM review_value_counts")
+
+
+def load_aggregates(conn, scope=GLOBAL_SCOPE):
+    """Aggregate row for `scope` plus its sorted value counts.
+
+    Returns {"totals": {...}, "values": {"rating": [(value, count), ...],
+    "polarity": [...]}}, polarity values being bucket centres (see
+    polarity_value); an unknown scope yields all zeros.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(AGGREGATE_COLUMNS)} FROM review_aggregates WHERE scope = ?", (scope,))
+    row = cursor.fetchone()
+    totals = {col: row[i] for i, col in enumerate(AGGREGATE_COLUMNS)} if row else _empty()
+
+    values = {"rating": [], "polarity": []}
+    cursor.execute(
+        "SELECT field, value, count FROM review_value_counts WHERE scope = ? AND count > 0 ORDER BY field, value",
+        (scope,),
+    )
+    for field, value, count in cursor.fetchall():
+        values[field].append((value, count))
+    return {"totals": totals, "values": values}
@@ -1,23 +1,195 @@
+import hashlib
+import queue
 import sqlite3
+import threading
+
+from configs.aggregates import (
+    CREATE_AGGREGATES_TABLE,
+    GLOBAL_SCOPE,
+    CREATE_VALUE_COUNTS_TABLE,
+    clear_aggregates,
+    rebuild_aggregates,
+    update_aggregates,
+)
 
 DB_NAME = "sqlite.db"
 
+# Idle connections kept open for reuse; extra connections are opened on
+# demand under load and closed when they are returned to a full pool.
+POOL_SIZE = 8
+
+# Applied to every new connection
+PRAGMAS = [
+    "PRAGMA journal_mode = WAL",        # readers no longer block on a writer
+    "PRAGMA synchronous = NORMAL",      # durable enough with WAL, far fewer fsyncs
+    "PRAGMA busy_timeout = 5000",       # wait for locks instead of failing
+    "PRAGMA cache_size = -32000",       # 32 MB page cache per connection
+    "PRAGMA mmap_size = 268435456",     # memory-map up to 256 MB of the file
+    "PRAGMA temp_store = MEMORY",
+]
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to the pool."""
+
+    pool = None
+    checked_out = False
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        elif self.checked_out:
+            self.pool.release(self)
+        # Closing an already returned connection is a no-op
+
+    def really_close(self):
+        self.pool = None
+        super().close()
+
+
+class ConnectionPool:
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.stats = {"created": 0, "reused": 0, "closed": 0, "in_use": 0}
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, factory=PooledConnection, check_same_thread=False)
+        conn.pool = self
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self.stats["created"] += 1
+        print("✅ DB Connected Successfully")
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+            with self._lock:
+                self.stats["reused"] += 1
+        except queue.Empty:
+            conn = self._connect()
+        conn.row_factory = sqlite3.Row
+        conn.checked_out = True
+        with self._lock:
+            self.stats["in_use"] += 1
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            self.stats["in_use"] -= 1
+        conn.checked_out = False
+        try:
+            # Never hand out a connection with a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.really_close()
+            with self._lock:
+                self.stats["closed"] += 1
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().really_close()
+            except queue.Empty:
+                break
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["idle"] = self._idle.qsize()
+        stats["size"] = self.size
+        stats["path"] = self.path
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_NAME:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = ConnectionPool(DB_NAME)
+        return _pool
+
+
 def get_db():
-    conn = sqlite3.connect(DB_NAME)
+    """Borrow a configured connection; conn.close() returns it to the pool."""
+    return _get_pool().acquire()
+
+
+def open_db():
+    """A configured connection outside the pool; conn.close() really closes it.
+
+    For long-lived readers such as client-paced exports: they keep one read
+    snapshot open for their whole run, which would tie up a pooled
+    connection and keep WAL checkpoints from completing past it.
+    """
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
     conn.row_factory = sqlite3.Row
-    print("✅ DB Connected Successfully")
     return conn
 
 
-def init_db():
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    # Drop existing tables to clean up (sqlite_sequence will be dropped automatically)
-    # cursor.execute("DROP TABLE IF EXISTS reviews")
-    # cursor.execute("DROP TABLE IF EXISTS products")
+def pool_stats():
+    return _get_pool().snapshot()
 
-    cursor.execute("""
+
+def close_pool():
+    """Close every idle pooled connection (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+            _pool = None
+
+
+def review_fingerprint(product_id, review_title, review_text, amazon_review_id=None, import_key=None):
+    """Stable identity of a review within its product.
+
+    The Amazon review id when known, else the content key of an imported
+    row (see services.review_import.import_key). Only reviews with neither
+    fall back to a hash of title and text, which treats identical reviews
+    (e.g. two customers writing "Good product") as one.
+    """
+    if amazon_review_id:
+        return f"{product_id}:amazon:{amazon_review_id}"
+    if import_key:
+        return f"{product_id}:row:{import_key}"
+    digest = hashlib.sha1(f"{review_title or ''}\x1f{review_text or ''}".encode("utf-8")).hexdigest()
+    return f"{product_id}:{digest}"
+
+
+def _backfill_review_fingerprints(cursor):
+    # Older rows may already contain duplicates; only the first copy gets the
+    # fingerprint so the unique index can be built, later copies stay NULL.
+    cursor.execute("SELECT id, product_id, review_title, review_text FROM reviews ORDER BY id")
+    seen = set()
+    updates = []
+    for row in cursor.fetchall():
+        fingerprint = review_fingerprint(row[1], row[2], row[3])
+        if fingerprint not in seen:
+            seen.add(fingerprint)
+            updates.append((fingerprint, row[0]))
+    cursor.executemany("UPDATE reviews SET review_fingerprint = ? WHERE id = ?", updates)
+
+
+# Schema migrations, applied in order. Each entry is (version, description,
+# steps); a step is an SQL statement or a callable taking the cursor.
+# Never edit an applied migration: append a new one instead.
+MIGRATIONS = [
+    (1, "create products and reviews tables", [
+        """
         CREATE TABLE IF NOT EXISTS products (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             product_id TEXT DEFAULT (lower(hex(randomblob(8)))) UNIQUE,
@@ -27,9 +199,8 @@ def init_db():
             product_price TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    
-    cursor.execute("""
+        """,
+        """
         CREATE TABLE IF NOT EXISTS reviews (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             product_id TEXT,
@@ -41,8 +212,255 @@ def init_db():
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (product_id) REFERENCES products (product_id)
         )
+        """,
+    ]),
+    (2, "create sentiment_cache table", [
+        # Sentiment scores keyed by a hash of the normalized review text + scorer
+        """
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            text_hash TEXT PRIMARY KEY,
+            scorer TEXT,
+            sentiment TEXT,
+            polarity REAL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+    (3, "index reviews by product and sentiment cache by scorer", [
+        # Serves WHERE product_id = ? ORDER BY id DESC LIMIT n straight from the
+        # index, plus the products/dashboard joins on reviews.product_id
+        "CREATE INDEX IF NOT EXISTS idx_reviews_product_id ON reviews (product_id, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_sentiment_cache_scorer ON sentiment_cache (scorer)",
+    ]),
+    (4, "add unique review fingerprints", [
+        "ALTER TABLE reviews ADD COLUMN review_fingerprint TEXT",
+        _backfill_review_fingerprints,
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_reviews_fingerprint ON reviews (review_fingerprint)",
+    ]),
+    (5, "add per-product and global review aggregates", [
+        CREATE_AGGREGATES_TABLE,
+        CREATE_VALUE_COUNTS_TABLE,
+        rebuild_aggregates,
+    ]),
+    (6, "add data version counters", [
+        # Bumped on every write to reviews; never reset, so versions (and the
+        # cache keys / ETags built from them) are not reused after a clear
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ]),
+    (7, "index reviews by rating for sorted listings", [
+        "CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews (rating, id)",
+    ]),
+    (8, "index reviews by date for date-scoped dashboards", [
+        "CREATE INDEX IF NOT EXISTS idx_reviews_created_at ON reviews (created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_reviews_product_created_at ON reviews (product_id, created_at)",
+    ]),
+    (9, "create scrape_jobs table", [
+        """
+        CREATE TABLE IF NOT EXISTS scrape_jobs (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            stage TEXT,
+            message TEXT,
+            scraped INTEGER NOT NULL DEFAULT 0,
+            scored INTEGER NOT NULL DEFAULT 0,
+            saved INTEGER NOT NULL DEFAULT 0,
+            skipped INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+        """,
+        # At most one queued / running job per URL, even across processes
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_scrape_jobs_active_url ON scrape_jobs (url) "
+        "WHERE status IN ('queued', 'running')",
+        "CREATE INDEX IF NOT EXISTS idx_scrape_jobs_created_at ON scrape_jobs (created_at)",
+    ]),
+    (10, "add amazon review ids and scrape job modes", [
+        "ALTER TABLE reviews ADD COLUMN amazon_review_id TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_reviews_product_amazon_id ON reviews (product_id, amazon_review_id)",
+        # 'scrape' for a first scrape, 'refresh' to fetch only newer reviews
+        "ALTER TABLE scrape_jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'scrape'",
+    ]),
+    (11, "key reviews with an amazon id on that id", [
+        # Same format as review_fingerprint(..., amazon_review_id=...)
+        "UPDATE OR IGNORE reviews SET review_fingerprint = product_id || ':amazon:' || amazon_review_id "
+        "WHERE amazon_review_id IS NOT NULL AND amazon_review_id != ''",
+    ]),
+    (12, "count polarity values in fixed buckets", [
+        # review_value_counts held one row per distinct polarity
+        rebuild_aggregates,
+    ]),
+]
+
+
+def schema_version(cursor):
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations in order; returns the resulting schema version."""
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
     """)
+    conn.commit()
 
+    current = schema_version(cursor)
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            # Another process may have applied it while we waited for the lock
+            if schema_version(cursor) >= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(cursor)
+                else:
+                    cursor.execute(step)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (?, ?)",
+                (version, description),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+        print(f"🛠️ Applied migration {version}: {description}")
+
+    # Refresh query planner statistics for the new indexes
+    cursor.execute("PRAGMA optimize")
+    return current
+
+
+def init_db():
+    conn = get_db()
+    try:
+        version = migrate(conn)
+    finally:
+        conn.close()
+    print(f"Database tables initialized successfully (schema version {version})")
+
+
+def bump_data_versions(cursor, scopes=None):
+    """Advance the data version of `scopes` (product ids / GLOBAL_SCOPE).
+
+    With scopes=None every known scope is bumped. Call inside the write's
+    transaction.
+    """
+    if scopes is None:
+        cursor.execute("UPDATE data_versions SET version = version + 1")
+        scopes = [GLOBAL_SCOPE]
+    cursor.executemany(
+        "INSERT INTO data_versions (scope, version) VALUES (?, 1) "
+        "ON CONFLICT(scope) DO UPDATE SET version = version + 1",
+        [(scope,) for scope in scopes],
+    )
+
+
+def get_data_version(conn, scope=GLOBAL_SCOPE):
+    """Current data version of `scope` (0 before its first write)."""
+    row = conn.execute("SELECT version FROM data_versions WHERE scope = ?", (scope,)).fetchone()
+    return row[0] if row else 0
+
+
+def insert_reviews(conn, reviews, add_products=False):
+    """Bulk insert scored reviews in one transaction, skipping duplicates.
+
+    Each review dict needs product_id, review_title, review_text, rating,
+    sentiment and polarity; created_at, amazon_review_id and import_key
+    (see services.review_import) are optional. Reviews whose fingerprint (see
+    review_fingerprint) is already stored are ignored. The review
+    aggregates and data versions are updated in the same transaction.
+
+    With `add_products` a minimal products row (named after its id, no
+    URL) is created for every product_id not stored yet, also in the same
+    transaction, so imported reviews are never orphaned.
+    Returns {"inserted": n, "skipped": m, "products": new product rows}.
+    """
+    batch = {}
+    for r in reviews:
+        fingerprint = review_fingerprint(r["product_id"], r["review_title"], r["review_text"],
+                                         r.get("amazon_review_id"), r.get("import_key"))
+        batch.setdefault(fingerprint, r)
+    if not batch:
+        return {"inserted": 0, "skipped": 0, "products": 0}
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("BEGIN IMMEDIATE")
+        products = 0
+        if add_products:
+            cursor.executemany(
+                "INSERT INTO products (product_id, product_name, product_price) VALUES (?, ?, 'Price not available') "
+                "ON CONFLICT(product_id) DO NOTHING",
+                [(product_id, product_id) for product_id in {r["product_id"] for r in batch.values()}],
+            )
+            products = cursor.rowcount
+        fingerprints = list(batch)
+        for i in range(0, len(fingerprints), 500):
+            chunk = fingerprints[i:i + 500]
+            cursor.execute(
+                f"SELECT review_fingerprint FROM reviews WHERE review_fingerprint IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in cursor.fetchall():
+                batch.pop(row[0], None)
+
+        cursor.executemany("""
+            INSERT OR IGNORE INTO reviews
+                (product_id, review_title, review_text, rating, sentiment, polarity, created_at,
+                 review_fingerprint, amazon_review_id)
+            VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?)
+        """, [(
+            r["product_id"],
+            r["review_title"],
+            r["review_text"],
+            r["rating"],
+            r["sentiment"],
+            r["polarity"],
+            r.get("created_at"),
+            fingerprint,
+            r.get("amazon_review_id"),
+        ) for fingerprint, r in batch.items()])
+        update_aggregates(cursor, list(batch.values()))
+        if batch:
+            bump_data_versions(cursor, {GLOBAL_SCOPE} | {r["product_id"] for r in batch.values() if r["product_id"]})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    inserted = len(batch)
+    return {"inserted": inserted, "skipped": len(reviews) - inserted, "products": products}
+
+
+def known_review_keys(conn, product_id):
+    """Fingerprints and Amazon review ids of the reviews stored for a product."""
+    rows = conn.execute(
+        "SELECT review_fingerprint, amazon_review_id FROM reviews WHERE product_id = ?", (product_id,)
+    ).fetchall()
+    return {key for row in rows for key in row if key}
+
+
+def clear_data(conn):
+    """Delete every product and review together with their aggregates."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM reviews")
+    cursor.execute("DELETE FROM products")
+    clear_aggregates(cursor)
+    bump_data_versions(cursor)
     conn.commit()
-    conn.close()
-    print("Database tables initialized successfully")
\ No newline at end of file
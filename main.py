@@ -1,18 +1,58 @@
+from datetime import date
+from typing import Optional
+from urllib.parse import urlencode
+
 from fastapi import FastAPI, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
-from configs.database import init_db, get_db
-from services.scraper import scrape_reviews, extract_product_details
-from services.sentiment import analyze_sentiment
-from services.stats import calculate_stats, calculate_correlations, calculate_detailed_sentiment_distribution, calculate_advanced_metrics, get_sentiment_by_rating
-from services.plots import (
-    generate_review_length_plot, 
-    generate_sentiment_polarity_plot,
-    generate_length_by_rating_plot,
-    generate_rating_spread_plot
+from configs.database import init_db, get_db, open_db, close_pool, pool_stats, clear_data, get_data_version
+from configs.aggregates import GLOBAL_SCOPE, load_aggregates
+from services.jobs import (
+    QUEUE_FULL_MESSAGE,
+    JobQueueFullError,
+    get_job,
+    job_events,
+    list_jobs,
+    merge_job_events,
+    start_job_workers,
+    stop_job_workers,
+    submit_job,
+    submit_jobs,
+)
+from services.review_queries import (
+    DEFAULT_PAGE_SIZE,
+    PRODUCT_SORTS,
+    REVIEW_SORTS,
+    fetch_review_page,
+    iter_reviews,
+    product_listing,
+    review_filters,
+    review_listing,
 )
+from services.http_client import close_client
+from services.parser import shutdown_parser_pool
+from services.sentiment import shutdown_sentiment_pool, init_sentiment_cache, cache_stats
+from services.stats import calculate_dashboard_from_aggregates
+from services.stats_sql import calculate_dashboard_sql
+from services.plot_cache import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    etag_matches,
+    get_cached,
+    plot_cache_stats,
+    plot_etag,
+    plot_key,
+    put_cached,
+    record_not_modified,
+)
+from services.plots import PLOT_COLUMNS, PLOT_SIZES
+from services.chart_data import CHART_DATA
+from services.page_cache import page_cache_stats
+from services.review_import import IMPORT_FORMATS, ImportFormatError, detect_format, import_reviews, iter_rows, open_import_file
+from services.review_export import EXPORT_FORMATS, ExportError, export_chunks
+from services.render import RenderBusyError, RenderTimeoutError, render_plot, render_stats, shutdown_render_pool
 
 app = FastAPI()
 
@@ -21,8 +61,20 @@ templates = Jinja2Templates(directory="template")
 
 
 @app.on_event("startup")
-def startup():
+async def startup():
     init_db()
+    init_sentiment_cache()
+    start_job_workers()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_job_workers()
+    await close_client()
+    shutdown_parser_pool()
+    shutdown_sentiment_pool()
+    shutdown_render_pool()
+    close_pool()
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -33,6 +85,26 @@ def index(request: Request):
 import json
 import asyncio
 
+def _normalize_url(url):
+    # Fix URL if it doesn't have protocol
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def _form_flag(form, name):
+    return str(form.get(name, "")).lower() in ("1", "true", "on", "yes")
+
+
+def _stream_job(job_id):
+    async def event_generator():
+        # Only the subscription ends on disconnect; the job keeps running
+        async for event in job_events(job_id):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+
+
 @app.post("/api/scrape")
 async def scrape_stream(request: Request):
     form = await request.form()
@@ -41,104 +113,175 @@ async def scrape_stream(request: Request):
     if not url:
          return Response(json.dumps({"error": "URL is required"}), media_type="application/json")
 
-    # Fix URL if it doesn't have protocol
-    if not url.startswith(('http://', 'https://')):
-        url = 'https://' + url
-            
+    url = _normalize_url(url)
     print(f"Starting analysis for URL: {url}")
 
+    try:
+        job_id, _ = await submit_job(url, refresh=_form_flag(form, "refresh"))
+    except JobQueueFullError as e:
+        return Response(json.dumps({"type": "error", "message": str(e)}) + "\n", status_code=503,
+                        media_type="application/x-ndjson")
+
+    # Reviews are scored and committed page by page by the background job
+    return _stream_job(job_id)
+
+
+@app.post("/api/jobs")
+async def create_job(request: Request):
+    form = await request.form()
+    url = form.get("url")
+    if not url:
+        return Response(json.dumps({"error": "URL is required"}), status_code=400, media_type="application/json")
+
+    try:
+        job_id, coalesced = await submit_job(_normalize_url(url), refresh=_form_flag(form, "refresh"))
+    except JobQueueFullError as e:
+        return Response(json.dumps({"error": str(e)}), status_code=503, media_type="application/json")
+    return {"job_id": job_id, "coalesced": coalesced, **await asyncio.to_thread(get_job, job_id)}
+
+
+# URLs accepted by one /api/batch request
+MAX_BATCH_URLS = 500
+SUMMARY_FIELDS = ("status", "message", "scraped", "scored", "saved", "skipped")
+
+
+def _collect_urls(lines, urls):
+    """Append the new product URLs among `lines` to `urls`.
+
+    Stops reading once `urls` holds more than MAX_BATCH_URLS; returns False
+    in that case.
+    """
+    for line in lines:
+        url = line.split(",")[0].strip().strip('"')
+        if not url or url.startswith("#") or ("." not in url and "/" not in url):
+            continue
+        url = _normalize_url(url)
+        if url not in urls:
+            urls.append(url)
+            if len(urls) > MAX_BATCH_URLS:
+                return False
+    return True
+
+
+async def _batch_urls(form):
+    """Product URLs from `urls` fields (one per line) and an uploaded `file`.
+
+    File lines may be CSV rows; their first column is used. Blank lines,
+    '#' comments and header-like lines are skipped. Duplicates are dropped.
+    The upload is read line by line and reading stops after
+    MAX_BATCH_URLS + 1 URLs, enough to reject an oversized batch.
+    """
+    urls = []
+    for value in form.getlist("urls"):
+        if not _collect_urls(str(value).splitlines(), urls):
+            return urls
+    upload = form.get("file")
+    if upload is not None and hasattr(upload, "file"):
+        lines = (line.decode("utf-8-sig", errors="replace") for line in upload.file)
+        await asyncio.to_thread(_collect_urls, lines, urls)
+    return urls
+
+
+def _stream_batch(submitted, rejected):
     async def event_generator():
-        conn = get_db()
-        cursor = conn.cursor()
-        
-        try:
-             # Check if product already exists
-            cursor.execute("SELECT product_id, product_name FROM products WHERE product_url = ?", (url,))
-            existing_product = cursor.fetchone()
-            
-            if existing_product:
-                print(f"Product already exists: {existing_product['product_name']}")
-                yield json.dumps({"type": "completed", "message": "Product already exists"}) + "\n"
-                return
-
-            yield json.dumps({"type": "progress", "count": 0, "total": 100, "message": "Extracting product details..."}) + "\n"
-            
-            # Extract product details
-            product_details = extract_product_details(url)
-            
-            # Insert product into database
-            cursor.execute("""
-                INSERT INTO products (product_name, product_url, product_image, product_price)
-                VALUES (?, ?, ?, ?)
-            """, (
-                product_details["product_name"],
-                product_details["product_url"],
-                product_details["product_image"],
-                product_details["product_price"]
-            ))
-            
-            # Get the product_id of the inserted product
-            cursor.execute("SELECT product_id FROM products WHERE product_url = ?", (url,))
-            product_record = cursor.fetchone()
-            product_id = product_record["product_id"]
-            
-            print(f"Product saved with ID: {product_id}")
-            
-            # Scrape reviews
-            reviews_generator = scrape_reviews(url=url, product_id=product_id, limit=100)
-            
-            raw_reviews = []
-            async for event in reviews_generator:
-                if event["type"] == "progress":
-                    yield json.dumps(event) + "\n"
-                elif event["type"] == "result":
-                    raw_reviews = event["reviews"]
-
-            if not raw_reviews:
-                 print("⚠️ No reviews found. Saving product details only.")
-                 yield json.dumps({"type": "progress", "count": 0, "total": 0, "message": "No reviews found. Saving product details only..."}) + "\n"
-            else:
-                yield json.dumps({"type": "progress", "count": len(raw_reviews), "total": 100, "message": "Creating sentiment analysis..."}) + "\n"
-
-            saved_count = 0
-            for r in raw_reviews:
-                try:
-                    sentiment, polarity = analyze_sentiment(r["review_text"])
-                    
-                    cursor.execute("""
-                        INSERT INTO reviews (product_id, review_title, review_text, rating, sentiment, polarity)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        r["product_id"],
-                        r["review_title"],
-                        r["review_text"],
-                        r["rating"],
-                        sentiment,
-                        polarity
-                    ))
-                    saved_count += 1
-                    
-                except Exception as e:
-                    print(f"Error saving review: {str(e)}")
-                    continue
-            
-            conn.commit()
-            print(f"Successfully saved product and {saved_count} reviews to database")
-            
-            completion_msg = "Analysis complete!"
-            if not raw_reviews:
-                completion_msg = "Product saved (no reviews found)."
-                
-            yield json.dumps({"type": "completed", "message": completion_msg}) + "\n"
+        yield json.dumps({"type": "batch", "jobs": submitted, "rejected": rejected}) + "\n"
 
-        except Exception as e:
-            print(f"Error in streaming scrape: {repr(e)}")
-            yield json.dumps({"type": "error", "message": f"{str(e)} ({type(e).__name__})"}) + "\n"
-        finally:
-            conn.close()
+        url_by_job = {job["job_id"]: job["url"] for job in submitted}
+        # Events of every job in one feed, tagged with their URL
+        async for job_id, event in merge_job_events(list(url_by_job)):
+            yield json.dumps({**event, "url": url_by_job[job_id], "job_id": job_id}) + "\n"
+
+        results = []
+        states = await asyncio.to_thread(lambda: [get_job(job_id) for job_id in url_by_job])
+        for (job_id, url), state in zip(url_by_job.items(), states):
+            state = state or {}
+            results.append({"url": url, "job_id": job_id, **{k: state.get(k) for k in SUMMARY_FIELDS}})
+        results.extend({"url": r["url"], "status": "rejected", "message": r["message"]} for r in rejected)
+        yield json.dumps({"type": "summary", "results": results}) + "\n"
 
     return StreamingResponse(event_generator(), media_type="application/x-ndjson")
 
+
+@app.post("/api/batch")
+async def batch_scrape(request: Request):
+    """Scrape many products at once and stream one NDJSON feed for all of them.
+
+    The jobs run on the shared scrape workers, so SCRAPE_CONCURRENCY and
+    SCRAPE_JOBS_PER_HOST apply across the batch.
+    """
+    form = await request.form()
+    urls = await _batch_urls(form)
+    if not urls:
+        return Response(json.dumps({"error": "No URLs given"}), status_code=400, media_type="application/json")
+    if len(urls) > MAX_BATCH_URLS:
+        return Response(json.dumps({"error": f"At most {MAX_BATCH_URLS} URLs per batch"}), status_code=413,
+                        media_type="application/json")
+
+    refresh = _form_flag(form, "refresh")
+    submitted, rejected = [], []
+    for url, result in zip(urls, await submit_jobs(urls, refresh=refresh)):
+        if result is None:
+            rejected.append({"url": url, "message": QUEUE_FULL_MESSAGE})
+            continue
+        job_id, coalesced = result
+        submitted.append({"url": url, "job_id": job_id, "coalesced": coalesced})
+    print(f"📦 Batch of {len(urls)} URLs: {len(submitted)} queued, {len(rejected)} rejected")
+
+    return _stream_batch(submitted, rejected)
+
+
+def _refresh_urls(product_id=None):
+    conn = get_db()
+    try:
+        if product_id:
+            return conn.execute("SELECT product_url FROM products WHERE product_id = ?", (product_id,)).fetchall()
+        # Imported products have no URL to scrape
+        return conn.execute("SELECT product_url FROM products WHERE product_url IS NOT NULL ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+@app.post("/api/refresh")
+async def refresh_products(product_id: Optional[str] = None):
+    """Queue a refresh job for one product, or for every stored product."""
+    # Async so submit_jobs runs on the event loop that owns the job queue
+    rows = await asyncio.to_thread(_refresh_urls, product_id)
+    if product_id and not rows:
+        return Response(json.dumps({"error": "Unknown product"}), status_code=404, media_type="application/json")
+    if product_id and not rows[0]["product_url"]:
+        return Response(json.dumps({"error": "Product has no URL to refresh"}), status_code=400,
+                        media_type="application/json")
+
+    urls = [row["product_url"] for row in rows]
+    jobs, not_queued = [], []
+    for url, result in zip(urls, await submit_jobs(urls, refresh=True)):
+        if result is None:
+            not_queued.append(url)
+            continue
+        job_id, coalesced = result
+        jobs.append({"job_id": job_id, "url": url, "coalesced": coalesced})
+    return {"jobs": jobs, "not_queued": not_queued}
+
+
+@app.get("/api/jobs")
+def get_jobs(limit: int = 50):
+    return list_jobs(max(1, min(limit, 500)))
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return Response(json.dumps({"error": "Unknown job"}), status_code=404, media_type="application/json")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/stream")
+def stream_job(job_id: str):
+    if get_job(job_id) is None:
+        return Response(json.dumps({"error": "Unknown job"}), status_code=404, media_type="application/json")
+    return _stream_job(job_id)
+
 @app.post("/scrape")
 def scrape(
     url: str = Form(...)
@@ -147,41 +290,64 @@ def scrape(
     return RedirectResponse(url="/dashboard", status_code=303)
 
 
-@app.get("/reviews", response_class=HTMLResponse)
-def reviews_page(request: Request):
-    conn = get_db()
-    cursor = conn.cursor()
+def _stream_template(name, context, conn):
+    """Render a template chunk by chunk; the page's rows are read as it goes."""
+    stream = templates.get_template(name).stream(context)
+    stream.enable_buffering(20)
+    try:
+        yield from stream
+    finally:
+        conn.close()
 
-    cursor.execute("""
-        SELECT r.*, p.product_name, p.product_image, p.product_price 
-        FROM reviews r 
-        LEFT JOIN products p ON r.product_id = p.product_id 
-        ORDER BY r.id DESC
-    """)
-    reviews = cursor.fetchall()
 
-    conn.close()
+def _page_url(path, params, cursor):
+    query = {k: v for k, v in params.items() if v not in (None, "")}
+    if cursor:
+        query["cursor"] = cursor
+    return f"{path}?{urlencode(query)}"
 
-    return templates.TemplateResponse("reviews.jinja2", {"request": request, "reviews": reviews})
 
-
-@app.get("/products", response_class=HTMLResponse)
-def products_page(request: Request):
+@app.get("/reviews", response_class=HTMLResponse)
+def reviews_page(
+    request: Request,
+    cursor: Optional[str] = None,
+    sort: str = "newest",
+    product_id: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None
+):
+    filters = {"product_id": product_id, "sentiment": sentiment, "min_rating": min_rating, "max_rating": max_rating}
     conn = get_db()
-    cursor = conn.cursor()
+    page = review_listing(conn, cursor=cursor, sort=sort, **filters)
 
-    cursor.execute("""
-        SELECT p.*, COUNT(r.id) as review_count 
-        FROM products p 
-        LEFT JOIN reviews r ON p.product_id = r.product_id 
-        GROUP BY p.product_id 
-        ORDER BY p.id DESC
-    """)
-    products = cursor.fetchall()
+    return StreamingResponse(_stream_template("reviews.jinja2", {
+        "request": request,
+        "reviews": page,
+        "sort": sort,
+        "sorts": list(REVIEW_SORTS),
+        "filters": filters,
+        "is_first_page": not cursor,
+        "first_url": _page_url("/reviews", {"sort": sort, **filters}, None),
+        "next_url": lambda: _page_url("/reviews", {"sort": sort, **filters}, page.next_cursor)
+    }, conn), media_type="text/html")
 
-    conn.close()
 
-    return templates.TemplateResponse("products.jinja2", {"request": request, "products": products})
+@app.get("/products", response_class=HTMLResponse)
+def products_page(request: Request, cursor: Optional[str] = None, sort: str = "newest", q: Optional[str] = None):
+    conn = get_db()
+    page = product_listing(conn, cursor=cursor, sort=sort, q=q)
+
+    return StreamingResponse(_stream_template("products.jinja2", {
+        "request": request,
+        "products": page,
+        "sort": sort,
+        "sorts": list(PRODUCT_SORTS),
+        "q": q or "",
+        "is_first_page": not cursor,
+        "first_url": _page_url("/products", {"sort": sort, "q": q}, None),
+        "next_url": lambda: _page_url("/products", {"sort": sort, "q": q}, page.next_cursor)
+    }, conn), media_type="text/html")
 
 @app.get("/api/product-reviews/{product_id}")
 def get_product_reviews(product_id: str):
@@ -213,16 +379,139 @@ def get_product_reviews(product_id: str):
     print(f"Returning {len(reviews)} reviews")
     return reviews
 
+def _stream_reviews(filters, as_array=False):
+    """Encode matching reviews as they are read, a fetchmany batch at a time.
+
+    NDJSON by default; as_array writes one JSON list instead.
+    """
+    conn = get_db()
+    try:
+        if as_array:
+            yield "["
+        for i, review in enumerate(iter_reviews(conn, **filters)):
+            if as_array:
+                yield ("," if i else "") + json.dumps(review)
+            else:
+                yield json.dumps(review) + "\n"
+        if as_array:
+            yield "]"
+    finally:
+        conn.close()
+
+
+@app.post("/api/import")
+async def import_review_file(request: Request):
+    """Bulk import an uploaded CSV / JSONL review file, streaming NDJSON progress.
+
+    The upload is spooled to a temporary file by the form parser and then
+    read in chunks; each chunk's progress is sent as soon as it is stored.
+    """
+    form = await request.form()
+    upload = form.get("file")
+    if upload is None or not hasattr(upload, "read"):
+        return Response(json.dumps({"error": "A file upload is required"}), status_code=400, media_type="application/json")
+    try:
+        fmt = form.get("format") or detect_format(upload.filename or "")
+        if fmt not in IMPORT_FORMATS:
+            raise ImportFormatError(f"Unknown import format: {fmt}")
+    except ImportFormatError as e:
+        return Response(json.dumps({"error": str(e)}), status_code=400, media_type="application/json")
+
+    print(f"📥 Importing {upload.filename} ({fmt})")
+    progress = import_reviews(iter_rows(open_import_file(upload.file, upload.filename or ""), fmt))
+
+    async def event_generator():
+        try:
+            while True:
+                # Parsing, scoring and inserting block, so each chunk runs off the loop
+                event = await asyncio.to_thread(next, progress, None)
+                if event is None:
+                    break
+                yield json.dumps({"type": "completed" if event["done"] else "progress", **event}) + "\n"
+        except Exception as e:
+            print(f"Error importing reviews: {repr(e)}")
+            yield json.dumps({"type": "error", "message": f"{str(e)} ({type(e).__name__})"}) + "\n"
+        finally:
+            await asyncio.to_thread(progress.close)
+            await upload.close()
+
+    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
+
+
 @app.get("/api/reviews")
-def get_all_reviews():
+def get_all_reviews(
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+    product_id: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None
+):
+    filters = {"product_id": product_id, "sentiment": sentiment, "min_rating": min_rating, "max_rating": max_rating}
+
+    if limit is None and after is None:
+        # Unpaginated: the plain JSON list (as Power BI reads it), streamed
+        return StreamingResponse(_stream_reviews(filters, as_array=True), media_type="application/json")
+
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM reviews")
-    rows = cursor.fetchall()
+    page = fetch_review_page(conn, limit or DEFAULT_PAGE_SIZE, after, **filters)
     conn.close()
-    
-    reviews = [dict(row) for row in rows]
-    return reviews
+    return page
+
+
+@app.get("/api/reviews/stream")
+def stream_reviews(
+    product_id: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None
+):
+    filters = {"product_id": product_id, "sentiment": sentiment, "min_rating": min_rating, "max_rating": max_rating}
+    return StreamingResponse(_stream_reviews(filters), media_type="application/x-ndjson")
+
+
+def _stream_export(conn, chunks):
+    try:
+        yield from chunks
+    finally:
+        conn.close()
+
+
+@app.get("/api/export/{table}")
+def export_table(
+    table: str,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    product_id: Optional[str] = None,
+    sentiment: Optional[str] = None,
+    min_rating: Optional[float] = None,
+    max_rating: Optional[float] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Download reviews or products as CSV, JSONL, Parquet or Arrow.
+
+    `columns` is a comma-separated projection. The file is encoded batch by
+    batch while it is sent, so exports of any size use bounded memory. The
+    download is paced by the client and reads one consistent snapshot
+    throughout, so it runs on its own connection rather than a pooled one.
+    """
+    filters = {"product_id": product_id, "sentiment": sentiment, "min_rating": min_rating,
+               "max_rating": max_rating, "date_from": date_from, "date_to": date_to}
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    conn = open_db()
+    try:
+        chunks = export_chunks(conn, table, format, selected, **filters)
+    except ExportError as e:
+        conn.close()
+        return Response(json.dumps({"error": str(e)}), status_code=400, media_type="application/json")
+
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        _stream_export(conn, chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'},
+    )
 
 
 @app.get("/debug/database")
@@ -247,97 +536,186 @@ def debug_database():
     return {
         "products": [dict(p) for p in products],
         "reviews": [dict(r) for r in reviews],
-        "total_reviews": dict(review_count)["count"]
+        "total_reviews": dict(review_count)["count"],
+        "sentiment_cache": cache_stats(),
+        "connection_pool": pool_stats(),
+        "plot_cache": plot_cache_stats(),
+        "render_pool": render_stats(),
+        "page_cache": page_cache_stats()
     }
 
 
-@app.get("/dashboard", response_class=HTMLResponse)
-def dashboard(request: Request):
-    conn = get_db()
-    cursor = conn.cursor()
+def _scope(product_id=None, date_from=None, date_to=None):
+    """Dashboard / plot scope: a product and an inclusive created_at date range."""
+    return {
+        "product_id": product_id or None,
+        "date_from": date_from.isoformat() if date_from else None,
+        "date_to": date_to.isoformat() if date_to else None,
+    }
 
-    cursor.execute("""
-        SELECT r.sentiment, r.rating, r.polarity, r.review_text, p.product_name 
-        FROM reviews r 
-        LEFT JOIN products p ON r.product_id = p.product_id
-    """)
-    rows = cursor.fetchall()
 
+@app.get("/dashboard", response_class=HTMLResponse)
+def dashboard(
+    request: Request,
+    mode: str = "aggregates",
+    plots: str = "server",
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    scope = _scope(product_id, date_from, date_to)
+    conn = get_db()
+    if mode == "sql" or date_from or date_to:
+        # Aggregated by SQLite straight from the (indexed, filtered) reviews rows;
+        # date ranges are not pre-aggregated
+        metrics = calculate_dashboard_sql(conn, **scope)
+    else:
+        # Served from the incrementally maintained aggregates, not the reviews table
+        metrics = calculate_dashboard_from_aggregates(load_aggregates(conn, scope["product_id"] or GLOBAL_SCOPE))
+    # Versioned plot URLs let the browser cache the images until the data changes
+    plot_version = get_data_version(conn, scope["product_id"] or GLOBAL_SCOPE)
+    products = conn.execute("SELECT product_id, product_name FROM products ORDER BY id DESC").fetchall()
     conn.close()
 
-    reviews = [{"sentiment": r["sentiment"], "rating": r["rating"], "polarity": r["polarity"], "review_text": r["review_text"]} for r in rows]
-    stats = calculate_stats(reviews)
-    correlations = calculate_correlations(reviews)
-    detailed_sentiment = calculate_detailed_sentiment_distribution(reviews)
-    advanced_metrics = calculate_advanced_metrics(reviews)
-
-    # Calculate sentiment by rating for charts
-    sentiment_by_rating = get_sentiment_by_rating(reviews)
+    scope_query = urlencode({k: v for k, v in scope.items() if v})
+    plot_query = urlencode({"v": plot_version}) + (f"&{scope_query}" if scope_query else "")
 
     return templates.TemplateResponse("dashboard.jinja2", {
         "request": request, 
-        "stats": stats, 
-        "correlations": correlations,
-        "detailed_sentiment": detailed_sentiment,
-        "advanced_metrics": advanced_metrics,
-        "sentiment_by_rating": sentiment_by_rating
+        "stats": metrics["stats"], 
+        "correlations": metrics["correlations"],
+        "detailed_sentiment": metrics["detailed_sentiment"],
+        "advanced_metrics": metrics["advanced_metrics"],
+        "sentiment_by_rating": metrics["sentiment_by_rating"],
+        "plot_query": plot_query,
+        "scope": scope,
+        "scope_query": scope_query,
+        "products": products,
+        # "client" draws the Matplotlib plots in the browser from /api/charts/*
+        "client_plots": plots == "client"
     })
 
 
 @app.get("/clear")
 def clear_db():
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM reviews")
-    cursor.execute("DELETE FROM products")
-    conn.commit()
+    clear_data(conn)
     conn.close()
 
     return RedirectResponse(url="/", status_code=303)
 
 
-@app.get("/plots/review_length")
-def plot_review_length():
+def _serve_cached(request, plot, variant, media_type, produce, scope):
+    """Serve a plot's PNG or chart data from the versioned cache.
+
+    On a miss the plot's review columns within `scope` are loaded and
+    `produce(reviews)` builds the response body.
+    """
     conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT review_text FROM reviews")
-    reviews = [{"review_text": row["review_text"]} for row in cursor.fetchall()]
-    conn.close()
-    
-    img = generate_review_length_plot(reviews)
-    return Response(content=img.getvalue(), media_type="image/png")
+    try:
+        # Read the version and the rows from one snapshot
+        conn.execute("BEGIN")
+        # A product's version only moves when that product's reviews change
+        version = get_data_version(conn, scope["product_id"] or GLOBAL_SCOPE)
+        key = plot_key(plot, (scope["product_id"] or GLOBAL_SCOPE, scope["date_from"], scope["date_to"]), version, variant)
+        etag = plot_etag(key)
+        # URLs carrying the current version (as the dashboard emits) never change
+        versioned = request.query_params.get("v") == str(version)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL if versioned else REVALIDATE_CACHE_CONTROL,
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            record_not_modified()
+            return Response(status_code=304, headers=headers)
+
+        body = get_cached(key)
+        if body is None:
+            columns = PLOT_COLUMNS[plot]
+            clauses, params = review_filters(**scope)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {', '.join(columns)} FROM reviews {where}", params)
+            reviews = [{col: row[col] for col in columns} for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+    if body is None:
+        # Built after the connection is back in the pool
+        try:
+            body = produce(reviews)
+        except RenderBusyError:
+            return Response(status_code=503, headers={"Retry-After": "1"})
+        except RenderTimeoutError:
+            return Response(status_code=504)
+        put_cached(key, body)
 
+    return Response(content=body, media_type=media_type, headers=headers)
 
-@app.get("/plots/sentiment_polarity")
-def plot_sentiment_polarity():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT polarity FROM reviews")
-    reviews = [{"polarity": row["polarity"]} for row in cursor.fetchall()]
-    conn.close()
 
-    img = generate_sentiment_polarity_plot(reviews)
-    return Response(content=img.getvalue(), media_type="image/png")
+def _serve_plot(request, plot, size, scope):
+    figsize = PLOT_SIZES.get(size)
+    if figsize is None:
+        size, figsize = "default", PLOT_SIZES["default"]
+    return _serve_cached(request, plot, size, "image/png",
+                         lambda reviews: render_plot(plot, reviews, figsize), scope)
 
 
-@app.get("/plots/length_by_rating")
-def plot_length_by_rating():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT rating, review_text FROM reviews")
-    reviews = [{"rating": row["rating"], "review_text": row["review_text"]} for row in cursor.fetchall()]
-    conn.close()
+@app.get("/plots/review_length")
+def plot_review_length(
+    request: Request,
+    size: str = "default",
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    return _serve_plot(request, "review_length", size, _scope(product_id, date_from, date_to))
+
+
+@app.get("/plots/sentiment_polarity")
+def plot_sentiment_polarity(
+    request: Request,
+    size: str = "default",
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    return _serve_plot(request, "sentiment_polarity", size, _scope(product_id, date_from, date_to))
 
-    img = generate_length_by_rating_plot(reviews)
-    return Response(content=img.getvalue(), media_type="image/png")
+
+@app.get("/plots/length_by_rating")
+def plot_length_by_rating(
+    request: Request,
+    size: str = "default",
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    return _serve_plot(request, "length_by_rating", size, _scope(product_id, date_from, date_to))
 
 @app.get("/plots/rating_spread")
-def plot_rating_spread():
-    conn = get_db()
-    cursor = conn.cursor()
-    cursor.execute("SELECT rating FROM reviews")
-    reviews = [{"rating": row["rating"]} for row in cursor.fetchall()]
-    conn.close()
+def plot_rating_spread(
+    request: Request,
+    size: str = "default",
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    return _serve_plot(request, "rating_spread", size, _scope(product_id, date_from, date_to))
+
 
-    img = generate_rating_spread_plot(reviews)
-    return Response(content=img.getvalue(), media_type="image/png")
+@app.get("/api/charts/{plot}")
+def chart_data(
+    request: Request,
+    plot: str,
+    product_id: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    """Pre-binned series for drawing a plot client-side (same bins as the PNG)."""
+    if plot not in CHART_DATA:
+        return Response(json.dumps({"error": f"Unknown chart: {plot}"}), status_code=404, media_type="application/json")
+    return _serve_cached(request, plot, "json", "application/json",
+                         lambda reviews: json.dumps(CHART_DATA[plot](reviews)).encode("utf-8"),
+                         _scope(product_id, date_from, date_to))
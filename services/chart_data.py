@@ -0,0 +1,99 @@
+"""Pre-binned chart series for drawing the dashboard plots in the browser.
+
+Each function mirrors one plot in services/plots.py, with the same bins,
+star bucketing and box-plot rules, but returns a few hundred bytes of
+numbers instead of a rendered PNG.
+"""
+import numpy as np
+from matplotlib.cbook import boxplot_stats
+from scipy import stats as scipy_stats
+
+# Points on the rating-spread KDE curve (the PNG draws 100)
+KDE_POINTS = 50
+# Outliers listed per star; the rest are only counted
+MAX_FLIERS = 50
+
+
+def _histogram(values, **kwargs):
+    counts, edges = np.histogram(values, **kwargs)
+    return {"counts": counts.tolist(), "edges": [round(float(e), 4) for e in edges]}
+
+
+def review_length_data(reviews):
+    lengths = [len(r["review_text"]) for r in reviews if r.get("review_text")]
+    if not lengths:
+        return {"empty": True}
+    return {"empty": False, "total": len(lengths), **_histogram(lengths, bins=20)}
+
+
+def sentiment_polarity_data(reviews):
+    polarities = [r["polarity"] for r in reviews if r.get("polarity") is not None]
+    if not polarities:
+        return {"empty": True}
+    return {"empty": False, "total": len(polarities), **_histogram(polarities, bins=20, range=(-1, 1))}
+
+
+def length_by_rating_data(reviews):
+    data = [[] for _ in range(5)]  # 1 to 5 stars, int() like the PNG
+    for r in reviews:
+        try:
+            rating = int(r["rating"])
+        except (ValueError, TypeError):
+            continue
+        if 1 <= rating <= 5 and r.get("review_text"):
+            data[rating - 1].append(len(r["review_text"]))
+
+    if not any(data):
+        return {"empty": True}
+
+    boxes = []
+    for star, lengths in enumerate(data, start=1):
+        if not lengths:
+            boxes.append({"star": star, "count": 0})
+            continue
+        # Same whisker / outlier rule as Axes.boxplot (1.5 IQR)
+        s = boxplot_stats(lengths)[0]
+        fliers = sorted(float(f) for f in s["fliers"])
+        boxes.append({
+            "star": star,
+            "count": len(lengths),
+            "whislo": float(s["whislo"]),
+            "q1": float(s["q1"]),
+            "median": float(s["med"]),
+            "q3": float(s["q3"]),
+            "whishi": float(s["whishi"]),
+            "flier_count": len(fliers),
+            "fliers": fliers[:MAX_FLIERS],
+        })
+    return {"empty": False, "boxes": boxes}
+
+
+def rating_spread_data(reviews):
+    ratings = [r["rating"] for r in reviews if r.get("rating") is not None]
+    if not ratings:
+        return {"empty": True}
+
+    result = {
+        "empty": False,
+        "total": len(ratings),
+        **_histogram(ratings, bins=[0.5, 1.5, 2.5, 3.5, 4.5, 5.5]),
+        "mean": round(float(np.mean(ratings)), 4),
+        "std": round(float(np.std(ratings, ddof=1)), 4) if len(ratings) > 1 else 0,
+        "kde": None,
+    }
+    if len(set(ratings)) > 1:
+        x_smooth = np.linspace(min(ratings) - 0.5, max(ratings) + 0.5, KDE_POINTS)
+        y_smooth = scipy_stats.gaussian_kde(ratings)(x_smooth) * len(ratings)
+        result["kde"] = {
+            "x": [round(float(x), 4) for x in x_smooth],
+            "y": [round(float(y), 4) for y in y_smooth],
+        }
+    return result
+
+
+CHART_DATA = {
+    "review_length": review_length_data,
+    "sentiment_polarity": sentiment_polarity_data,
+    "length_by_rating": length_by_rating_data,
+    "rating_spread": rating_spread_data,
+}
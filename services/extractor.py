@@ -0,0 +1,230 @@
+import re
+from collections import OrderedDict
+from urllib.parse import urljoin
+
+# Fallback selector lists, in priority order. The first selector that
+# matches on a given page layout is remembered for later pages.
+REVIEW_BLOCK_SELECTORS = [
+    "div[data-hook='review']",
+    "div.a-section.review",
+    "div[id^='customer_review']"
+]
+REVIEW_FIELD_SELECTORS = {
+    "title": ["[data-hook='review-title']", ".review-title"],
+    "text": ["[data-hook='review-body']", ".review-text-content"],
+    "rating": ["[data-hook='review-star-rating']", ".a-icon-star"],
+}
+NEXT_PAGE_SELECTORS = ["li.a-last a", "a.a-pagination-next"]
+
+PRODUCT_FIELD_SELECTORS = {
+    "name": [
+        "#productTitle",
+        "h1.a-size-large",
+        ".product-title",
+        "h1 span"
+    ],
+    "image": [
+        "#landingImage",
+        ".a-dynamic-image",
+        "img.a-image-wrapper img",
+        "#imgBlkFront"
+    ],
+    "price": [
+        ".a-price-whole",
+        ".a-offscreen",
+        ".a-price .a-offscreen",
+        "#corePrice_feature_div .a-price .a-offscreen",
+        ".a-size-medium.a-color-price"
+    ],
+}
+
+# "4.0 out of 5 stars" prefixes (sometimes doubled) in front of review titles
+TITLE_STARS_RE = re.compile(r'^\d\.\d out of 5 stars\s*(?:\d\.\d out of 5 stars)?')
+RATING_RE = re.compile(r'(\d+(\.\d+)?)')
+# Amazon review ids ("R1X2Y3..."), bare or as "customer_review-R1X2Y3..."
+REVIEW_ID_RE = re.compile(r'R[0-9A-Z]{5,}$')
+
+# A page layout is identified by its set of data-hook values, or, on pages
+# without data-hooks, by which class / id names of the fallback selectors occur.
+DATA_HOOK_RE = re.compile(r'data-hook=["\']([\w-]+)')
+LAYOUT_MARKERS = (
+    "customer_review", "review-title", "review-text-content", "a-icon-star",
+    "a-pagination-next", "a-last", "productTitle", "landingImage",
+    "imgBlkFront", "a-dynamic-image", "a-price-whole", "a-offscreen",
+)
+
+MAX_CACHED_LAYOUTS = 64
+
+_layouts = OrderedDict()
+layout_stats = {"hits": 0, "misses": 0, "relearned": 0}
+
+
+def layout_fingerprint(html, kind):
+    """Cheap signature of a page layout, computed from the raw HTML."""
+    hooks = set(DATA_HOOK_RE.findall(html))
+    if hooks:
+        return (kind, "hooks") + tuple(sorted(hooks))
+    return (kind, "markers") + tuple(marker in html for marker in LAYOUT_MARKERS)
+
+
+def _remember(fingerprint, plan):
+    _layouts[fingerprint] = plan
+    _layouts.move_to_end(fingerprint)
+    while len(_layouts) > MAX_CACHED_LAYOUTS:
+        _layouts.popitem(last=False)
+
+
+def _cached_plan(fingerprint):
+    plan = _layouts.get(fingerprint)
+    if plan is None:
+        layout_stats["misses"] += 1
+        return None
+    _layouts.move_to_end(fingerprint)
+    layout_stats["hits"] += 1
+    return plan
+
+
+def _ordered(selectors, preferred):
+    """Selector list with the remembered winner tried first."""
+    if preferred is None:
+        return selectors
+    return [preferred] + [s for s in selectors if s != preferred]
+
+
+def _select_first(node, selectors):
+    for selector in selectors:
+        elem = node.select_one(selector)
+        if elem:
+            return selector, elem
+    return None, None
+
+
+def _learn(learned, field, selector):
+    if selector is not None and learned.get(field) is None:
+        learned[field] = selector
+
+
+def _find_blocks(soup, plan):
+    if plan is not None:
+        blocks = soup.select(plan["block"])
+        if blocks:
+            return plan["block"], blocks
+    for selector in REVIEW_BLOCK_SELECTORS:
+        blocks = soup.select(selector)
+        if blocks:
+            return selector, blocks
+    return None, []
+
+
+def extract_reviews(soup, html, product_id=None, max_reviews=None):
+    """Extract every review block of a review page in one pass.
+
+    Returns {"reviews": [...], "block_count": n, "next_url": url or None}.
+    """
+    fingerprint = layout_fingerprint(html, "reviews")
+    plan = _cached_plan(fingerprint)
+
+    block_selector, page_blocks = _find_blocks(soup, plan)
+    if plan is not None and block_selector != plan["block"]:
+        # Same markers but the cached block selector no longer matches
+        layout_stats["relearned"] += 1
+        plan = None
+
+    learned = dict(plan) if plan else {"block": block_selector}
+    field_order = {
+        field: _ordered(selectors, learned.get(field))
+        for field, selectors in REVIEW_FIELD_SELECTORS.items()
+    }
+
+    reviews = []
+    for block in page_blocks:
+        try:
+            if max_reviews is not None and len(reviews) >= max_reviews:
+                break
+
+            # Title
+            selector, title_elem = _select_first(block, field_order["title"])
+            _learn(learned, "title", selector)
+            review_title = "Review"
+            if title_elem:
+                review_title = TITLE_STARS_RE.sub('', title_elem.get_text(strip=True))
+
+            # Text
+            selector, text_elem = _select_first(block, field_order["text"])
+            _learn(learned, "text", selector)
+            review_text = "No review text."
+            if text_elem:
+                # Use separator to avoid jamming words together
+                review_text = text_elem.get_text(" ", strip=True)
+
+            # Rating
+            selector, rating_elem = _select_first(block, field_order["rating"])
+            _learn(learned, "rating", selector)
+            rating_value = 3.0
+            if rating_elem:
+                match = RATING_RE.search(rating_elem.get_text(strip=True))
+                if match:
+                    rating_value = float(match.group(1))
+
+            match = REVIEW_ID_RE.search(block.get("id") or "")
+
+            reviews.append({
+                "product_id": product_id,
+                "review_title": review_title.strip(),
+                "review_text": review_text,
+                "rating": rating_value,
+                "amazon_review_id": match.group(0) if match else None
+            })
+        except Exception as e:
+            print(f"⚠️ Error processing review: {e}")
+            continue
+
+    # Pagination Logic
+    next_url = None
+    selector, next_page = _select_first(soup, _ordered(NEXT_PAGE_SELECTORS, learned.get("next")))
+    if next_page and 'href' in next_page.attrs:
+        learned["next"] = selector
+        next_url = urljoin("https://www.amazon.in", next_page['href'])
+
+    if block_selector is not None:
+        # Fields that never matched stay unset so they are searched again next time
+        _remember(fingerprint, {k: v for k, v in learned.items() if v is not None})
+
+    return {"reviews": reviews, "block_count": len(page_blocks), "next_url": next_url}
+
+
+def extract_product(soup, html, url):
+    """Extract product name, image and price, reusing the cached selectors."""
+    fingerprint = layout_fingerprint(html, "product")
+    plan = _cached_plan(fingerprint) or {}
+    learned = {}
+
+    product_name = "Unknown Product"
+    selector, name_elem = _select_first(soup, _ordered(PRODUCT_FIELD_SELECTORS["name"], plan.get("name")))
+    if name_elem:
+        learned["name"] = selector
+        product_name = name_elem.get_text(strip=True)
+
+    product_image = ""
+    for selector in _ordered(PRODUCT_FIELD_SELECTORS["image"], plan.get("image")):
+        img_elem = soup.select_one(selector)
+        if img_elem:
+            product_image = img_elem.get("src") or img_elem.get("data-src") or ""
+            if product_image:
+                learned["image"] = selector
+                break
+
+    product_price = "Price not available"
+    selector, price_elem = _select_first(soup, _ordered(PRODUCT_FIELD_SELECTORS["price"], plan.get("price")))
+    if price_elem:
+        learned["price"] = selector
+        product_price = price_elem.get_text(strip=True)
+
+    _remember(fingerprint, learned)
+
+    return {
+        "product_name": product_name,
+        "product_url": url,
+        "product_image": product_image,
+        "product_price": product_price
+    }
@@ -0,0 +1,79 @@
+import asyncio
+from urllib.parse import urlsplit
+
+import httpx
+
+# HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 keep-alive without it.
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Pool and timeout settings shared by every scrape running in this process
+MAX_CONNECTIONS = 50
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY = 30.0
+MAX_CONNECTIONS_PER_HOST = 4
+
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 15.0
+WRITE_TIMEOUT = 10.0
+POOL_TIMEOUT = 10.0
+
+_client = None
+_host_semaphores = {}
+
+
+def get_client():
+    """Return the shared pooled AsyncClient, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(
+                connect=CONNECT_TIMEOUT,
+                read=READ_TIMEOUT,
+                write=WRITE_TIMEOUT,
+                pool=POOL_TIMEOUT,
+            ),
+        )
+        print(f"🌐 HTTP client created (http2={HTTP2_AVAILABLE})")
+    return _client
+
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc.lower()
+    sem = _host_semaphores.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(MAX_CONNECTIONS_PER_HOST)
+        _host_semaphores[host] = sem
+    return sem
+
+
+async def fetch(url, headers=None, timeout=None):
+    """GET a page through the shared client, capped per host.
+
+    Returns the httpx.Response; status handling is left to the caller.
+    """
+    client = get_client()
+    async with _host_semaphore(url):
+        if timeout is None:
+            return await client.get(url, headers=headers)
+        return await client.get(url, headers=headers, timeout=timeout)
+
+
+async def close_client():
+    """Close the shared client (called on application shutdown)."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+        print("🌐 HTTP client closed")
+    _client = None
+    _host_semaphores.clear()
@@ -0,0 +1,160 @@
+import asyncio
+import sqlite3
+
+from configs.database import get_db, insert_reviews, known_review_keys, review_fingerprint
+from services.scraper import scrape_reviews, extract_product_details
+from services.sentiment import analyze_sentiment_batch
+
+REVIEW_LIMIT = 100
+
+
+def score_reviews(reviews):
+    """Attach sentiment and polarity to each review dict."""
+    results = analyze_sentiment_batch([r["review_text"] for r in reviews])
+    return [
+        {**r, "sentiment": sentiment, "polarity": polarity}
+        for r, (sentiment, polarity) in zip(reviews, results)
+    ]
+
+
+async def _ingest_pages(conn, url, product_id, limit, counts, strict=False, **scrape_options):
+    """Score and commit each scraped page, yielding progress events.
+
+    With `strict` a failed scrape raises instead of ending quietly.
+    """
+    async for event in scrape_reviews(url=url, product_id=product_id, limit=limit, **scrape_options):
+        if event["type"] == "error" and strict:
+            raise RuntimeError(event["message"])
+        if event["type"] == "progress":
+            yield {**event, "stage": "scrape", **counts}
+        elif event["type"] == "page":
+            reviews = event["reviews"]
+            counts["scraped"] += len(reviews)
+            if not reviews:
+                continue
+
+            # Score off the event loop, then persist this page right away
+            scored = await asyncio.to_thread(score_reviews, reviews)
+            counts["scored"] += len(scored)
+            yield {"type": "progress", "stage": "score", "count": counts["scraped"], "total": limit, **counts,
+                   "message": f"Scored {counts['scored']} reviews..."}
+
+            result = await asyncio.to_thread(insert_reviews, conn, scored)
+            counts["saved"] += result["inserted"]
+            counts["skipped"] += result["skipped"]
+            yield {"type": "progress", "stage": "persist", "count": counts["scraped"], "total": limit, **counts,
+                   "message": f"Saved {counts['saved']} reviews..."}
+
+
+async def refresh_product(conn, url, product, limit, counts):
+    """Fetch only the reviews newer than the newest one stored for `product`.
+
+    Review pages are walked newest first and the scrape stops at the first
+    review already stored (matched on its Amazon id, or on its fingerprint
+    when the page shows no id), so an up to date product costs a single
+    page fetch. A blocked or failed scrape is reported as an error rather
+    than as "up to date".
+    """
+    product_id = product["product_id"]
+    known = await asyncio.to_thread(known_review_keys, conn, product_id)
+
+    def is_known(review):
+        # Text is only compared for reviews without an id: two customers can
+        # post the same short review, and the newer one must not end the scrape
+        if review.get("amazon_review_id"):
+            return review["amazon_review_id"] in known
+        return review_fingerprint(product_id, review["review_title"], review["review_text"]) in known
+
+    print(f"🔄 Refreshing {product['product_name']} ({len(known)} stored review keys)")
+    async for event in _ingest_pages(conn, url, product_id, limit, counts, strict=True,
+                                    newest_first=True, is_known=is_known):
+        yield event
+
+    message = f"Refreshed: {counts['saved']} new reviews" if counts["saved"] else "Already up to date"
+    yield {"type": "completed", "message": message, **counts}
+
+
+def _stored_product(conn, url):
+    return conn.execute("SELECT product_id, product_name FROM products WHERE product_url = ?", (url,)).fetchone()
+
+
+def _save_product(conn, url, details):
+    """Insert and commit the product row (so partial scrapes keep it); returns its product_id.
+
+    Returns None when a concurrent scrape of the same URL saved it first.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO products (product_name, product_url, product_image, product_price)
+            VALUES (?, ?, ?, ?)
+        """, (
+            details["product_name"],
+            url,
+            details["product_image"],
+            details["product_price"]
+        ))
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return None
+    cursor.execute("SELECT product_id FROM products WHERE id = ?", (cursor.lastrowid,))
+    product_id = cursor.fetchone()["product_id"]
+    conn.commit()
+    return product_id
+
+
+async def ingest_product(url, limit=REVIEW_LIMIT, refresh=False):
+    """Scrape a product and stream its reviews into the database.
+
+    Each scraped page is scored and committed before the next one is
+    consumed, so results show up while the scrape runs and pages saved
+    before a failure or disconnect are kept. A product that is already
+    stored is only updated with its new reviews when `refresh` is set.
+    Yields NDJSON-ready events.
+    """
+    conn = get_db()
+    counts = {"scraped": 0, "scored": 0, "saved": 0, "skipped": 0}
+
+    try:
+        # Check if product already exists
+        existing_product = await asyncio.to_thread(_stored_product, conn, url)
+
+        if existing_product:
+            if refresh:
+                async for event in refresh_product(conn, url, existing_product, limit, counts):
+                    yield event
+                return
+            print(f"Product already exists: {existing_product['product_name']}")
+            yield {"type": "completed", "message": "Product already exists"}
+            return
+
+        yield {"type": "progress", "stage": "product", "count": 0, "total": limit, **counts, "message": "Extracting product details..."}
+
+        # Extract product details
+        product_details = await extract_product_details(url)
+
+        product_id = await asyncio.to_thread(_save_product, conn, url, product_details)
+        if product_id is None:
+            # Saved by a concurrent scrape of the same URL since the check above
+            yield {"type": "completed", "message": "Product already exists"}
+            return
+
+        print(f"Product saved with ID: {product_id}")
+
+        async for event in _ingest_pages(conn, url, product_id, limit, counts):
+            yield event
+
+        print(f"Successfully saved product and {counts['saved']} reviews to database")
+
+        completion_msg = "Analysis complete!"
+        if not counts["saved"]:
+            print("⚠️ No reviews found. Saving product details only.")
+            completion_msg = "Product saved (no reviews found)."
+
+        yield {"type": "completed", "message": completion_msg, **counts}
+
+    except Exception as e:
+        print(f"Error in streaming scrape: {repr(e)}")
+        yield {"type": "error", "message": f"{str(e)} ({type(e).__name__})", **counts}
+    finally:
+        conn.close()
@@ -0,0 +1,352 @@
+"""Background scrape jobs.
+
+Submitting a URL creates a job (persisted in the scrape_jobs table) and
+queues it; a fixed number of worker tasks run the queued jobs through
+services.ingest, so scrapes survive client disconnects and never exceed
+SCRAPE_CONCURRENCY jobs overall or SCRAPE_JOBS_PER_HOST per site. Refresh
+jobs only fetch the reviews newer than those already stored for the
+product. A URL that is already queued or running is coalesced into the
+existing job. Progress events are kept in memory for streaming and the
+latest counts are written to the job row for polling.
+"""
+import asyncio
+import os
+import sqlite3
+import uuid
+from collections import Counter, OrderedDict, defaultdict, deque
+from urllib.parse import urlsplit
+
+from configs.database import get_db
+from services.ingest import REVIEW_LIMIT, ingest_product
+
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "2"))
+SCRAPE_QUEUE_SIZE = int(os.getenv("SCRAPE_QUEUE_SIZE", "100"))
+SCRAPE_JOBS_PER_HOST = int(os.getenv("SCRAPE_JOBS_PER_HOST", "2"))
+# Finished jobs whose event history stays in memory for late subscribers
+FINISHED_JOBS_KEPT = 100
+
+ACTIVE_STATUSES = ("queued", "running")
+COUNT_FIELDS = ("scraped", "scored", "saved", "skipped")
+
+_queue = None
+_workers = []
+_jobs = OrderedDict()      # job id -> Job (active and recently finished)
+_active_by_url = {}        # url -> job id, while queued or running
+_running_by_host = Counter()
+_parked_by_host = defaultdict(deque)   # host -> jobs waiting for a host slot
+_reserved = 0              # new jobs counted against the queue while their rows are written
+_NOW = object()            # _update_row value for CURRENT_TIMESTAMP
+
+QUEUE_FULL_MESSAGE = "Too many scrape jobs are waiting"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when SCRAPE_QUEUE_SIZE jobs are already waiting."""
+
+
+class Job:
+    def __init__(self, job_id, url, mode="scrape"):
+        self.id = job_id
+        self.url = url
+        self.mode = mode
+        self.status = "queued"
+        self.events = []
+        self.updated = asyncio.Event()
+
+    @property
+    def done(self):
+        return self.status not in ACTIVE_STATUSES
+
+    def publish(self, event):
+        self.events.append(event)
+        # Wake every subscriber, then start a fresh event for the next wait
+        self.updated.set()
+        self.updated = asyncio.Event()
+
+
+def _update_row(job_id, **fields):
+    conn = get_db()
+    try:
+        assignments = ", ".join(
+            f"{name} = CURRENT_TIMESTAMP" if value is _NOW else f"{name} = ?"
+            for name, value in fields.items()
+        )
+        conn.execute(
+            f"UPDATE scrape_jobs SET {assignments} WHERE id = ?",
+            [value for value in fields.values() if value is not _NOW] + [job_id],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _insert_jobs(rows):
+    """Write new (id, url, mode) job rows in one transaction.
+
+    Returns {url: active job id} for the URLs another process is already
+    scraping; their rows are rejected by the active-URL index.
+    """
+    existing = {}
+    conn = get_db()
+    try:
+        for job_id, url, mode in rows:
+            try:
+                conn.execute("INSERT INTO scrape_jobs (id, url, status, mode) VALUES (?, ?, 'queued', ?)",
+                             (job_id, url, mode))
+            except sqlite3.IntegrityError:
+                row = conn.execute(
+                    "SELECT id FROM scrape_jobs WHERE url = ? AND status IN ('queued', 'running')", (url,)
+                ).fetchone()
+                if row is None:
+                    raise
+                existing[url] = row["id"]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return existing
+
+
+async def submit_jobs(urls, refresh=False):
+    """Queue a scrape of each URL, or join the job already handling it.
+
+    With `refresh` an already stored product is updated with its new
+    reviews instead of being skipped. Returns one (job_id, coalesced) pair
+    per URL, or None for a URL turned away because SCRAPE_QUEUE_SIZE jobs
+    are already waiting, queued or parked behind a busy host. The new jobs
+    are persisted in one transaction, off the event loop.
+    """
+    global _reserved
+    if _queue is None:
+        raise RuntimeError("Job workers are not running")
+    mode = "refresh" if refresh else "scrape"
+    results, new = [], []
+    for url in urls:
+        job_id = _active_by_url.get(url)
+        if job_id is not None:
+            results.append((job_id, True))
+            continue
+        # Parked jobs have left the queue but are still waiting
+        if _queue.qsize() + sum(map(len, _parked_by_host.values())) + _reserved + len(new) >= SCRAPE_QUEUE_SIZE:
+            results.append(None)
+            continue
+        job = Job(uuid.uuid4().hex, url, mode)
+        # Registered before the write so a concurrent submission joins it
+        _jobs[job.id] = job
+        _active_by_url[url] = job.id
+        new.append(job)
+        results.append((job.id, False))
+    if not new:
+        return results
+
+    _reserved += len(new)
+    try:
+        existing = await asyncio.to_thread(_insert_jobs, [(job.id, job.url, job.mode) for job in new])
+    except BaseException:
+        for job in new:
+            _jobs.pop(job.id, None)
+            _active_by_url.pop(job.url, None)
+        raise
+    finally:
+        _reserved -= len(new)
+
+    for job in new:
+        if job.url in existing:
+            # Another process is already scraping this URL
+            del _jobs[job.id]
+            _active_by_url.pop(job.url, None)
+            results = [(existing[job.url], True) if r is not None and r[0] == job.id else r for r in results]
+            continue
+        job.publish({"type": "progress", "stage": "queued", "count": 0, "total": REVIEW_LIMIT, "message": "Waiting for a scrape worker..."})
+        _queue.put_nowait(job)
+        print(f"📥 Queued {job.mode} job {job.id} for {job.url}")
+    return results
+
+
+async def submit_job(url, refresh=False):
+    """Queue a scrape of `url`, or join the job already handling it.
+
+    Returns (job_id, coalesced). Raises JobQueueFullError when
+    SCRAPE_QUEUE_SIZE jobs are already waiting (see submit_jobs).
+    """
+    (result,) = await submit_jobs([url], refresh)
+    if result is None:
+        raise JobQueueFullError(QUEUE_FULL_MESSAGE)
+    return result
+
+
+async def _run(job):
+    job.status = "running"
+    await asyncio.to_thread(_update_row, job.id, status="running", started_at=_NOW)
+    last = None
+    try:
+        async for event in ingest_product(job.url, refresh=job.mode == "refresh"):
+            last = event
+            job.publish(event)
+            await asyncio.to_thread(
+                _update_row,
+                job.id,
+                stage=event.get("stage"),
+                message=event.get("message"),
+                **{field: event[field] for field in COUNT_FIELDS if field in event},
+            )
+    except Exception as e:
+        last = {"type": "error", "message": f"{str(e)} ({type(e).__name__})"}
+        job.publish(last)
+
+    job.status = "completed" if last and last["type"] == "completed" else "failed"
+    await asyncio.to_thread(_update_row, job.id, status=job.status, message=(last or {}).get("message"), finished_at=_NOW)
+    _active_by_url.pop(job.url, None)
+    job.publish({"type": "job", "job_id": job.id, "status": job.status})
+    print(f"🏁 Scrape job {job.id} {job.status}")
+
+    # Forget the oldest finished jobs; their rows stay in SQLite
+    finished = [job_id for job_id, j in _jobs.items() if j.done]
+    for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+        del _jobs[job_id]
+
+
+async def _worker():
+    while True:
+        job = await _queue.get()
+        try:
+            host = urlsplit(job.url).netloc.lower()
+            if _running_by_host[host] >= SCRAPE_JOBS_PER_HOST:
+                # Park it instead of holding a worker; a job for the same
+                # host picks it up when it finishes
+                _parked_by_host[host].append(job)
+                continue
+            while job is not None:
+                _running_by_host[host] += 1
+                try:
+                    await _run(job)
+                finally:
+                    _running_by_host[host] -= 1
+                parked = _parked_by_host[host]
+                job = parked.popleft() if parked else None
+        except Exception as e:
+            print(f"Error in scrape worker: {repr(e)}")
+        finally:
+            _queue.task_done()
+
+
+def get_job(job_id):
+    """Persisted state of a job, or None."""
+    conn = get_db()
+    try:
+        row = conn.execute("SELECT * FROM scrape_jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def list_jobs(limit=50):
+    conn = get_db()
+    try:
+        rows = conn.execute("SELECT * FROM scrape_jobs ORDER BY created_at DESC, rowid DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+async def job_events(job_id):
+    """Yield a job's progress events from the start, then live until it ends.
+
+    Jobs no longer held in memory yield a single summary event.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        state = get_job(job_id)
+        if state is None:
+            yield {"type": "error", "message": "Unknown job"}
+            return
+        kind = {"completed": "completed", "failed": "error"}.get(state["status"], "progress")
+        yield {"type": kind, "message": state["message"], **{field: state[field] for field in COUNT_FIELDS}}
+        yield {"type": "job", "job_id": job_id, "status": state["status"]}
+        return
+
+    seen = 0
+    while True:
+        waiter = job.updated
+        while seen < len(job.events):
+            yield job.events[seen]
+            seen += 1
+        if job.done:
+            return
+        await waiter.wait()
+
+
+async def merge_job_events(job_ids):
+    """Yield (job_id, event) for several jobs, interleaved as they happen."""
+    merged = asyncio.Queue()
+
+    async def pump(job_id):
+        try:
+            async for event in job_events(job_id):
+                await merged.put((job_id, event))
+        finally:
+            await merged.put((job_id, None))
+
+    tasks = [asyncio.create_task(pump(job_id)) for job_id in job_ids]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            job_id, event = await merged.get()
+            if event is None:
+                remaining -= 1
+                continue
+            yield job_id, event
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def start_job_workers():
+    """Start the worker tasks (called on application startup).
+
+    Jobs left queued by a previous run are queued again, oldest first, up
+    to SCRAPE_QUEUE_SIZE; the rest, and jobs that were running, are marked
+    failed.
+    """
+    global _queue
+    _queue = asyncio.Queue(maxsize=SCRAPE_QUEUE_SIZE)
+
+    conn = get_db()
+    try:
+        conn.execute(
+            "UPDATE scrape_jobs SET status = 'failed', message = 'Interrupted by a restart', "
+            "finished_at = CURRENT_TIMESTAMP WHERE status = 'running'"
+        )
+        pending = conn.execute("SELECT id, url, mode FROM scrape_jobs WHERE status = 'queued' ORDER BY created_at").fetchall()
+        dropped = pending[SCRAPE_QUEUE_SIZE:]
+        pending = pending[:SCRAPE_QUEUE_SIZE]
+        conn.executemany(
+            "UPDATE scrape_jobs SET status = 'failed', message = 'Dropped on restart: job queue full', "
+            "finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+            [(row["id"],) for row in dropped],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    for row in pending:
+        job = Job(row["id"], row["url"], row["mode"])
+        _jobs[job.id] = job
+        _active_by_url[job.url] = job.id
+        _queue.put_nowait(job)
+
+    _workers.extend(asyncio.create_task(_worker()) for _ in range(SCRAPE_CONCURRENCY))
+    print(f"🧵 Scrape workers started ({SCRAPE_CONCURRENCY} workers, {len(pending)} jobs resumed, {len(dropped)} dropped)")
+
+
+async def stop_job_workers():
+    """Cancel the worker tasks (called on application shutdown)."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    # Parked jobs stay queued in SQLite and are resumed on the next start
+    _parked_by_host.clear()
+    _running_by_host.clear()
@@ -0,0 +1,202 @@
+"""On-disk cache of fetched pages.
+
+Each entry is one gzip file named after the normalized URL: a JSON header
+line (url, status, headers, ETag / Last-Modified, fetch time) followed by
+the raw body. Entries younger than PAGE_CACHE_TTL are served without
+touching the network; older ones are revalidated with If-None-Match /
+If-Modified-Since. The least recently used files are removed once the
+cache grows past PAGE_CACHE_MAX_BYTES.
+
+With SCRAPER_OFFLINE=1 every page is served from the cache regardless of
+age and misses fail, so scraper changes can be replayed and benchmarked
+without the network.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", os.path.join("data", "page_cache"))
+PAGE_CACHE_TTL = float(os.getenv("PAGE_CACHE_TTL", "3600"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "1") != "0"
+OFFLINE = os.getenv("SCRAPER_OFFLINE", "0") == "1"
+
+# Response headers kept with a cached body
+STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+_lock = threading.Lock()
+_total_bytes = None
+counters = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+
+def normalize_url(url):
+    """Cache identity of a URL: lower-cased scheme / host, sorted query, no fragment."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+def _path(url):
+    digest = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()
+    return os.path.join(PAGE_CACHE_DIR, digest[:2], f"{digest}.gz")
+
+
+class CachedPage:
+    def __init__(self, meta, body, path):
+        self.meta = meta
+        self.body = body
+        self.path = path
+
+    @property
+    def age(self):
+        return time.time() - self.meta["fetched_at"]
+
+    def conditional_headers(self):
+        headers = {}
+        stored = self.meta["headers"]
+        if stored.get("etag"):
+            headers["If-None-Match"] = stored["etag"]
+        if stored.get("last-modified"):
+            headers["If-Modified-Since"] = stored["last-modified"]
+        return headers
+
+    def to_response(self):
+        return httpx.Response(
+            self.meta["status"],
+            headers=self.meta["headers"],
+            content=self.body,
+            request=httpx.Request("GET", self.meta["url"]),
+        )
+
+
+def load(url):
+    """Cached entry for `url`, or None."""
+    path = _path(url)
+    try:
+        with gzip.open(path, "rb") as f:
+            raw = f.read()
+    except (OSError, EOFError):
+        return None
+    header, _, body = raw.partition(b"\n")
+    try:
+        meta = json.loads(header)
+    except ValueError:
+        return None
+    # Recently used entries survive eviction longest
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return CachedPage(meta, body, path)
+
+
+def _scan_total():
+    total = 0
+    for root, _, files in os.walk(PAGE_CACHE_DIR):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _evict(target):
+    global _total_bytes
+    entries = []
+    for root, _, files in os.walk(PAGE_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        counters["evicted"] += 1
+    _total_bytes = total
+
+
+def _replace(tmp, path):
+    """Move `tmp` over `path`, adjusting _total_bytes; call with _lock held."""
+    global _total_bytes
+    size = os.path.getsize(tmp)
+    try:
+        replaced = os.path.getsize(path)
+    except OSError:
+        replaced = 0
+    os.replace(tmp, path)
+    if _total_bytes is not None:
+        _total_bytes += size - replaced
+
+
+def count(name):
+    """Increment one of the hit / miss counters."""
+    with _lock:
+        counters[name] += 1
+
+
+def store(url, response):
+    """Save a 200 response for `url`; evicts old entries past the size bound."""
+    global _total_bytes
+    meta = {
+        "url": str(response.url),
+        "status": response.status_code,
+        "headers": {name: response.headers[name] for name in STORED_HEADERS if name in response.headers},
+        "fetched_at": time.time(),
+    }
+    path = _path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=6) as f:
+        f.write(json.dumps(meta).encode("utf-8") + b"\n")
+        f.write(response.content)
+
+    with _lock:
+        _replace(tmp, path)
+        counters["stored"] += 1
+        if _total_bytes is None:
+            _total_bytes = _scan_total()
+        if _total_bytes > PAGE_CACHE_MAX_BYTES:
+            # Evict down to 90% so the next few stores don't rescan
+            _evict(PAGE_CACHE_MAX_BYTES * 0.9)
+
+
+def touch(entry):
+    """Mark a revalidated entry as freshly fetched."""
+    entry.meta["fetched_at"] = time.time()
+    tmp = f"{entry.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=6) as f:
+        f.write(json.dumps(entry.meta).encode("utf-8") + b"\n")
+        f.write(entry.body)
+    with _lock:
+        _replace(tmp, entry.path)
+
+
+def offline_miss(url):
+    """Response returned for an uncached page in offline mode."""
+    return httpx.Response(504, text="Page not in cache (offline mode)", request=httpx.Request("GET", url))
+
+
+def page_cache_stats():
+    with _lock:
+        stats = dict(counters)
+        stats["bytes"] = _total_bytes if _total_bytes is not None else _scan_total()
+    stats.update(dir=PAGE_CACHE_DIR, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES,
+                 enabled=PAGE_CACHE_ENABLED, offline=OFFLINE)
+    return stats
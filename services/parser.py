@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bs4 import BeautifulSoup
+
+# Optional faster backends; the pure-Python html.parser is always available.
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+BACKENDS = ["html.parser", "lxml", "selectolax"]
+
+# Backend used when none is requested; override with SCRAPER_PARSER=<backend>
+DEFAULT_BACKEND = os.getenv("SCRAPER_PARSER") or ("lxml" if LXML_AVAILABLE else "html.parser")
+
+# Worker processes for off-loop parsing; 0 parses in a thread instead
+PARSE_WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", "2"))
+
+_pool = None
+
+
+def available_backends():
+    """Backends that can be used in this environment."""
+    available = ["html.parser"]
+    if LXML_AVAILABLE:
+        available.append("lxml")
+    if SELECTOLAX_AVAILABLE:
+        available.append("selectolax")
+    return available
+
+
+class SelectolaxNode:
+    """Wraps a selectolax node with the subset of the BeautifulSoup API the scraper uses."""
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector):
+        return [SelectolaxNode(n) for n in self.node.css(selector)]
+
+    def select_one(self, selector):
+        found = self.node.css_first(selector)
+        return SelectolaxNode(found) if found is not None else None
+
+    def get_text(self, separator="", strip=False):
+        if not strip:
+            return self.node.text(deep=True, separator=separator)
+        # Match BeautifulSoup: join the non-empty stripped strings
+        parts = self.node.text(deep=True, separator="\x00", strip=True).split("\x00")
+        return separator.join(p for p in parts if p)
+
+    @property
+    def attrs(self):
+        return self.node.attributes
+
+    def get(self, name, default=None):
+        value = self.node.attributes.get(name, default)
+        return default if value is None else value
+
+    def __getitem__(self, name):
+        return self.node.attributes[name]
+
+
+def make_soup(html, backend=None):
+    """Parse `html` with the requested backend.
+
+    The returned document supports select, select_one, get_text and
+    attribute access regardless of the backend.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend == "selectolax":
+        if not SELECTOLAX_AVAILABLE:
+            raise ValueError("selectolax backend requested but selectolax is not installed")
+        return SelectolaxNode(LexborHTMLParser(html).root)
+    if backend == "lxml" and not LXML_AVAILABLE:
+        raise ValueError("lxml backend requested but lxml is not installed")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return BeautifulSoup(html, backend)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # spawn, not fork: the server process already runs threads and an event loop
+        _pool = ProcessPoolExecutor(
+            max_workers=PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        print(f"🧩 Parser pool started ({PARSE_WORKERS} workers, backend={DEFAULT_BACKEND})")
+    return _pool
+
+
+async def run_parser(func, *args):
+    """Run a parse function off the event loop.
+
+    `func` must be a module-level function taking and returning plain,
+    picklable values (HTML in, dicts out) so it can run in a worker process.
+    """
+    loop = asyncio.get_running_loop()
+    if PARSE_WORKERS <= 0:
+        return await asyncio.to_thread(func, *args)
+    return await loop.run_in_executor(_get_pool(), func, *args)
+
+
+def shutdown_parser_pool():
+    """Stop the parser worker processes (called on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,93 @@
+"""Cache of rendered plot PNGs and chart data.
+
+Entries are keyed by (plot, scope, data version, variant), where the
+variant is the PNG size or "json" for the chart data. The data version
+is bumped in the same transaction as every write to the reviews table
+(configs.database.bump_data_versions), so a key never goes stale; old
+versions simply age out of the LRU. ETags are derived from the key, which
+lets a conditional request be answered with 304 without rendering.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bump when a plot's rendering changes so clients drop their cached images
+RENDER_VERSION = 1
+
+PLOT_CACHE_ENTRIES = 64
+PLOT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Served for /plots/*?v=<current version>: that URL never changes content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Served for unversioned URLs: browsers keep the image but revalidate it
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+counters = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+
+def plot_key(plot, scope, version, variant):
+    return (plot, scope, version, variant)
+
+
+def plot_etag(key):
+    """Strong ETag for a cache key (same key, same bytes)."""
+    raw = "\x1f".join(str(part) for part in (RENDER_VERSION, *key))
+    return '"' + hashlib.sha1(raw.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def get_cached(key):
+    with _lock:
+        body = _cache.get(key)
+        if body is None:
+            counters["misses"] += 1
+            return None
+        _cache.move_to_end(key)
+        counters["hits"] += 1
+        return body
+
+
+def put_cached(key, body):
+    global _cache_bytes
+    with _lock:
+        if key in _cache:
+            _cache_bytes -= len(_cache.pop(key))
+        _cache[key] = body
+        _cache_bytes += len(body)
+        while len(_cache) > PLOT_CACHE_ENTRIES or (_cache_bytes > PLOT_CACHE_BYTES and len(_cache) > 1):
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+            counters["evictions"] += 1
+
+
+def record_not_modified():
+    with _lock:
+        counters["not_modified"] += 1
+
+
+def clear_plot_cache():
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def plot_cache_stats():
+    with _lock:
+        stats = dict(counters)
+        stats["entries"] = len(_cache)
+        stats["bytes"] = _cache_bytes
+    return stats
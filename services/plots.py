@@ -1,9 +1,17 @@
 
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
 import io
 
+import numpy as np
+from matplotlib.figure import Figure
+from scipy import stats as scipy_stats
+
+# Figure sizes (inches) selectable with ?size= on the /plots/* endpoints
+PLOT_SIZES = {
+    "default": (10, 6),
+    "small": (6, 3.6),
+    "large": (14, 8.4),
+}
+
 def _set_dark_theme(fig, ax):
     """Applies a consistent dark theme to the plot."""
     fig.patch.set_facecolor('#303134')
@@ -29,8 +37,9 @@ def _handle_empty_data(ax, message="No Data Available"):
     ax.set_xticks([])
     ax.set_yticks([])
 
-def generate_review_length_plot(reviews):
-    fig, ax = plt.subplots(figsize=(10, 6))
+def generate_review_length_plot(reviews, figsize=PLOT_SIZES["default"]):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     _set_dark_theme(fig, ax)
     
     if not reviews:
@@ -48,12 +57,12 @@ def generate_review_length_plot(reviews):
 
     img = io.BytesIO()
     fig.savefig(img, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-    plt.close(fig)
     img.seek(0)
     return img
 
-def generate_sentiment_polarity_plot(reviews):
-    fig, ax = plt.subplots(figsize=(10, 6))
+def generate_sentiment_polarity_plot(reviews, figsize=PLOT_SIZES["default"]):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     _set_dark_theme(fig, ax)
     
     if not reviews:
@@ -72,12 +81,12 @@ def generate_sentiment_polarity_plot(reviews):
 
     img = io.BytesIO()
     fig.savefig(img, format='png', bbox_inches='tight', facecolor=fig.get_facecolor())
-    plt.close(fig)
     img.seek(0)
     return img
 
-def generate_length_by_rating_plot(reviews):
-    fig, ax = plt.subplots(figsize=(10, 6))
+def generate_length_by_rating_plot(reviews, figsize=PLOT_SIZES["default"]):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     _set_dark_theme(fig, ax)
     
     # Organize data by rating
@@ -112,29 +121,21 @@ def generate_length_by_rating_plot(reviews):
 
     img = io.BytesIO()
     fig.savefig(img, format='png', bbox_inches='tight', dpi=120, facecolor=fig.get_facecolor())
-    plt.close(fig)
     img.seek(0)
     return img
 
-def generate_rating_spread_plot(reviews):
+def generate_rating_spread_plot(reviews, figsize=PLOT_SIZES["default"]):
     """Generate rating spread & variance visualization"""
-    import numpy as np
-    from scipy import stats as scipy_stats
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
     _set_dark_theme(fig, ax)
     
-    print(f"[Rating Spread Plot] Received {len(reviews)} reviews")
-    
     if not reviews:
-        print("[Rating Spread Plot] No reviews, showing empty data message")
         _handle_empty_data(ax)
     else:
         ratings = [r["rating"] for r in reviews if r.get("rating") is not None]
-        print(f"[Rating Spread Plot] Extracted {len(ratings)} ratings: {ratings[:10]}")
         
         if not ratings:
-            print("[Rating Spread Plot] No valid ratings, showing empty data message")
             _handle_empty_data(ax)
         else:
             # Create histogram
@@ -145,8 +146,6 @@ def generate_rating_spread_plot(reviews):
             mean_rating = np.mean(ratings)
             std_rating = np.std(ratings, ddof=1) if len(ratings) > 1 else 0
             
-            print(f"[Rating Spread Plot] Mean: {mean_rating:.2f}, Std: {std_rating:.2f}")
-            
             # Only add KDE curve if there's variance in the data
             if len(set(ratings)) > 1:
                 try:
@@ -179,12 +178,27 @@ def generate_rating_spread_plot(reviews):
             ax.set_facecolor('#d3d3d3')
             fig.patch.set_facecolor('#d3d3d3')
             
-            print("[Rating Spread Plot] Plot generated successfully")
-
     img = io.BytesIO()
     fig.savefig(img, format='png', bbox_inches='tight', dpi=120, facecolor=fig.get_facecolor())
-    plt.close(fig)
     img.seek(0)
-    print(f"[Rating Spread Plot] Image size: {len(img.getvalue())} bytes")
     return img
 
+
+# Review columns each plot reads
+PLOT_COLUMNS = {
+    "review_length": ["review_text"],
+    "sentiment_polarity": ["polarity"],
+    "length_by_rating": ["rating", "review_text"],
+    "rating_spread": ["rating"],
+}
+
+PLOT_RENDERERS = {
+    "review_length": generate_review_length_plot,
+    "sentiment_polarity": generate_sentiment_polarity_plot,
+    "length_by_rating": generate_length_by_rating_plot,
+    "rating_spread": generate_rating_spread_plot,
+}
+
+def render_png(plot, reviews, figsize=PLOT_SIZES["default"]):
+    """Render a plot by name and return the PNG bytes (picklable, for the render pool)."""
+    return PLOT_RENDERERS[plot](reviews, figsize).getvalue()
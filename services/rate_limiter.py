@@ -0,0 +1,69 @@
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+# Default politeness budget per host: sustained requests/second and burst size
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 2
+
+# Backoff applied after a 503 / 429 / captcha response, doubled on each repeat
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 120.0
+JITTER = 0.25
+
+_limiters = {}
+
+
+class TokenBucket:
+    """Async token bucket with exponential backoff for a single host."""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent, then consume one token."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+                await asyncio.sleep(wait * (1 + random.uniform(0, JITTER)))
+
+    def penalize(self):
+        """Back off after the host signalled throttling (503 / 429 / captcha)."""
+        self.backoff = min(BACKOFF_MAX, self.backoff * 2 if self.backoff else BACKOFF_BASE)
+        self.blocked_until = time.monotonic() + self.backoff
+        self.tokens = 0.0
+        print(f"⏳ Backing off for {self.backoff:.0f}s")
+        return self.backoff
+
+    def reward(self):
+        """Reset the backoff after a successful response."""
+        self.backoff = 0.0
+
+
+def get_limiter(url, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+    """Return the shared TokenBucket for the host of `url`."""
+    host = urlsplit(url).netloc.lower()
+    limiter = _limiters.get(host)
+    if limiter is None:
+        limiter = TokenBucket(rate=rate, burst=burst)
+        _limiters[host] = limiter
+    return limiter
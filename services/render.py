@@ -0,0 +1,114 @@
+"""Process pool that renders the dashboard plots.
+
+Each worker imports Matplotlib (Figure API only, no pyplot state) and
+renders a throwaway figure at start-up so font and backend loading are
+paid once, not on the first dashboard view. Jobs beyond the workers plus
+RENDER_BACKLOG are refused instead of queueing without bound, and a
+caller stops waiting after RENDER_TIMEOUT seconds.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from services.plots import render_png
+
+# 0 renders in the calling thread instead of a worker process
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs allowed to wait for a free worker
+RENDER_BACKLOG = int(os.getenv("RENDER_BACKLOG", "16"))
+RENDER_TIMEOUT = float(os.getenv("RENDER_TIMEOUT", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(RENDER_WORKERS, 1) + RENDER_BACKLOG)
+render_counters = {"rendered": 0, "rejected": 0, "timed_out": 0, "failed": 0}
+
+
+class RenderBusyError(RuntimeError):
+    """Raised when the render backlog is full."""
+
+
+class RenderTimeoutError(RuntimeError):
+    """Raised when a render does not finish within the timeout."""
+
+
+def _warm_worker():
+    render_png("review_length", [{"review_text": "warm up"}], (2, 1))
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+            print(f"🎨 Render pool started ({RENDER_WORKERS} workers, backlog {RENDER_BACKLOG})")
+        return _pool
+
+
+def _reset_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def render_plot(plot, reviews, figsize, timeout=RENDER_TIMEOUT):
+    """Render `plot` in the worker pool and return its PNG bytes.
+
+    Blocks the calling (threadpool) thread, never the event loop. Raises
+    RenderBusyError when the backlog is full and RenderTimeoutError when
+    the render takes longer than `timeout` seconds.
+    """
+    if not _slots.acquire(blocking=False):
+        render_counters["rejected"] += 1
+        raise RenderBusyError("Render backlog is full")
+
+    if RENDER_WORKERS <= 0:
+        try:
+            png = render_png(plot, reviews, figsize)
+            render_counters["rendered"] += 1
+            return png
+        finally:
+            _slots.release()
+
+    pool = _get_pool()
+    try:
+        future = pool.submit(render_png, plot, reviews, figsize)
+    except Exception as e:
+        _slots.release()
+        if isinstance(e, BrokenProcessPool):
+            _reset_pool(pool)
+        raise
+    # The slot is held until the job really finishes, even if we stop waiting
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        png = future.result(timeout=timeout)
+    except TimeoutError:
+        render_counters["timed_out"] += 1
+        raise RenderTimeoutError(f"Rendering {plot} took longer than {timeout}s")
+    except BrokenProcessPool:
+        render_counters["failed"] += 1
+        _reset_pool(pool)
+        raise
+    render_counters["rendered"] += 1
+    return png
+
+
+def render_stats():
+    return {**render_counters, "workers": RENDER_WORKERS, "backlog": RENDER_BACKLOG}
+
+
+def shutdown_render_pool():
+    """Stop the render worker processes (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
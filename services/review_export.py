@@ -0,0 +1,202 @@
+"""Streaming export of reviews and products.
+
+Rows are read with fetchmany in batches of EXPORT_BATCH_SIZE and each batch
+is encoded and handed on before the next is read, so memory stays bounded
+whatever the table size. CSV and JSONL are always available; Parquet and
+Arrow (IPC stream) need the optional pyarrow package (pinned in
+requirements-dev.txt) and write one row group / record batch per read batch.
+"""
+import csv
+import io
+import json
+import os
+
+from services.review_queries import review_filters
+
+# Optional columnar formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_FORMATS = {
+    # format -> (media type, file extension)
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Exportable columns per table, with their Arrow type names
+EXPORT_TABLES = {
+    "reviews": {
+        "id": "int64",
+        "product_id": "string",
+        "review_title": "string",
+        "review_text": "string",
+        "rating": "float64",
+        "sentiment": "string",
+        "polarity": "float64",
+        "created_at": "string",
+        "amazon_review_id": "string",
+    },
+    "products": {
+        "id": "int64",
+        "product_id": "string",
+        "product_name": "string",
+        "product_url": "string",
+        "product_image": "string",
+        "product_price": "string",
+        "created_at": "string",
+    },
+}
+# Filters that apply to each table (see review_filters)
+TABLE_FILTERS = {
+    "reviews": ("product_id", "sentiment", "min_rating", "max_rating", "date_from", "date_to"),
+    "products": ("product_id", "date_from", "date_to"),
+}
+
+
+class ExportError(ValueError):
+    """Raised for an unknown table, format or column."""
+
+
+def export_columns(table, columns=None):
+    """Validated column list for `table`; None or empty means every column."""
+    if table not in EXPORT_TABLES:
+        raise ExportError(f"Unknown table: {table}")
+    available = EXPORT_TABLES[table]
+    if not columns:
+        return list(available)
+    unknown = [c for c in columns if c not in available]
+    if unknown:
+        raise ExportError(f"Unknown {table} columns: {', '.join(unknown)}")
+    return list(dict.fromkeys(columns))
+
+
+def check_format(fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format: {fmt}")
+    if fmt in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+        raise ExportError(f"The {fmt} format needs pyarrow, which is not installed")
+
+
+def iter_batches(conn, table, columns, batch_size=None, **filters):
+    """Yield lists of row tuples from `table`, at most `batch_size` rows each."""
+    filters = {k: v for k, v in filters.items() if k in TABLE_FILTERS[table]}
+    clauses, params = review_filters(**filters)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY id", params)
+    while True:
+        rows = cursor.fetchmany(batch_size or EXPORT_BATCH_SIZE)
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+
+
+def _csv_chunks(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Header only: nothing matched
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _jsonl_chunks(columns, batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in batch).encode("utf-8")
+
+
+class _ByteSink:
+    """Write-only file object that collects what pyarrow writes, for draining."""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _arrow_schema(table, columns):
+    types = EXPORT_TABLES[table]
+    return pa.schema([(column, getattr(pa, types[column])()) for column in columns])
+
+
+def _record_batch(schema, batch):
+    values = list(zip(*batch))
+    return pa.RecordBatch.from_arrays(
+        [pa.array(list(values[i]), type=field.type) for i, field in enumerate(schema)],
+        schema=schema,
+    )
+
+
+def _columnar_chunks(fmt, table, columns, batches):
+    schema = _arrow_schema(table, columns)
+    sink = _ByteSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        for batch in batches:
+            record_batch = _record_batch(schema, batch)
+            if fmt == "parquet":
+                # One row group per batch
+                writer.write_table(pa.Table.from_batches([record_batch]))
+            else:
+                writer.write_batch(record_batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    # Parquet footer / Arrow end-of-stream marker
+    yield sink.drain()
+
+
+def export_chunks(conn, table, fmt, columns=None, batch_size=None, **filters):
+    """Yield the encoded export of `table` as byte chunks.
+
+    Raises ExportError for an unknown table, column or format before any
+    row is read.
+    """
+    columns = export_columns(table, columns)
+    check_format(fmt)
+    batches = iter_batches(conn, table, columns, batch_size, **filters)
+    if fmt == "csv":
+        return _csv_chunks(columns, batches)
+    if fmt == "jsonl":
+        return _jsonl_chunks(columns, batches)
+    return _columnar_chunks(fmt, table, columns, batches)
@@ -0,0 +1,217 @@
+"""Streaming bulk import of review files.
+
+CSV and JSONL files (optionally gzip-compressed) are read row by row and
+handled in chunks of IMPORT_CHUNK_SIZE, so memory stays flat whatever the
+file size. Rows without a sentiment or polarity are scored with the batched
+multi-process scorer; each chunk is inserted in one transaction through
+insert_reviews, which skips duplicates and keeps the aggregates current.
+While a chunk is being written the next one is already read and scored.
+"""
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from configs.database import get_db, insert_reviews
+from services.sentiment import analyze_sentiment_batch
+
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "5000"))
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Row content that identifies an imported review without an Amazon id
+IMPORT_KEY_COLUMNS = ("product_id", "review_title", "review_text", "rating", "created_at")
+
+# Column names understood in import files; anything else is ignored
+IMPORT_COLUMNS = (
+    "product_id", "review_title", "review_text", "rating",
+    "sentiment", "polarity", "created_at", "amazon_review_id",
+)
+
+
+class ImportFormatError(ValueError):
+    """Raised for an unknown file format or a row that cannot be decoded."""
+
+
+def detect_format(filename):
+    """Import format from a file name ("reviews.csv.gz" -> "csv")."""
+    name = filename.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    for fmt, extensions in (("csv", (".csv",)), ("jsonl", (".jsonl", ".ndjson"))):
+        if name.endswith(extensions):
+            return fmt
+    raise ImportFormatError(f"Cannot tell the format of {filename!r}; expected .csv or .jsonl")
+
+
+def open_import_file(fileobj, filename=""):
+    """Text stream over a binary file object, transparently gunzipping."""
+    if filename.lower().endswith(".gz"):
+        fileobj = gzip.GzipFile(fileobj=fileobj)
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def iter_rows(stream, fmt):
+    """Yield one dict per CSV row / JSON line of a text stream."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ImportFormatError(f"Line {number} is not valid JSON: {e}") from None
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"Line {number} is not a JSON object")
+            yield row
+    else:
+        raise ImportFormatError(f"Unknown import format: {fmt}")
+
+
+def _number(value):
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def coerce_review(row):
+    """Review dict for insert_reviews from a raw file row, or None if unusable.
+
+    A row is unusable without a product_id or review_text, or with a rating
+    that is not a number from 1 to 5 (a missing rating is allowed).
+    """
+    review = {column: _text(row.get(column)) for column in IMPORT_COLUMNS}
+    if review["product_id"] is None or review["review_text"] is None:
+        return None
+    if review["rating"] is not None:
+        review["rating"] = _number(review["rating"])
+        if review["rating"] is None or not 1 <= review["rating"] <= 5:
+            return None
+    review["polarity"] = _number(review["polarity"])
+    if review["sentiment"] is not None:
+        # Same labels as the scorer ("Positive", ...)
+        review["sentiment"] = review["sentiment"].capitalize()
+    return review
+
+
+def content_hash(review):
+    """SHA-1 of an imported review's IMPORT_KEY_COLUMNS."""
+    content = "\x1f".join("" if review[c] is None else str(review[c]) for c in IMPORT_KEY_COLUMNS)
+    return hashlib.sha1(content.encode("utf-8")).digest()
+
+
+def import_key(digest, occurrence):
+    """Identity of an imported row without an Amazon review id.
+
+    Its content hash plus how many identical rows came before it in the
+    same import. Re-importing a file (under any name), or a later export
+    that repeats its rows, skips them; a different file reusing a name is
+    imported; identical reviews by different customers in one file are all
+    kept.
+    """
+    return f"{digest.hex()}:{occurrence}"
+
+
+def score_missing(reviews):
+    """Fill in sentiment and polarity where either is missing; returns the count scored."""
+    missing = [r for r in reviews if r["sentiment"] is None or r["polarity"] is None]
+    if missing:
+        results = analyze_sentiment_batch([r["review_text"] for r in missing])
+        for review, (sentiment, polarity) in zip(missing, results):
+            review["sentiment"] = sentiment
+            review["polarity"] = polarity
+    return len(missing)
+
+
+def import_reviews(rows, chunk_size=None):
+    """Import an iterable of raw rows; yields a progress dict after every chunk.
+
+    Rows without an Amazon review id are identified by their content (see
+    import_key).
+
+    Products not stored yet get a minimal row, created with the chunk.
+
+    Progress dicts carry rows, inserted, skipped (duplicates), invalid,
+    scored, products (rows created), elapsed and rows_per_sec; the last
+    one has done=True.
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    totals = {"rows": 0, "inserted": 0, "skipped": 0, "invalid": 0, "scored": 0, "products": 0}
+    start = time.perf_counter()
+    rows = iter(rows)
+    conn = get_db()
+
+    def progress(done=False):
+        elapsed = time.perf_counter() - start
+        return {**totals, "elapsed": round(elapsed, 2),
+                "rows_per_sec": round(totals["rows"] / elapsed, 1) if elapsed else 0.0, "done": done}
+
+    def write(reviews, counts):
+        result = insert_reviews(conn, reviews, add_products=True)
+        return {**counts, **result}
+
+    def finish(future):
+        for key, value in future.result().items():
+            totals[key] += value
+
+    # One writer thread: chunk n is inserted while chunk n + 1 is read and scored
+    writer = ThreadPoolExecutor(max_workers=1)
+    pending = None
+    # Rows seen so far per content hash, across chunks
+    occurrences = Counter()
+    try:
+        while True:
+            raw = list(islice(rows, chunk_size))
+            if not raw:
+                break
+            reviews = []
+            for row in raw:
+                review = coerce_review(row)
+                if review is not None:
+                    if review["amazon_review_id"] is None:
+                        digest = content_hash(review)
+                        review["import_key"] = import_key(digest, occurrences[digest])
+                        occurrences[digest] += 1
+                    reviews.append(review)
+            counts = {"rows": len(raw), "invalid": len(raw) - len(reviews), "scored": score_missing(reviews)}
+
+            if pending is not None:
+                finish(pending)
+                yield progress()
+            pending = writer.submit(write, reviews, counts)
+
+        if pending is not None:
+            finish(pending)
+            pending = None
+        yield progress(done=True)
+    finally:
+        if pending is not None:
+            # Let an in-flight write finish before the connection goes back
+            pending.exception()
+        writer.shutdown()
+        conn.close()
+
+
+def import_file(path, fmt=None, chunk_size=None):
+    """Import a CSV / JSONL file from disk; yields progress like import_reviews."""
+    fmt = fmt or detect_format(path)
+    with open(path, "rb") as raw:
+        stream = open_import_file(raw, path)
+        yield from import_reviews(iter_rows(stream, fmt), chunk_size)
@@ -0,0 +1,191 @@
+"""Filtered, keyset-paginated and streamed reads of reviews and products.
+
+Pages continue from the last row seen (its sort key and id) instead of
+using OFFSET, so every page is an index range scan no matter how deep the
+client has paged, and rows inserted meanwhile never shift a page.
+"""
+import base64
+import json
+
+REVIEW_COLUMNS = ["id", "product_id", "review_title", "review_text", "rating", "sentiment", "polarity", "created_at"]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+# HTML listings: sort name -> (column, direction); ties broken by id
+REVIEW_SORTS = {
+    "newest": ("r.id", "DESC"),
+    "oldest": ("r.id", "ASC"),
+    "rating_high": ("r.rating", "DESC"),
+    "rating_low": ("r.rating", "ASC"),
+}
+PRODUCT_SORTS = {
+    "newest": ("p.id", "DESC"),
+    "oldest": ("p.id", "ASC"),
+    "name": ("p.product_name", "ASC"),
+}
+LISTING_PAGE_SIZE = 30
+
+
+def review_filters(product_id=None, sentiment=None, min_rating=None, max_rating=None,
+                   date_from=None, date_to=None, alias=None):
+    """WHERE clauses and parameters for the common review filters.
+
+    date_from / date_to are inclusive ISO dates (YYYY-MM-DD) on created_at.
+    """
+    col = (lambda name: f"{alias}.{name}") if alias else (lambda name: name)
+    clauses, params = [], []
+    if product_id:
+        clauses.append(f"{col('product_id')} = ?")
+        params.append(product_id)
+    if sentiment:
+        clauses.append(f"{col('sentiment')} = ? COLLATE NOCASE")
+        params.append(sentiment)
+    if min_rating is not None:
+        clauses.append(f"{col('rating')} >= ?")
+        params.append(min_rating)
+    if max_rating is not None:
+        clauses.append(f"{col('rating')} <= ?")
+        params.append(max_rating)
+    if date_from:
+        clauses.append(f"{col('created_at')} >= ?")
+        params.append(str(date_from))
+    if date_to:
+        clauses.append(f"{col('created_at')} < date(?, '+1 day')")
+        params.append(str(date_to))
+    return clauses, params
+
+
+def _select(columns, clauses):
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {', '.join(columns)} FROM reviews {where} ORDER BY id"
+
+
+def fetch_review_page(conn, limit=DEFAULT_PAGE_SIZE, after=None, **filters):
+    """One page of reviews with id > `after`.
+
+    Returns {"reviews": [...], "next_after": id or None}; pass next_after
+    back as `after` for the following page.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    clauses, params = review_filters(**filters)
+    if after is not None:
+        clauses.append("id > ?")
+        params.append(after)
+
+    cursor = conn.cursor()
+    # One extra row tells whether another page exists
+    cursor.execute(_select(REVIEW_COLUMNS, clauses) + " LIMIT ?", (*params, limit + 1))
+    rows = cursor.fetchall()
+    reviews = [dict(row) for row in rows[:limit]]
+    next_after = reviews[-1]["id"] if len(rows) > limit else None
+    return {"reviews": reviews, "next_after": next_after}
+
+
+def iter_reviews(conn, columns=REVIEW_COLUMNS, batch_size=STREAM_BATCH_SIZE, **filters):
+    """Yield matching reviews as dicts, holding at most `batch_size` rows at a time."""
+    clauses, params = review_filters(**filters)
+    cursor = conn.cursor()
+    cursor.execute(_select(columns, clauses), params)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            yield dict(row)
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Sort key and id from a page cursor, or None for a missing/invalid one."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        return None
+    return values if isinstance(values, list) and len(values) == 2 else None
+
+
+class KeysetPage:
+    """One page of a listing, read lazily so a template can stream it.
+
+    Iterate once; after that `next_cursor` is set if more rows follow.
+    """
+
+    def __init__(self, cursor, limit, sort_field, id_field):
+        self._cursor = cursor
+        self.limit = limit
+        self._sort_field = sort_field
+        self._id_field = id_field
+        self.next_cursor = None
+
+    def __iter__(self):
+        last = None
+        count = 0
+        while True:
+            rows = self._cursor.fetchmany(self.limit + 1 - count)
+            if not rows:
+                return
+            for row in rows:
+                if count == self.limit:
+                    self.next_cursor = encode_cursor([last[self._sort_field], last[self._id_field]])
+                    return
+                count += 1
+                last = row
+                yield row
+
+
+def _keyset_listing(conn, select, sorts, sort, clauses, params, cursor, limit, id_column):
+    column, direction = sorts.get(sort) or next(iter(sorts.values()))
+    clauses, params = list(clauses), list(params)
+    if column != id_column:
+        # Keyset comparisons need a non-NULL sort key
+        clauses.append(f"{column} IS NOT NULL")
+
+    key = decode_cursor(cursor)
+    if key is not None:
+        op = "<" if direction == "DESC" else ">"
+        if column == id_column:
+            clauses.append(f"{id_column} {op} ?")
+            params.append(key[1])
+        else:
+            clauses.append(f"({column}, {id_column}) {op} (?, ?)")
+            params.extend(key)
+
+    order = f"{column} {direction}" if column == id_column else f"{column} {direction}, {id_column} {direction}"
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    db_cursor = conn.cursor()
+    db_cursor.execute(f"{select} {where} ORDER BY {order} LIMIT ?", (*params, limit + 1))
+    return KeysetPage(db_cursor, limit, column.split(".")[1], id_column.split(".")[1])
+
+
+def review_listing(conn, cursor=None, sort="newest", limit=LISTING_PAGE_SIZE, **filters):
+    """Reviews joined with their product, for the /reviews page."""
+    clauses, params = review_filters(alias="r", **filters)
+    return _keyset_listing(
+        conn,
+        "SELECT r.*, p.product_name, p.product_image, p.product_price "
+        "FROM reviews r LEFT JOIN products p ON r.product_id = p.product_id",
+        REVIEW_SORTS, sort, clauses, params, cursor, limit, "r.id",
+    )
+
+
+def product_listing(conn, cursor=None, sort="newest", limit=LISTING_PAGE_SIZE, q=None):
+    """Products with their review counts (from the maintained aggregates)."""
+    clauses, params = [], []
+    if q:
+        clauses.append("p.product_name LIKE ?")
+        params.append(f"%{q}%")
+    return _keyset_listing(
+        conn,
+        "SELECT p.*, CAST(COALESCE(a.total, 0) AS INTEGER) AS review_count "
+        "FROM products p LEFT JOIN review_aggregates a ON a.scope = p.product_id",
+        PRODUCT_SORTS, sort, clauses, params, cursor, limit, "p.id",
+    )
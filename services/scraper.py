@@ -1,89 +1,60 @@
-import requests
-from bs4 import BeautifulSoup
-import re
 import time
 import asyncio
-import random
-from urllib.parse import urljoin
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
-def extract_product_details(url):
+from services import page_cache
+from services.http_client import fetch
+from services.rate_limiter import get_limiter
+from services.parser import make_soup, run_parser
+from services.extractor import extract_product, extract_reviews
+
+# Accept-Encoding and Connection are managed by the pooled client: it only
+# advertises encodings it can decode and keeps connections alive itself.
+
+def parse_product_page(html, url):
+    """Extract product name, image and price from a product page.
+
+    Pure function (HTML in, dict out) so it can run in the parser pool.
+    """
+    return extract_product(make_soup(html), html, url)
+
+
+def parse_review_page(html, product_id=None, max_reviews=None):
+    """Extract reviews and the next-page link from a review page.
+
+    Pure function (HTML in, dict out) so it can run in the parser pool.
+    Returns {"reviews": [...], "block_count": n, "next_url": url or None}.
+    """
+    return extract_reviews(make_soup(html), html, product_id, max_reviews)
+
+
+async def extract_product_details(url):
     """Extract product details from Amazon product page"""
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
         "Accept-Language": "en-US,en;q=0.9",
-        "Accept-Encoding": "gzip, deflate, br",
         "DNT": "1",
-        "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1"
     }
-    
+
     try:
         # Get the main product page (not reviews page)
         if "product-reviews" in url:
             # Extract product ID and create main product URL
             product_id = url.split("/product-reviews/")[1].split("/")[0]
             url = f"https://www.amazon.in/dp/{product_id}"
-        
+
         print(f"🛍️ Fetching product details from: {url}")
-        res = requests.get(url, headers=headers, timeout=15)
+        res = await fetch_page(url, headers)
+        if res is None:
+            raise Exception("Amazon blocked the request (Captcha/Bot Detection)")
         res.raise_for_status()
-        
-        soup = BeautifulSoup(res.text, "html.parser")
-        
-        # Extract product name
-        name_selectors = [
-            "#productTitle",
-            "h1.a-size-large", 
-            ".product-title",
-            "h1 span"
-        ]
-        product_name = "Unknown Product"
-        for selector in name_selectors:
-            name_elem = soup.select_one(selector)
-            if name_elem:
-                product_name = name_elem.get_text(strip=True)
-                break
-        
-        # Extract product image
-        image_selectors = [
-            "#landingImage",
-            ".a-dynamic-image",
-            "img.a-image-wrapper img",
-            "#imgBlkFront"
-        ]
-        product_image = ""
-        for selector in image_selectors:
-            img_elem = soup.select_one(selector)
-            if img_elem:
-                product_image = img_elem.get("src") or img_elem.get("data-src") or ""
-                if product_image:
-                    break
-        
-        # Extract product price
-        price_selectors = [
-            ".a-price-whole",
-            ".a-offscreen",
-            ".a-price .a-offscreen",
-            "#corePrice_feature_div .a-price .a-offscreen",
-            ".a-size-medium.a-color-price"
-        ]
-        product_price = "Price not available"
-        for selector in price_selectors:
-            price_elem = soup.select_one(selector)
-            if price_elem:
-                product_price = price_elem.get_text(strip=True)
-                break
-        
-        product_details = {
-            "product_name": product_name,
-            "product_url": url,
-            "product_image": product_image,
-            "product_price": product_price
-        }
-        
-        print(f"✅ Product details extracted: {product_name}")
+
+        product_details = await run_parser(parse_product_page, res.text, url)
+
+        print(f"✅ Product details extracted: {product_details['product_name']}")
         return product_details
-        
+
     except Exception as e:
         print(f"❌ Error extracting product details: {str(e)}")
         return {
@@ -94,13 +65,75 @@ def extract_product_details(url):
         }
 
 
-async def scrape_reviews(url: str, product_id=None, limit=100):
+MAX_BLOCKED_RETRIES = 2
+
+
+def _is_blocked(res):
+    """Amazon signals throttling with a 503 / 429 or a captcha page."""
+    return res.status_code in (429, 503) or "Enter the characters you see below" in res.text
+
+
+async def fetch_page(url, headers, revalidate=False):
+    """Fetch a page through the page cache and the per-host rate limiter.
+
+    Fresh cached pages are returned without a request; stale ones, and
+    every cached page when `revalidate` is set, are revalidated. Backs off
+    and retries when the host answers with a 503 / 429 or a captcha.
+    Returns the response, or None if the host kept blocking us.
+    """
+    cached = None
+    if page_cache.PAGE_CACHE_ENABLED or page_cache.OFFLINE:
+        cached = await asyncio.to_thread(page_cache.load, url)
+        if cached is not None and (page_cache.OFFLINE or (not revalidate and cached.age < page_cache.PAGE_CACHE_TTL)):
+            page_cache.count("hits")
+            return cached.to_response()
+        page_cache.count("misses")
+        if page_cache.OFFLINE:
+            return page_cache.offline_miss(url)
+
+    limiter = get_limiter(url)
+    request_headers = {**headers, **cached.conditional_headers()} if cached else headers
+    for attempt in range(MAX_BLOCKED_RETRIES + 1):
+        await limiter.acquire()
+        res = await fetch(url, headers=request_headers)
+        if cached is not None and res.status_code == 304:
+            limiter.reward()
+            page_cache.count("revalidated")
+            await asyncio.to_thread(page_cache.touch, cached)
+            return cached.to_response()
+        if not _is_blocked(res):
+            limiter.reward()
+            if res.status_code == 200 and page_cache.PAGE_CACHE_ENABLED:
+                await asyncio.to_thread(page_cache.store, url, res)
+            return res
+        print(f"⚠️ Blocked fetching {url} (attempt {attempt + 1})")
+        limiter.penalize()
+    return None
+
+
+def _with_query(url, **params):
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update(params)
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+async def scrape_reviews(url: str, product_id=None, limit=100, newest_first=False, is_known=None):
+    """Scrape up to `limit` reviews, yielding progress, per-page and result events.
+
+    Each parsed page is yielded as {"type": "page", "reviews": [...]}; the
+    final {"type": "result"} event only carries the total count.
+
+    With newest_first the review pages are requested sorted by date, and
+    `is_known(review)` ends the scrape at the first review already stored:
+    only the reviews before it are yielded and no further page is fetched.
+    Those pages change whenever a review is posted, so cached copies are
+    always revalidated instead of being served within PAGE_CACHE_TTL.
+    """
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
         "Accept-Language": "en-US,en;q=0.9",
-        "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1",
         "Sec-Fetch-Dest": "document",
         "Sec-Fetch-Mode": "navigate",
@@ -109,14 +142,15 @@ async def scrape_reviews(url: str, product_id=None, limit=100):
         "Cache-Control": "max-age=0",
     }
 
+    # Pages are pipelined: while one page is parsed (and its reviews consumed
+    # downstream) the next one is already being fetched under the rate limiter.
+    next_task = None
+
     try:
-        # Add delay to avoid being blocked
-        await asyncio.sleep(2)
-        
         # Ensure we are checking the main product page or reviews page
         print(f"📡 Processing URL: {url}")
         yield {"type": "progress", "count": 0, "total": limit, "message": f"Processing URL..."}
-        
+
         target_url = url
         # If it's a direct product link, try to construct the reviews URL
         if "/dp/" in url and "product-reviews" not in url:
@@ -126,129 +160,87 @@ async def scrape_reviews(url: str, product_id=None, limit=100):
                 target_url = f"https://www.amazon.in/product-reviews/{prod_id}/ref=cm_cr_dp_d_show_all_btm?ie=UTF8&reviewerType=all_reviews"
             except:
                 pass # Fallback to original URL if extraction fails
-        
+        if newest_first:
+            target_url = _with_query(target_url, sortBy="recent")
+
         print(f"📡 Fetching reviews from: {target_url}")
         yield {"type": "progress", "count": 0, "total": limit, "message": "Fetching first page of reviews..."}
-        
-        # Note: requests is blocking. For full async benefit, use aiohttp/httpx.
-        # But this wrapper is enough to solve the "async for" TypeError.
-        res = requests.get(target_url, headers=headers, timeout=15)
-        
+
+        res = await fetch_page(target_url, headers, revalidate=newest_first)
+
         # Check for bot detection/captcha (status 503 or 200 with captcha text)
-        if res.status_code == 503 or "Enter the characters you see below" in res.text:
+        if res is None:
             print("⚠️ Amazon blocked the request (Captcha/Bot Detection).")
             yield {"type": "error", "message": "Amazon blocked the request (Captcha/Bot Detection)."}
             return
 
         res.raise_for_status()
-        
-        soup = BeautifulSoup(res.text, "html.parser")
-        reviews = []
+
+        collected = 0
         page_num = 1
 
-        # Updated selectors for 2024/2025 Amazon structure
-        review_selectors = [
-            "div[data-hook='review']",
-            "div.a-section.review",
-            "div[id^='customer_review']" 
-        ]
-        
-        while len(reviews) < limit:
+        while collected < limit:
             print(f"Scraping page {page_num} for URL: {target_url}")
-            yield {"type": "progress", "count": len(reviews), "total": limit, "message": f"Scraping page {page_num}..."}
-            
-            # Find elements on current page
-            page_blocks = []
-            for selector in review_selectors:
-                elements = soup.select(selector)
-                if elements:
-                    print(f"✅ Found {len(elements)} reviews on page {page_num}")
-                    page_blocks = elements
-                    break
-            
-            if not page_blocks:
+            yield {"type": "progress", "count": collected, "total": limit, "message": f"Scraping page {page_num}..."}
+
+            # Parse off the event loop
+            page = await run_parser(parse_review_page, res.text, product_id, limit - collected)
+
+            if not page["block_count"]:
                 print(f"⚠️ No reviews found on page {page_num}")
                 break
 
-            for block in page_blocks:
-                try:
-                    if len(reviews) >= limit:
+            print(f"✅ Found {page['block_count']} reviews on page {page_num}")
+
+            reached_known = False
+            if is_known is not None:
+                for i, review in enumerate(page["reviews"]):
+                    if is_known(review):
+                        print(f"⏹️ Reached an already stored review on page {page_num}")
+                        page["reviews"] = page["reviews"][:i]
+                        reached_known = True
                         break
 
-                    # Title
-                    title_elem = block.select_one("[data-hook='review-title']") or \
-                                 block.select_one(".review-title")
-                    
-                    review_title = "Review"
-                    if title_elem:
-                        review_title = title_elem.get_text(strip=True)
-                        review_title = re.sub(r'^\d\.\d out of 5 stars\s*', '', review_title) # clean stars
-                        review_title = re.sub(r'^\d\.\d out of 5 stars', '', review_title) # double check
-
-                    # Text
-                    text_elem = block.select_one("[data-hook='review-body']") or \
-                                block.select_one(".review-text-content")
-                    
-                    review_text = "No review text."
-                    if text_elem:
-                        # Use separator to avoid jamming words together
-                        review_text = text_elem.get_text(" ", strip=True)
-
-                    # Rating
-                    rating_value = 3.0
-                    rating_elem = block.select_one("[data-hook='review-star-rating']") or \
-                                  block.select_one(".a-icon-star")
-                    
-                    if rating_elem:
-                        rating_text = rating_elem.get_text(strip=True)
-                        match = re.search(r'(\d+(\.\d+)?)', rating_text)
-                        if match:
-                            rating_value = float(match.group(1))
-
-                    reviews.append({
-                        "product_id": product_id,
-                        "review_title": review_title.strip(),
-                        "review_text": review_text,
-                        "rating": rating_value
-                    })
-                except Exception as e:
-                    print(f"⚠️ Error processing review: {e}")
-                    continue
-            
-            print(f"Collected {len(reviews)}/{limit} reviews so far.")
-            yield {"type": "progress", "count": len(reviews), "total": limit, "message": f"Collected {len(reviews)} reviews..."}
-            
-            if len(reviews) >= limit:
+            # Start fetching the next page before handing this one downstream
+            next_url = page["next_url"]
+            if next_url and not reached_known and collected + page["block_count"] < limit:
+                print(f"Prefetching next page: {next_url}")
+                next_task = asyncio.create_task(fetch_page(next_url, headers, revalidate=newest_first))
+
+            collected += len(page["reviews"])
+
+            print(f"Collected {collected}/{limit} reviews so far.")
+            # Hand each page downstream as soon as it is parsed
+            yield {"type": "page", "page": page_num, "reviews": page["reviews"]}
+            yield {"type": "progress", "count": collected, "total": limit, "message": f"Collected {collected} reviews..."}
+
+            if collected >= limit or reached_known:
                 break
 
-            # Pagination Logic
-            next_page = soup.select_one("li.a-last a") or soup.select_one("a.a-pagination-next")
-            if next_page and 'href' in next_page.attrs:
-                next_url = urljoin("https://www.amazon.in", next_page['href'])
-                print(f"Navigating to next page: {next_url}")
-                await asyncio.sleep(random.uniform(2, 5)) 
-                
-                try:
-                    res = requests.get(next_url, headers=headers, timeout=15)
-                    # Check for blocking again
-                    if res.status_code == 503 or "Enter the characters you see below" in res.text:
-                        print("⚠️ Amazon blocked the next page request.")
-                        break
-                    
-                    res.raise_for_status()
-                    soup = BeautifulSoup(res.text, "html.parser")
-                    page_num += 1
-                    target_url = next_url # Update for logging
-                except Exception as e:
-                    print(f"Failed to fetch next page: {e}")
-                    break
-            else:
+            if next_task is None:
                 print("No next page found.")
                 break
 
-        print(f"✅ Successfully scraped {len(reviews)} reviews")
-        yield {"type": "result", "reviews": reviews}
-        
+            try:
+                res = await next_task
+                next_task = None
+                if res is None:
+                    print("⚠️ Amazon blocked the next page request.")
+                    break
+
+                res.raise_for_status()
+                page_num += 1
+                target_url = next_url # Update for logging
+            except Exception as e:
+                print(f"Failed to fetch next page: {e}")
+                break
+
+        print(f"✅ Successfully scraped {collected} reviews")
+        yield {"type": "result", "count": collected}
+
     except Exception as e:
         print(f"❌ Error scraping reviews: {str(e)}")
         yield {"type": "error", "message": f"Failed to retrieve reviews: {str(e)}"}
+    finally:
+        if next_task is not None and not next_task.done():
+            next_task.cancel()
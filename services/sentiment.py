@@ -1,14 +1,264 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import textblob
 from textblob import TextBlob
 
-def analyze_sentiment(text: str):
+from configs.database import get_db
+
+# Polarity thresholds for the Positive / Negative labels
+POSITIVE_THRESHOLD = 0.1
+NEGATIVE_THRESHOLD = -0.1
+
+# Identifies the scorer in cache keys; any change here (or in the thresholds)
+# makes every previously cached score unreachable and purgeable.
+SCORER_VERSION = f"textblob-{textblob.__version__}-pattern-v1"
+
+# Batch scoring settings
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", "0")) or (os.cpu_count() or 1)
+CHUNK_SIZE = 500
+# Batches smaller than this are scored inline; the pool round-trip costs more
+MIN_PARALLEL_BATCH = 200
+
+# Cache settings
+MEMORY_CACHE_SIZE = 50000
+DB_LOOKUP_CHUNK = 500
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+_memory_cache = OrderedDict()
+_cache_lock = threading.Lock()
+cache_counters = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _classify(polarity):
+    if polarity > POSITIVE_THRESHOLD:
+        return "Positive"
+    elif polarity < NEGATIVE_THRESHOLD:
+        return "Negative"
+    return "Neutral"
+
+
+def _score_text(text):
     blob = TextBlob(text)
     polarity = blob.sentiment.polarity  # -1 to +1
 
-    if polarity > 0.1:
-        sentiment = "Positive"
-    elif polarity < -0.1:
-        sentiment = "Negative"
-    else:
-        sentiment = "Neutral"
+    return _classify(polarity), float(polarity)
+
+
+def scorer_tag():
+    """Scorer identity stored with cached rows; covers version and thresholds."""
+    return f"{SCORER_VERSION}|{POSITIVE_THRESHOLD}|{NEGATIVE_THRESHOLD}"
+
+
+def cache_key(text, tag=None):
+    """Content address of a review text for the current scorer."""
+    normalized = _WHITESPACE_RE.sub(" ", text or "").strip()
+    payload = f"{tag or scorer_tag()}\x00{normalized}"
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def analyze_sentiment(text: str):
+    return analyze_sentiment_batch([text])[0]
+
+
+# Score given to a text the scorer fails on; never cached
+FALLBACK_SCORE = ("Neutral", 0.0)
+
+
+def _score_chunk(texts):
+    """Scores of a list of texts; None for a text the scorer failed on."""
+    results = []
+    for text in texts:
+        try:
+            results.append(_score_text(text or ""))
+        except Exception as e:
+            print(f"⚠️ Sentiment scoring failed, using neutral: {repr(e)}")
+            results.append(None)
+    return results
+
+
+def _warm_worker():
+    # Load the pattern lexicon once per worker instead of on the first chunk
+    TextBlob("warm up").sentiment
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+            _pool_workers = workers
+            print(f"🧠 Sentiment pool started ({workers} workers)")
+        return _pool
+
+
+def _score_uncached(texts, workers, chunk_size):
+    if workers <= 1 or len(texts) < MIN_PARALLEL_BATCH:
+        return _score_chunk(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    results = []
+    for scored in _get_pool(workers).map(_score_chunk, chunks):
+        results.extend(scored)
+    return results
+
+
+def _memory_get(key):
+    with _cache_lock:
+        value = _memory_cache.get(key)
+        if value is not None:
+            _memory_cache.move_to_end(key)
+        return value
+
+
+def _memory_put(key, value):
+    with _cache_lock:
+        _memory_cache[key] = value
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _db_lookup(keys):
+    found = {}
+    try:
+        conn = get_db()
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(keys), DB_LOOKUP_CHUNK):
+                chunk = keys[i:i + DB_LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(
+                    f"SELECT text_hash, sentiment, polarity FROM sentiment_cache WHERE text_hash IN ({placeholders})",
+                    chunk,
+                )
+                for row in cursor.fetchall():
+                    found[row["text_hash"]] = (row["sentiment"], row["polarity"])
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Sentiment cache lookup failed: {e}")
+    return found
+
+
+def _db_store(entries):
+    tag = scorer_tag()
+    try:
+        conn = get_db()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (text_hash, scorer, sentiment, polarity) VALUES (?, ?, ?, ?)",
+                [(key, tag, sentiment, polarity) for key, (sentiment, polarity) in entries.items()],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"⚠️ Sentiment cache write failed: {e}")
+
+
+def analyze_sentiment_batch(texts, workers=None, chunk_size=CHUNK_SIZE, use_cache=True):
+    """Score a list of texts, returning [(sentiment, polarity), ...] in order.
+
+    Texts are looked up by content hash in the in-memory LRU, then in the
+    sentiment_cache table; only unseen texts are scored (each distinct text
+    once). Large batches are split into chunks and scored across a warm
+    process pool; small batches (or workers=1) are scored in the calling
+    process. A text the scorer fails on gets a neutral score instead of
+    failing the whole batch.
+    """
+    texts = list(texts)
+    workers = workers or SENTIMENT_WORKERS
+    if not use_cache:
+        return [value or FALLBACK_SCORE for value in _score_uncached(texts, workers, chunk_size)]
+
+    tag = scorer_tag()
+    keys = [cache_key(text, tag) for text in texts]
+    results = {}
+    pending = []
+    for key in dict.fromkeys(keys):
+        value = _memory_get(key)
+        if value is not None:
+            results[key] = value
+            cache_counters["memory_hits"] += 1
+        else:
+            pending.append(key)
+
+    if pending:
+        from_db = _db_lookup(pending)
+        cache_counters["db_hits"] += len(from_db)
+        for key, value in from_db.items():
+            results[key] = value
+            _memory_put(key, value)
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in results and key not in missing:
+            missing[key] = text
+    if missing:
+        cache_counters["misses"] += len(missing)
+        scored = dict(zip(missing, _score_uncached(list(missing.values()), workers, chunk_size)))
+        for key, value in scored.items():
+            results[key] = value or FALLBACK_SCORE
+        # Texts the scorer failed on are retried next time instead of cached
+        scored = {key: value for key, value in scored.items() if value is not None}
+        for key, value in scored.items():
+            _memory_put(key, value)
+        _db_store(scored)
+
+    return [results[key] for key in keys]
+
+
+def init_sentiment_cache():
+    """Drop cached scores produced by a different scorer version or thresholds."""
+    conn = get_db()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sentiment_cache WHERE scorer != ?", (scorer_tag(),))
+        if cursor.rowcount:
+            print(f"🧹 Purged {cursor.rowcount} stale sentiment cache entries")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def cache_stats():
+    """Hit / miss counters and sizes of both cache tiers."""
+    stats = dict(cache_counters)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else 0
+    stats["memory_entries"] = len(_memory_cache)
+    try:
+        conn = get_db()
+        try:
+            stats["db_entries"] = conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        stats["db_entries"] = 0
+    return stats
+
 
-    return sentiment, float(polarity)
+def shutdown_sentiment_pool():
+    """Stop the scoring worker processes (called on application shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
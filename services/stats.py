@@ -1,68 +1,109 @@
-def calculate_stats(reviews):
-    total = len(reviews)
-    pos = sum(1 for r in reviews if r.get("sentiment", "").lower() == "positive")
-    neg = sum(1 for r in reviews if r.get("sentiment", "").lower() == "negative")
-    neu = sum(1 for r in reviews if r.get("sentiment", "").lower() == "neutral")
-
-    avg_rating = round(sum(r["rating"] for r in reviews) / total, 2) if total else 0
-
-    stars = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-    for r in reviews:
-        try:
-            rating = int(round(r.get("rating", 0)))
-            if 1 <= rating <= 5:
-                stars[rating] += 1
-        except:
-            pass
+from collections import Counter
+
+import numpy as np
+from scipy import stats as scipy_stats
+from scipy.stats import pearsonr
+from scipy.stats import t as t_dist
+
+EMPTY_METRICS = {"mean": 0, "median": 0, "std": 0, "variance": 0, "skewness": 0, "kurtosis": 0}
+
+
+def _float_column(reviews, key):
+    # Missing values become NaN so they can be masked out
+    return np.fromiter(
+        (np.nan if r.get(key) is None else r[key] for r in reviews),
+        dtype=float,
+        count=len(reviews),
+    )
+
+
+def load_review_arrays(reviews, fields=("sentiment", "rating", "polarity", "length")):
+    """Load the review columns the stats need into NumPy arrays, once.
+
+    Returns a dict with "n" plus the requested columns: "sentiment" (counts
+    of lower-cased labels), "rating", "polarity" and "length" arrays.
+    """
+    arrays = {"n": len(reviews)}
+    if "sentiment" in fields:
+        arrays["sentiment"] = Counter((r.get("sentiment") or "").lower() for r in reviews)
+    if "rating" in fields:
+        arrays["rating"] = _float_column(reviews, "rating")
+    if "polarity" in fields:
+        arrays["polarity"] = _float_column(reviews, "polarity")
+    if "length" in fields:
+        arrays["length"] = np.fromiter(
+            (len(r["review_text"]) for r in reviews), dtype=float, count=len(reviews)
+        )
+    return arrays
+
+
+def _star_buckets(ratings):
+    """1-5 star index for each rating (round half to even, like round()), or -1."""
+    valid = ~np.isnan(ratings)
+    stars = np.full(len(ratings), -1, dtype=np.int64)
+    stars[valid] = np.round(ratings[valid]).astype(np.int64)
+    stars[(stars < 1) | (stars > 5)] = -1
+    return stars
+
+
+def _varies(values):
+    return len(values) > 0 and bool((values != values[0]).any())
+
+
+def _stats_from_arrays(a):
+    total = a["n"]
+    counts = a["sentiment"]
+    ratings = a["rating"]
+
+    avg_rating = round(float(ratings.sum()) / total, 2) if total else 0
+
+    stars = _star_buckets(ratings)
+    histogram = np.bincount(stars[stars > 0], minlength=6)
 
     return {
         "total": total,
-        "positive": pos,
-        "negative": neg,
-        "neutral": neu,
+        "positive": counts.get("positive", 0),
+        "negative": counts.get("negative", 0),
+        "neutral": counts.get("neutral", 0),
         "avg_rating": avg_rating,
-        "stars": [stars[1], stars[2], stars[3], stars[4], stars[5]]
+        "stars": [int(c) for c in histogram[1:6]]
     }
 
-def calculate_correlations(reviews):
-    if not reviews:
-        default_val = {"r": 0, "p": 0, "text": "No data available"}
-        return {
-            "rating_sentiment": default_val,
-            "rating_length": default_val
-        }
-    
-    from scipy.stats import pearsonr
+
+def _describe_correlation(r, p):
     def get_description(r):
         if abs(r) > 0.7: return "Strong"
         if abs(r) > 0.4: return "Moderate"
         if abs(r) > 0.1: return "Weak"
         return "Negligible"
 
+    return {
+        "r": round(r, 2),
+        "p": round(p, 4),
+        "text": f"{get_description(r)} {'positive' if r > 0 else 'negative'} relationship"
+    }
+
+
+def _correlations_from_arrays(a):
+    if not a["n"]:
+        default_val = {"r": 0, "p": 0, "text": "No data available"}
+        return {
+            "rating_sentiment": default_val,
+            "rating_length": default_val
+        }
+
     try:
-        ratings = [r["rating"] for r in reviews]
-        polarities = [r["polarity"] for r in reviews]
-        lengths = [len(r["review_text"]) for r in reviews]
-        
+        ratings, polarities, lengths = a["rating"], a["polarity"], a["length"]
+
         # Rating vs Sentiment
-        if len(set(ratings)) > 1 and len(set(polarities)) > 1:
-            r_s, p_s = pearsonr(ratings, polarities)
-            rating_sentiment = {
-                "r": round(r_s, 2),
-                "p": round(p_s, 4),
-                "text": f"{get_description(r_s)} {'positive' if r_s > 0 else 'negative'} relationship"
-            }
+        if _varies(ratings) and _varies(polarities):
+            rating_sentiment = _describe_correlation(*pearsonr(ratings, polarities))
         else:
             rating_sentiment = {"r": 0, "p": 0, "text": "Insufficient variance"}
 
         # Rating vs Length
-        if len(set(ratings)) > 1 and len(set(lengths)) > 1:
-            r_l, p_l = pearsonr(ratings, lengths)
-            rating_length = {
-                "r": round(r_l, 2),
-                "p": round(p_l, 4),
-                "text": f"{get_description(r_l)} {'positive' if r_l > 0 else 'negative'} relationship"
-            }
+        if _varies(ratings) and _varies(lengths):
+            rating_length = _describe_correlation(*pearsonr(ratings, lengths))
         else:
             rating_length = {"r": 0, "p": 0, "text": "Insufficient variance"}
 
@@ -78,96 +119,231 @@ def calculate_correlations(reviews):
             "rating_length": err_val
         }
 
-def calculate_detailed_sentiment_distribution(reviews):
-    """Calculate detailed sentiment distribution with 5 levels"""
-    if not reviews:
-        return {
-            "very_positive": 0,
-            "positive": 0,
-            "neutral": 0,
-            "negative": 0,
-            "very_negative": 0
-        }
-    
-    very_positive = sum(1 for r in reviews if r.get("polarity", 0) > 0.5)
-    positive = sum(1 for r in reviews if 0.1 < r.get("polarity", 0) <= 0.5)
-    neutral = sum(1 for r in reviews if -0.1 <= r.get("polarity", 0) <= 0.1)
-    negative = sum(1 for r in reviews if -0.5 <= r.get("polarity", 0) < -0.1)
-    very_negative = sum(1 for r in reviews if r.get("polarity", 0) < -0.5)
-    
+
+def _detailed_from_arrays(a):
+    p = a["polarity"]
     return {
-        "very_positive": very_positive,
-        "positive": positive,
-        "neutral": neutral,
-        "negative": negative,
-        "very_negative": very_negative
+        "very_positive": int((p > 0.5).sum()),
+        "positive": int(((p > 0.1) & (p <= 0.5)).sum()),
+        "neutral": int(((p >= -0.1) & (p <= 0.1)).sum()),
+        "negative": int(((p >= -0.5) & (p < -0.1)).sum()),
+        "very_negative": int((p < -0.5).sum())
     }
 
-def calculate_advanced_metrics(reviews):
-    """Calculate advanced disagreement metrics"""
-    if not reviews:
-        return {
-            "rating": {"mean": 0, "median": 0, "std": 0, "variance": 0, "skewness": 0, "kurtosis": 0},
-            "polarity": {"mean": 0, "median": 0, "std": 0, "variance": 0, "skewness": 0, "kurtosis": 0}
-        }
-    
-    import numpy as np
-    from scipy import stats as scipy_stats
-    
-    ratings = [r["rating"] for r in reviews if r.get("rating") is not None]
-    polarities = [r["polarity"] for r in reviews if r.get("polarity") is not None]
-    
-    def calc_metrics(data):
-        if not data or len(data) < 2:
-            return {"mean": 0, "median": 0, "std": 0, "variance": 0, "skewness": 0, "kurtosis": 0}
-        arr = np.array(data)
-        return {
-            "mean": round(float(np.mean(arr)), 6),
-            "median": round(float(np.median(arr)), 6),
-            "std": round(float(np.std(arr, ddof=1)), 6),
-            "variance": round(float(np.var(arr, ddof=1)), 6),
-            "skewness": round(float(scipy_stats.skew(arr)), 6),
-            "kurtosis": round(float(scipy_stats.kurtosis(arr)), 6)
-        }
-    
+
+def _calc_metrics(arr):
+    arr = arr[~np.isnan(arr)]
+    if len(arr) < 2:
+        return dict(EMPTY_METRICS)
     return {
-        "rating": calc_metrics(ratings),
-        "polarity": calc_metrics(polarities)
+        "mean": round(float(np.mean(arr)), 6),
+        "median": round(float(np.median(arr)), 6),
+        "std": round(float(np.std(arr, ddof=1)), 6),
+        "variance": round(float(np.var(arr, ddof=1)), 6),
+        "skewness": round(float(scipy_stats.skew(arr)), 6),
+        "kurtosis": round(float(scipy_stats.kurtosis(arr)), 6)
     }
 
-def get_sentiment_by_rating(reviews):
-    """Calculate average sentiment polarity for each star rating (1-5)"""
-    # Initialize buckets
-    rating_buckets = {1: [], 2: [], 3: [], 4: [], 5: []}
-    
-    for r in reviews:
-        try:
-            rating = int(round(r.get("rating", 0)))
-            if 1 <= rating <= 5:
-                # Use polarity if available, else 0
-                polarity = r.get("polarity", 0)
-                if polarity is None: polarity = 0
-                rating_buckets[rating].append(polarity)
-        except:
-            continue
-            
-    # Calculate averages
+
+def _advanced_from_arrays(a):
+    if not a["n"]:
+        return {"rating": dict(EMPTY_METRICS), "polarity": dict(EMPTY_METRICS)}
+    return {
+        "rating": _calc_metrics(a["rating"]),
+        "polarity": _calc_metrics(a["polarity"])
+    }
+
+
+def _sentiment_by_rating_from_arrays(a):
+    stars = _star_buckets(a["rating"])
+    rated = stars > 0
+    # Use polarity if available, else 0
+    polarities = np.nan_to_num(a["polarity"][rated], nan=0.0)
+    counts = np.bincount(stars[rated], minlength=6)
+    sums = np.bincount(stars[rated], weights=polarities, minlength=6)
+
     averages = []
     for star in range(1, 6):
-        vals = rating_buckets[star]
-        if vals:
-            avg = sum(vals) / len(vals)
-            # Normalize to 0-100 scale for chart (approx) or keep -1 to 1?
-            # Chart usually expects percentage or similar. Let's map -1..1 to 0..100% 
-            # where 0 is -1, 50 is 0, 100 is +1.
-            # actually better to just return the polarity avg and let frontend handle or pre-process.
-            # But specific dashboard chart seems to range 0-100%.
-            # Let's start with mapping: (val + 1) * 50
-            normalized = (avg + 1) * 50
-            averages.append(round(normalized, 1))
+        if counts[star]:
+            # Map the -1..1 average polarity onto the chart's 0-100% scale
+            averages.append(round(float((sums[star] / counts[star] + 1) * 50), 1))
         else:
             averages.append(0)
-            
     return averages
 
 
+def calculate_all_stats(reviews):
+    """Every dashboard metric from one load of the review arrays.
+
+    Returns the same keys as calculate_dashboard_from_aggregates.
+    """
+    a = load_review_arrays(reviews)
+    return {
+        "stats": _stats_from_arrays(a),
+        "correlations": _correlations_from_arrays(a),
+        "detailed_sentiment": _detailed_from_arrays(a),
+        "advanced_metrics": _advanced_from_arrays(a),
+        "sentiment_by_rating": _sentiment_by_rating_from_arrays(a)
+    }
+
+
+def calculate_stats(reviews):
+    return _stats_from_arrays(load_review_arrays(reviews, ("sentiment", "rating")))
+
+
+def calculate_correlations(reviews):
+    return _correlations_from_arrays(load_review_arrays(reviews, ("rating", "polarity", "length")))
+
+
+def calculate_detailed_sentiment_distribution(reviews):
+    """Calculate detailed sentiment distribution with 5 levels"""
+    return _detailed_from_arrays(load_review_arrays(reviews, ("polarity",)))
+
+
+def calculate_advanced_metrics(reviews):
+    """Calculate advanced disagreement metrics"""
+    return _advanced_from_arrays(load_review_arrays(reviews, ("rating", "polarity")))
+
+
+def get_sentiment_by_rating(reviews):
+    """Calculate average sentiment polarity for each star rating (1-5)"""
+    return _sentiment_by_rating_from_arrays(load_review_arrays(reviews, ("rating", "polarity")))
+
+
+def _median_from_counts(value_counts, n):
+    """Median of a multiset given as sorted [(value, count), ...]."""
+    lo_pos, hi_pos = (n - 1) // 2, n // 2
+    lo = hi = None
+    seen = 0
+    for value, count in value_counts:
+        if lo is None and lo_pos < seen + count:
+            lo = value
+        if hi_pos < seen + count:
+            hi = value
+            break
+        seen += count
+    return (lo + hi) / 2
+
+
+def _is_constant(n, s1, s2, value_counts):
+    """Whether every value is the same, from value counts and power sums.
+
+    Counts may be bucketed (polarity), so a single bucket only means
+    constant data when the sums show no spread beyond rounding noise.
+    """
+    if len(value_counts) != 1:
+        return False
+    mean = s1 / n
+    return s2 / n - mean ** 2 <= 1e-12 * max(1.0, mean ** 2)
+
+
+def _metrics_from_sums(n, s1, s2, s3, s4, value_counts):
+    """Same figures as calculate_advanced_metrics, from power sums.
+
+    The median comes from `value_counts`, so it is only as exact as those
+    (polarity is counted in buckets of configs.aggregates.POLARITY_RESOLUTION).
+    """
+    if n < 2:
+        return dict(EMPTY_METRICS)
+    mean = s1 / n
+    if _is_constant(n, s1, s2, value_counts):
+        # Constant data: zero spread, undefined shape (as numpy/scipy report)
+        m2 = 0.0
+        skewness = kurtosis = float("nan")
+    else:
+        m2 = max(s2 / n - mean ** 2, 0.0)
+        m3 = s3 / n - 3 * mean * s2 / n + 2 * mean ** 3
+        m4 = s4 / n - 4 * mean * s3 / n + 6 * mean ** 2 * s2 / n - 3 * mean ** 4
+        skewness = m3 / m2 ** 1.5 if m2 > 0 else float("nan")
+        kurtosis = m4 / m2 ** 2 - 3 if m2 > 0 else float("nan")
+    variance = m2 * n / (n - 1)
+    return {
+        "mean": round(mean, 6),
+        "median": round(float(_median_from_counts(value_counts, n)), 6),
+        "std": round(variance ** 0.5, 6),
+        "variance": round(variance, 6),
+        "skewness": round(skewness, 6),
+        "kurtosis": round(kurtosis, 6)
+    }
+
+
+def _pearson_from_sums(n, sx, sy, sxx, syy, sxy):
+    denom = ((n * sxx - sx * sx) * (n * syy - sy * sy)) ** 0.5
+    r = max(-1.0, min(1.0, (n * sxy - sx * sy) / denom))
+    if n <= 2 or abs(r) == 1.0:
+        return r, 0.0 if n > 2 else 1.0
+    t_stat = r * ((n - 2) / (1 - r * r)) ** 0.5
+    return r, float(2 * t_dist.sf(abs(t_stat), n - 2))
+
+
+def calculate_dashboard_from_aggregates(aggregates):
+    """Every dashboard metric from a configs.aggregates.load_aggregates() result.
+
+    Matches calculate_stats, calculate_correlations,
+    calculate_detailed_sentiment_distribution, calculate_advanced_metrics and
+    get_sentiment_by_rating without touching individual reviews, except for
+    the polarity median, which is read from bucketed counts and is within
+    half a bucket (0.005) of the exact one.
+    """
+    t = aggregates["totals"]
+    values = aggregates["values"]
+    total = int(t["total"])
+    n = int(t["n"])
+    stars = [int(t[f"star_{i}"]) for i in range(1, 6)]
+
+    stats = {
+        "total": total,
+        "positive": int(t["positive"]),
+        "negative": int(t["negative"]),
+        "neutral": int(t["neutral"]),
+        "avg_rating": round(t["rating_sum1"] / total, 2) if total else 0,
+        "stars": stars
+    }
+
+    detailed = {
+        "very_positive": int(t["very_positive"]),
+        "positive": int(t["pol_positive"]),
+        "neutral": int(t["pol_neutral"]),
+        "negative": int(t["pol_negative"]),
+        "very_negative": int(t["very_negative"])
+    }
+
+    advanced = {
+        "rating": _metrics_from_sums(n, t["rating_sum1"], t["rating_sum2"], t["rating_sum3"], t["rating_sum4"], values["rating"]),
+        "polarity": _metrics_from_sums(n, t["polarity_sum1"], t["polarity_sum2"], t["polarity_sum3"], t["polarity_sum4"], values["polarity"])
+    }
+
+    sentiment_by_rating = []
+    for i, count in enumerate(stars, start=1):
+        if count:
+            avg = t[f"star_polarity_sum_{i}"] / count
+            sentiment_by_rating.append(round((avg + 1) * 50, 1))
+        else:
+            sentiment_by_rating.append(0)
+
+    if not total:
+        default_val = {"r": 0, "p": 0, "text": "No data available"}
+        correlations = {"rating_sentiment": default_val, "rating_length": default_val}
+    else:
+        ratings_vary = n > 0 and not _is_constant(n, t["rating_sum1"], t["rating_sum2"], values["rating"])
+        polarities_vary = n > 0 and not _is_constant(n, t["polarity_sum1"], t["polarity_sum2"], values["polarity"])
+
+        def correlation(sy, syy, sxy, varies):
+            if ratings_vary and varies:
+                return _describe_correlation(*_pearson_from_sums(n, t["rating_sum1"], sy, t["rating_sum2"], syy, sxy))
+            return {"r": 0, "p": 0, "text": "Insufficient variance"}
+
+        # Lengths are integers, so their variance check is exact
+        lengths_vary = n * t["length_sum2"] - t["length_sum1"] ** 2 > 0
+        correlations = {
+            "rating_sentiment": correlation(t["polarity_sum1"], t["polarity_sum2"], t["rating_polarity_sum"], polarities_vary),
+            "rating_length": correlation(t["length_sum1"], t["length_sum2"], t["rating_length_sum"], lengths_vary)
+        }
+
+    return {
+        "stats": stats,
+        "correlations": correlations,
+        "detailed_sentiment": detailed,
+        "advanced_metrics": advanced,
+        "sentiment_by_rating": sentiment_by_rating
+    }
@@ -0,0 +1,143 @@
+"""Dashboard statistics aggregated inside SQLite.
+
+Same results as services.stats, but the counts, histograms and power sums
+are computed by one conditional-aggregate query (plus a GROUP BY for the
+rating / polarity value counts used by medians, polarity in the same
+buckets as configs.aggregates), so only a few hundred rows at most leave
+the database however many reviews there are. Every function can be scoped
+to a single product and / or a created_at date range.
+"""
+from configs.aggregates import (
+    AGGREGATE_COLUMNS,
+    POLARITY_BUCKET_COLUMNS,
+    SENTIMENT_COLUMNS,
+    STAR_COLUMNS,
+    STAR_POLARITY_COLUMNS,
+    polarity_value_sql,
+)
+from services.review_queries import review_filters
+from services.stats import calculate_dashboard_from_aggregates
+
+# Python's round() rounds halves to even (round(2.5) == 2) while SQLite's
+# rounds them away from zero, so bucket stars the way services.stats does.
+_TRUNC = "CAST(rating AS INTEGER)"
+STAR_SQL = (
+    f"CASE WHEN rating - {_TRUNC} > 0.5 THEN {_TRUNC} + 1 "
+    f"WHEN rating - {_TRUNC} = 0.5 THEN {_TRUNC} + {_TRUNC} % 2 "
+    f"ELSE {_TRUNC} END"
+)
+
+# Moments only cover reviews with both rating and polarity present
+_BOTH = "rating IS NOT NULL AND polarity IS NOT NULL"
+
+_ROWS_SQL = f"""
+    SELECT
+        lower(sentiment) AS sentiment,
+        {STAR_SQL} AS star,
+        COALESCE(polarity, 0) AS pol,
+        CASE WHEN {_BOTH} THEN rating END AS r,
+        CASE WHEN {_BOTH} THEN polarity END AS p,
+        CASE WHEN {_BOTH} THEN COALESCE(length(review_text), 0) END AS l
+    FROM reviews
+    {{where}}
+"""
+
+_POLARITY_BUCKET_SQL = {
+    "very_positive": "pol > 0.5",
+    "pol_positive": "pol > 0.1 AND pol <= 0.5",
+    "pol_neutral": "pol >= -0.1 AND pol <= 0.1",
+    "pol_negative": "pol >= -0.5 AND pol < -0.1",
+    "very_negative": "pol < -0.5",
+}
+
+
+def _column_expressions():
+    exprs = {"total": "COUNT(*)"}
+    for col in SENTIMENT_COLUMNS:
+        exprs[col] = f"COUNT(CASE WHEN sentiment = '{col}' THEN 1 END)"
+    for i, (col, pol_col) in enumerate(zip(STAR_COLUMNS, STAR_POLARITY_COLUMNS), start=1):
+        exprs[col] = f"COUNT(CASE WHEN star = {i} THEN 1 END)"
+        exprs[pol_col] = f"TOTAL(CASE WHEN star = {i} THEN pol END)"
+    for col in POLARITY_BUCKET_COLUMNS:
+        exprs[col] = f"COUNT(CASE WHEN {_POLARITY_BUCKET_SQL[col]} THEN 1 END)"
+    exprs["n"] = "COUNT(r)"
+    for k in range(1, 5):
+        exprs[f"rating_sum{k}"] = f"TOTAL({'*'.join('r' * k)})"
+        exprs[f"polarity_sum{k}"] = f"TOTAL({'*'.join('p' * k)})"
+    exprs["length_sum1"] = "TOTAL(l)"
+    exprs["length_sum2"] = "TOTAL(l*l)"
+    exprs["rating_polarity_sum"] = "TOTAL(r*p)"
+    exprs["rating_length_sum"] = "TOTAL(r*l)"
+    return [exprs[col] for col in AGGREGATE_COLUMNS]
+
+
+AGGREGATE_SQL = (
+    f"SELECT {', '.join(_column_expressions())} FROM ({_ROWS_SQL})"
+)
+
+_POLARITY_VALUE = polarity_value_sql("polarity")
+
+VALUE_COUNTS_SQL = f"""
+    SELECT 'polarity', {_POLARITY_VALUE} AS bucket, COUNT(*) FROM reviews WHERE {_BOTH} {{scope}} GROUP BY bucket
+    UNION ALL
+    SELECT 'rating', rating, COUNT(*) FROM reviews WHERE {_BOTH} {{scope}} GROUP BY rating
+    ORDER BY 1, 2
+"""
+
+
+def query_aggregates(conn, product_id=None, date_from=None, date_to=None):
+    """Aggregate the reviews table in SQL, optionally for one product / date range.
+
+    Returns the same structure as configs.aggregates.load_aggregates, so it
+    can be passed straight to calculate_dashboard_from_aggregates.
+    """
+    clauses, params = review_filters(product_id=product_id, date_from=date_from, date_to=date_to)
+    cursor = conn.cursor()
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor.execute(AGGREGATE_SQL.format(where=where), params)
+    row = cursor.fetchone()
+    totals = {col: row[i] or 0 for i, col in enumerate(AGGREGATE_COLUMNS)}
+
+    values = {"rating": [], "polarity": []}
+    scope = "".join(f" AND {clause}" for clause in clauses)
+    cursor.execute(VALUE_COUNTS_SQL.format(scope=scope), params * 2)
+    for field, value, count in cursor.fetchall():
+        values[field].append((value, count))
+    return {"totals": totals, "values": values}
+
+
+def calculate_dashboard_sql(conn, product_id=None, date_from=None, date_to=None):
+    """Every dashboard metric, aggregated in SQLite."""
+    return calculate_dashboard_from_aggregates(query_aggregates(conn, product_id, date_from, date_to))
+
+
+def _dashboard_metric(key, conn, product_id, date_from, date_to, aggregates):
+    # One metric alone costs the same two queries as the whole dashboard;
+    # to show several, run query_aggregates once and pass it as `aggregates`
+    if aggregates is None:
+        aggregates = query_aggregates(conn, product_id, date_from, date_to)
+    return calculate_dashboard_from_aggregates(aggregates)[key]
+
+
+# Per-metric versions; prefixed so they cannot be mistaken for the
+# services.stats functions of the same name, which take a review list
+def sql_calculate_stats(conn, product_id=None, date_from=None, date_to=None, aggregates=None):
+    return _dashboard_metric("stats", conn, product_id, date_from, date_to, aggregates)
+
+
+def sql_calculate_correlations(conn, product_id=None, date_from=None, date_to=None, aggregates=None):
+    return _dashboard_metric("correlations", conn, product_id, date_from, date_to, aggregates)
+
+
+def sql_calculate_detailed_sentiment_distribution(conn, product_id=None, date_from=None, date_to=None,
+                                                  aggregates=None):
+    return _dashboard_metric("detailed_sentiment", conn, product_id, date_from, date_to, aggregates)
+
+
+def sql_calculate_advanced_metrics(conn, product_id=None, date_from=None, date_to=None, aggregates=None):
+    return _dashboard_metric("advanced_metrics", conn, product_id, date_from, date_to, aggregates)
+
+
+def sql_get_sentiment_by_rating(conn, product_id=None, date_from=None, date_to=None, aggregates=None):
+    return _dashboard_metric("sentiment_by_rating", conn, product_id, date_from, date_to, aggregates)
@@ -0,0 +1,221 @@
+"""Shared fixtures: a throwaway database and a local fake review site.
+
+Run from the project root:
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import asyncio
+import math
+import os
+import random
+import sys
+import threading
+import zlib
+from collections import Counter, OrderedDict, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# main.py mounts static/ and template/ relative to the working directory
+os.chdir(ROOT)
+
+# Keep tests self-contained: no page cache, parsing, scoring and plot
+# rendering in-process
+os.environ.setdefault("PAGE_CACHE", "0")
+os.environ.setdefault("SCRAPER_PARSE_WORKERS", "0")
+os.environ.setdefault("SENTIMENT_WORKERS", "1")
+os.environ.setdefault("RENDER_WORKERS", "0")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import configs.database as database
+from configs.aggregates import POLARITY_RESOLUTION
+from services import jobs as job_queue
+from services import rate_limiter
+from services.http_client import close_client
+from services.plot_cache import clear_plot_cache
+from services.stats import calculate_all_stats
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """A migrated, empty database; yields a pooled connection to it."""
+    monkeypatch.setattr(database, "DB_NAME", str(tmp_path / "test.db"))
+    database.init_db()
+    conn = database.get_db()
+    yield conn
+    conn.close()
+    database.close_pool()
+
+
+@pytest.fixture
+def jobs(db, monkeypatch):
+    """The job queue module with its in-memory state reset."""
+    monkeypatch.setattr(job_queue, "_queue", None)
+    monkeypatch.setattr(job_queue, "_workers", [])
+    monkeypatch.setattr(job_queue, "_jobs", OrderedDict())
+    monkeypatch.setattr(job_queue, "_active_by_url", {})
+    monkeypatch.setattr(job_queue, "_running_by_host", Counter())
+    monkeypatch.setattr(job_queue, "_parked_by_host", defaultdict(deque))
+    return job_queue
+
+
+@pytest.fixture
+def client(db):
+    """TestClient for the app, started against the `db` database."""
+    import main
+
+    # Cache keys restart with every test database's data versions
+    clear_plot_cache()
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def make_review(product_id="P1", text="Solid phone", **fields):
+    """Scored review dict as insert_reviews expects it."""
+    return {"product_id": product_id, "review_title": "Title", "review_text": text, "rating": 5.0,
+            "sentiment": "Positive", "polarity": 0.5, **fields}
+
+
+def assert_close(actual, expected, path="", tolerance=1e-6):
+    """Recursive equality of metric structures, with float tolerance and NaN == NaN."""
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected), path
+        for key in expected:
+            assert_close(actual[key], expected[key], f"{path}.{key}", tolerance)
+    elif isinstance(expected, (list, tuple)):
+        assert len(actual) == len(expected), path
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            assert_close(a, e, f"{path}[{i}]", tolerance)
+    elif isinstance(expected, float) and math.isnan(expected):
+        assert math.isnan(actual), path
+    elif isinstance(expected, (int, float)):
+        assert actual == pytest.approx(expected, rel=tolerance, abs=tolerance), path
+    else:
+        assert actual == expected, path
+
+
+def random_reviews(n, product_ids=("P1", "P2"), seed=7):
+    """`n` scored reviews with varied ratings, polarities and lengths."""
+    rnd = random.Random(seed)
+    reviews = []
+    for i in range(n):
+        polarity = rnd.uniform(-1, 1)
+        reviews.append(make_review(
+            product_id=rnd.choice(product_ids),
+            text="x" * rnd.randint(5, 300) + str(i),
+            rating=float(rnd.randint(1, 5)),
+            polarity=polarity,
+            sentiment="Positive" if polarity > 0.1 else "Negative" if polarity < -0.1 else "Neutral",
+        ))
+    return reviews
+
+
+def assert_matches_full_scan(aggregated, reviews):
+    """Aggregate-based metrics equal calculate_all_stats(reviews)."""
+    expected = calculate_all_stats(reviews)
+    # The polarity median comes from bucketed counts
+    median = aggregated["advanced_metrics"]["polarity"].pop("median")
+    assert median == pytest.approx(expected["advanced_metrics"]["polarity"].pop("median"), abs=POLARITY_RESOLUTION / 2)
+    assert_close(aggregated, expected)
+
+
+def run(coro):
+    """Run a coroutine on a fresh event loop, closing the shared HTTP client after."""
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await close_client()
+    return asyncio.run(wrapper())
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def review_block(review_id, title, text, stars):
+    return (
+        f'<div data-hook="review" id="{review_id}" class="a-section review">'
+        f'<a data-hook="review-title" class="review-title"><span>{title}</span></a>'
+        f'<i data-hook="review-star-rating"><span class="a-icon-alt">{stars}.0 out of 5 stars</span></i>'
+        f'<span data-hook="review-body" class="review-text-content"><span>{text}</span></span></div>'
+    )
+
+
+class FakeSite:
+    """Review pages served from memory, Amazon-shaped enough for the extractor.
+
+    `pages[n]` is the list of (review_id, title, text, stars) shown on page
+    n; pages link to the next one while it exists. Every response carries
+    an ETag and honours If-None-Match.
+    """
+
+    def __init__(self):
+        self.pages = {}
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, self.headers.get("If-None-Match")))
+                status, headers, body = site.respond(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.host = f"127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def url(self, product="X", **query):
+        query = "&".join(f"{k}={v}" for k, v in query.items())
+        return f"http://{self.host}/item/{product}" + (f"?{query}" if query else "")
+
+    def add_pages(self, count, per_page=10, prefix="R"):
+        for n in range(1, count + 1):
+            self.pages[n] = [
+                (f"{prefix}{n:03d}{i:02d}", f"Title {n}-{i}", f"Review {n}-{i}: {'great' if i % 2 else 'bad'} phone",
+                 i % 5 + 1)
+                for i in range(per_page)
+            ]
+
+    def html(self, number):
+        blocks = "".join(review_block(*review) for review in self.pages.get(number, []))
+        next_link = ""
+        if number + 1 in self.pages:
+            next_link = (f'<ul class="a-pagination"><li class="a-last">'
+                         f'<a href="{self.url(pageNumber=number + 1)}">Next</a></li></ul>')
+        return (f"<html><body><h1 id='productTitle'>Fake Phone</h1><span class='a-price-whole'>999</span>"
+                f"{blocks}{next_link}</body></html>")
+
+    def respond(self, path, if_none_match):
+        query = parse_qs(urlsplit(path).query)
+        number = int(query.get("pageNumber", ["1"])[0])
+        body = self.html(number).encode("utf-8")
+        etag = f'"{zlib.crc32(body):x}"'
+        if if_none_match == etag:
+            return 304, {"ETag": etag}, b""
+        return 200, {"ETag": etag, "Content-Type": "text/html"}, body
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    """A FakeSite, unthrottled by the per-host rate limiter."""
+    fake = FakeSite()
+    rate_limiter._limiters[fake.host] = rate_limiter.TokenBucket(rate=1000, burst=1000)
+    yield fake
+    rate_limiter._limiters.pop(fake.host, None)
+    fake.close()
@@ -0,0 +1,55 @@
+import pytest
+from conftest import assert_close, assert_matches_full_scan, make_review, random_reviews
+
+from configs.aggregates import POLARITY_RESOLUTION, load_aggregates, polarity_value
+from configs.database import clear_data, insert_reviews
+from services.stats import calculate_all_stats, calculate_dashboard_from_aggregates
+
+
+def stored_reviews(db, product_id=None):
+    query = "SELECT * FROM reviews" + (" WHERE product_id = ?" if product_id else "")
+    return [dict(row) for row in db.execute(query, (product_id,) if product_id else ())]
+
+
+@pytest.mark.parametrize("scope", ["*", "P1"])
+def test_aggregates_match_a_full_scan(db, scope):
+    reviews = random_reviews(500)
+    for i in range(0, len(reviews), 120):
+        insert_reviews(db, reviews[i:i + 120])
+
+    aggregated = calculate_dashboard_from_aggregates(load_aggregates(db, scope))
+
+    assert_matches_full_scan(aggregated, stored_reviews(db, None if scope == "*" else scope))
+
+
+def test_polarity_counts_stay_bounded(db):
+    insert_reviews(db, random_reviews(2000))
+
+    polarity = load_aggregates(db)["values"]["polarity"]
+
+    assert len(polarity) <= 2 / POLARITY_RESOLUTION + 1
+    assert sum(count for _, count in polarity) == 2000
+
+
+@pytest.mark.parametrize("value, bucket", [(0.004, 0.0), (0.005, 0.01), (-0.005, 0.0), (-0.006, -0.01), (0.999, 1.0)])
+def test_polarity_buckets_round_halves_up(value, bucket):
+    assert polarity_value(value) == bucket
+
+
+def test_constant_polarity_within_a_bucket_still_has_spread(db):
+    insert_reviews(db, [make_review(text="a", polarity=0.501, rating=1.0), make_review(text="b", polarity=0.503, rating=5.0)])
+
+    aggregated = calculate_dashboard_from_aggregates(load_aggregates(db))
+
+    assert aggregated["advanced_metrics"]["polarity"]["variance"] > 0
+    assert aggregated["correlations"]["rating_sentiment"]["text"] != "Insufficient variance"
+
+
+def test_clear_data_resets_the_aggregates(db):
+    insert_reviews(db, random_reviews(50))
+
+    clear_data(db)
+
+    aggregated = calculate_dashboard_from_aggregates(load_aggregates(db))
+    assert aggregated["stats"]["total"] == 0
+    assert_close(aggregated, calculate_all_stats([]))
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from main import MAX_BATCH_URLS, _collect_urls
+
+
+def test_collect_urls_reads_lines_and_csv_rows():
+    urls = []
+    lines = ["url,name", "", "# comment", '"https://a.example/p/1",Phone', "b.example/p/2",
+             "https://a.example/p/1", "  https://c.example/p/3  "]
+
+    assert _collect_urls(lines, urls)
+    assert urls == ["https://a.example/p/1", "https://b.example/p/2", "https://c.example/p/3"]
+
+
+def test_collect_urls_stops_past_the_limit():
+    read = []
+
+    def lines():
+        for n in range(MAX_BATCH_URLS * 2):
+            read.append(n)
+            yield f"https://shop.example/p/{n}"
+
+    urls = []
+    assert not _collect_urls(lines(), urls)
+    assert len(urls) == len(read) == MAX_BATCH_URLS + 1
+
+
+def test_batch_without_urls_is_rejected(jobs, client):
+    assert client.post("/api/batch", data={"urls": "\n# nothing\n"}).status_code == 400
+
+
+def test_oversized_uploaded_batch_is_rejected(jobs, client):
+    body = "\n".join(f"https://shop.example/p/{n}" for n in range(MAX_BATCH_URLS + 1)).encode("utf-8")
+
+    response = client.post("/api/batch", files={"file": ("urls.txt", body)})
+
+    assert response.status_code == 413
+    assert jobs.list_jobs() == []
+
+
+def test_parked_jobs_count_toward_the_queue_size(jobs, monkeypatch):
+    monkeypatch.setattr(jobs, "SCRAPE_QUEUE_SIZE", 2)
+    monkeypatch.setattr(jobs, "_queue", asyncio.Queue())
+    jobs._parked_by_host["busy.example"].extend(["parked"] * 2)
+
+    with pytest.raises(jobs.JobQueueFullError):
+        asyncio.run(jobs.submit_job("https://other.example/p/1"))
+
+
+def test_batch_streams_every_job_then_a_summary(jobs, client, site):
+    site.add_pages(1)
+    urls = [site.url(product="A"), site.url(product="B")]
+
+    response = client.post("/api/batch", data={"urls": "\n".join(urls + urls[:1])},
+                           files={"file": ("urls.csv", f"url\n{urls[1]},dup\n".encode("utf-8"))})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "batch"
+    assert [job["url"] for job in lines[0]["jobs"]] == urls
+    assert {line["url"] for line in lines[1:-1]} == set(urls)
+    summary = lines[-1]
+    assert summary["type"] == "summary"
+    assert [(r["url"], r["status"], r["saved"]) for r in summary["results"]] == [(url, "completed", 10) for url in urls]
+
+
+def test_batch_reports_urls_over_capacity(jobs, client, site, monkeypatch):
+    monkeypatch.setattr(jobs, "SCRAPE_QUEUE_SIZE", 1)
+    site.add_pages(1)
+    urls = [site.url(product=p) for p in "ABC"]
+
+    lines = [json.loads(line) for line in client.post("/api/batch", data={"urls": "\n".join(urls)}).text.splitlines()]
+
+    assert [r["url"] for r in lines[0]["rejected"]] == urls[1:]
+    assert [r["status"] for r in lines[-1]["results"]] == ["completed", "rejected", "rejected"]
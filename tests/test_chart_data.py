@@ -0,0 +1,57 @@
+import numpy as np
+from conftest import make_review
+
+from configs.database import insert_reviews
+from services.chart_data import (
+    length_by_rating_data,
+    rating_spread_data,
+    review_length_data,
+    sentiment_polarity_data,
+)
+
+REVIEWS = [{"review_text": "x" * (n * 7 % 300 + 1), "rating": float(n % 5 + 1), "polarity": (n % 21 - 10) / 10}
+           for n in range(200)]
+
+
+def test_histograms_count_every_review():
+    lengths = review_length_data(REVIEWS)
+    polarity = sentiment_polarity_data(REVIEWS)
+
+    assert sum(lengths["counts"]) == lengths["total"] == 200
+    assert len(lengths["counts"]) == 20 and len(lengths["edges"]) == 21
+    assert polarity["edges"][0] == -1 and polarity["edges"][-1] == 1
+    assert polarity["counts"] == np.histogram([r["polarity"] for r in REVIEWS], bins=20, range=(-1, 1))[0].tolist()
+
+
+def test_rating_spread_bins_by_star():
+    spread = rating_spread_data(REVIEWS)
+
+    assert spread["counts"] == [40] * 5
+    assert spread["mean"] == 3.0
+    assert len(spread["kde"]["x"]) == 50
+
+
+def test_box_plots_per_star():
+    boxes = length_by_rating_data(REVIEWS + [{"review_text": "y" * 5000, "rating": 1.0}])["boxes"]
+
+    assert [box["star"] for box in boxes] == [1, 2, 3, 4, 5]
+    assert boxes[0]["count"] == 41
+    assert boxes[0]["fliers"] == [5000.0]
+    assert boxes[0]["whislo"] <= boxes[0]["q1"] <= boxes[0]["median"] <= boxes[0]["q3"] <= boxes[0]["whishi"]
+
+
+def test_no_data_is_reported_as_empty():
+    assert review_length_data([]) == {"empty": True}
+    assert rating_spread_data([{"rating": None}]) == {"empty": True}
+    assert length_by_rating_data([{"rating": 9, "review_text": "x"}]) == {"empty": True}
+
+
+def test_chart_endpoint_serves_json_with_an_etag(client, db):
+    insert_reviews(db, [make_review(text=f"review {i}", rating=float(i % 5 + 1)) for i in range(10)])
+
+    response = client.get("/api/charts/rating_spread")
+    assert response.status_code == 200
+    assert response.json()["counts"] == [2] * 5
+
+    assert client.get("/api/charts/rating_spread", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/api/charts/nope").status_code == 404
@@ -0,0 +1,61 @@
+import threading
+
+import configs.database as database
+
+
+def test_pragmas_are_applied(db):
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_closed_connections_are_reused(db):
+    before = database.pool_stats()
+
+    conn = database.get_db()
+    conn.close()
+    again = database.get_db()
+    again.close()
+
+    after = database.pool_stats()
+    assert again is conn
+    assert after["created"] - before["created"] == 1
+    assert after["reused"] - before["reused"] == 1
+    assert after["in_use"] == 1  # the fixture's own connection
+
+
+def test_closing_twice_returns_the_connection_once(db):
+    conn = database.get_db()
+    conn.close()
+    conn.close()
+
+    assert database.pool_stats()["in_use"] == 1
+    assert database.pool_stats()["idle"] == 1
+
+
+def test_released_connections_are_rolled_back(db):
+    conn = database.get_db()
+    conn.execute("INSERT INTO products (product_name) VALUES ('half done')")
+    conn.close()
+
+    assert db.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0
+
+
+def test_connections_are_usable_across_threads(db):
+    results = []
+
+    def count():
+        conn = database.get_db()
+        try:
+            results.append(conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0])
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=count) for _ in range(database.POOL_SIZE + 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [0] * len(threads)
+    assert database.pool_stats()["idle"] <= database.POOL_SIZE
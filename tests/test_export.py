@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import sys
+
+import pytest
+from conftest import make_review
+
+from configs.database import insert_reviews
+from services.review_export import ExportError, export_chunks
+from utils import export_reviews
+
+
+@pytest.fixture
+def reviews(db):
+    insert_reviews(db, [
+        make_review(product_id="P1" if n % 2 else "P2", text=f"review {n}", rating=float(n % 5 + 1),
+                    created_at=f"2026-01-{n + 1:02d} 12:00:00")
+        for n in range(12)
+    ])
+
+
+def export(db, table, fmt, columns=None, **filters):
+    return b"".join(export_chunks(db, table, fmt, columns, **filters))
+
+
+def test_csv_projects_the_chosen_columns_in_batches(db, reviews):
+    rows = list(csv.reader(io.StringIO(export(db, "reviews", "csv", ["rating", "id"], batch_size=5).decode())))
+
+    assert rows[0] == ["rating", "id"]
+    assert [int(r[1]) for r in rows[1:]] == list(range(1, 13))
+
+
+def test_jsonl_applies_the_filters(db, reviews):
+    body = export(db, "reviews", "jsonl", ["product_id", "rating", "created_at"],
+                  product_id="P1", min_rating=3, date_to="2026-01-08")
+
+    rows = [json.loads(line) for line in body.decode().splitlines()]
+    assert rows and all(r["product_id"] == "P1" and r["rating"] >= 3 and r["created_at"] < "2026-01-09" for r in rows)
+    assert set(rows[0]) == {"product_id", "rating", "created_at"}
+
+
+def test_empty_export_still_has_a_header(db):
+    assert export(db, "reviews", "csv", ["id", "rating"]) == b"id,rating\r\n"
+    assert export(db, "reviews", "jsonl") == b""
+
+
+def test_filters_for_other_tables_are_ignored(db, reviews):
+    db.execute("INSERT INTO products (product_id, product_name) VALUES ('P1', 'Phone')")
+    db.commit()
+
+    rows = export(db, "products", "jsonl", ["product_id"], sentiment="Negative").decode().splitlines()
+
+    assert [json.loads(line) for line in rows] == [{"product_id": "P1"}]
+
+
+@pytest.mark.parametrize("table, fmt, columns, message", [
+    ("users", "csv", None, "Unknown table"),
+    ("reviews", "xml", None, "Unknown export format"),
+    ("reviews", "csv", ["rating", "password"], "Unknown reviews columns: password"),
+])
+def test_bad_requests_fail_before_reading(db, table, fmt, columns, message):
+    with pytest.raises(ExportError, match=message):
+        export_chunks(db, table, fmt, columns)
+
+
+def test_api_streams_a_download(client, reviews):
+    response = client.get("/api/export/reviews", params={"format": "jsonl", "columns": "id, sentiment",
+                                                         "product_id": "P2"})
+
+    assert response.headers["content-disposition"] == 'attachment; filename="reviews.jsonl"'
+    assert len(response.text.splitlines()) == 6
+
+
+def test_api_rejects_unknown_columns(client):
+    response = client.get("/api/export/reviews", params={"columns": "id,nope"})
+
+    assert response.status_code == 400
+    assert "nope" in response.json()["error"]
+
+
+def test_cli_writes_the_file(db, reviews, tmp_path, monkeypatch):
+    path = tmp_path / "out.csv"
+    monkeypatch.setattr(sys, "argv", ["export_reviews", str(path), "--columns", "id", "--product-id", "P1"])
+
+    export_reviews.main()
+
+    assert path.read_text().split() == ["id", "2", "4", "6", "8", "10", "12"]
+
+
+def test_cli_exits_non_zero_on_bad_input(db, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["export_reviews", str(tmp_path / "out.xml")])
+
+    with pytest.raises(SystemExit) as exit_info:
+        export_reviews.main()
+
+    assert exit_info.value.code == 1
+    assert "Unknown export format: xml" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_columnar_formats_round_trip(db, reviews, fmt):
+    # A pyarrow built for another NumPy fails with a plain ImportError
+    pa = pytest.importorskip("pyarrow", exc_type=ImportError)
+
+    body = export(db, "reviews", fmt, ["id", "rating", "product_id"], batch_size=5, product_id="P1")
+
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(pa.BufferReader(body))
+    else:
+        table = pa.ipc.open_stream(body).read_all()
+    assert table.column_names == ["id", "rating", "product_id"]
+    assert table.column("id").to_pylist() == [2, 4, 6, 8, 10, 12]
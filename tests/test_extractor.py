@@ -0,0 +1,87 @@
+import pytest
+
+from services import extractor
+from services.extractor import TITLE_STARS_RE, layout_fingerprint
+from services.parser import make_soup
+from services.scraper import parse_review_page
+
+FIXTURE = "data/html_fixtures/review_page.html"
+
+
+@pytest.fixture
+def html(monkeypatch):
+    """The committed review page, with an empty layout cache and fresh stats."""
+    monkeypatch.setattr(extractor, "_layouts", type(extractor._layouts)())
+    monkeypatch.setattr(extractor, "layout_stats", dict.fromkeys(extractor.layout_stats, 0))
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("title, expected", [
+    ("4.0 out of 5 stars Amazing camera", "Amazing camera"),
+    ("5.0 out of 5 stars 5.0 out of 5 stars Love it", "Love it"),
+    ("Amazing camera", "Amazing camera"),
+    ("Rated 4.0 out of 5 stars by me", "Rated 4.0 out of 5 stars by me"),
+])
+def test_star_prefix_is_stripped_from_titles(title, expected):
+    assert TITLE_STARS_RE.sub("", title).strip() == expected
+
+
+def test_fingerprint_follows_the_data_hooks():
+    page = '<div data-hook="review"><a data-hook="review-title"></a></div>'
+
+    assert layout_fingerprint(page, "reviews") == ("reviews", "hooks", "review", "review-title")
+    assert layout_fingerprint(page * 3, "reviews") == layout_fingerprint(page, "reviews")
+    assert layout_fingerprint(page, "product") != layout_fingerprint(page, "reviews")
+    assert layout_fingerprint('<div class="review-title"></div>', "reviews")[:2] == ("reviews", "markers")
+
+
+def test_learned_selectors_are_reused(html):
+    first = parse_review_page(html, "P1")
+    second = parse_review_page(html, "P1")
+
+    assert second == first
+    (plan,) = extractor._layouts.values()
+    assert plan == {"block": "div[data-hook='review']", "title": "[data-hook='review-title']",
+                    "text": "[data-hook='review-body']", "rating": "[data-hook='review-star-rating']",
+                    "next": "li.a-last a"}
+    assert (extractor.layout_stats["misses"], extractor.layout_stats["hits"]) == (1, 1)
+
+
+def test_markup_without_data_hooks_is_learned_separately(html):
+    expected = parse_review_page(html, "P1")
+
+    mutated = parse_review_page(html.replace("data-hook=", "data-x="), "P1")
+
+    assert mutated == expected
+    assert [plan["block"] for plan in extractor._layouts.values()] == ["div[data-hook='review']",
+                                                                       "div.a-section.review"]
+
+
+def test_stale_cached_selectors_fall_back(html):
+    expected = parse_review_page(html, "P1")
+    fingerprint = layout_fingerprint(html, "reviews")
+    extractor._layouts[fingerprint] = {"block": "div.gone", "title": ".gone", "next": ".gone"}
+
+    assert parse_review_page(html, "P1") == expected
+    assert extractor.layout_stats["relearned"] == 1
+    assert extractor._layouts[fingerprint]["block"] == "div[data-hook='review']"
+
+
+def test_stale_field_selector_falls_back(html):
+    expected = parse_review_page(html, "P1")
+    fingerprint = layout_fingerprint(html, "reviews")
+    extractor._layouts[fingerprint] = {**extractor._layouts[fingerprint], "title": ".gone", "rating": ".gone"}
+
+    assert extractor.extract_reviews(make_soup(html), html, "P1") == expected
+
+
+def test_least_recently_used_layouts_are_dropped(html, monkeypatch):
+    monkeypatch.setattr(extractor, "MAX_CACHED_LAYOUTS", 2)
+    extractor._remember("a", {})
+    extractor._remember("b", {})
+    extractor._cached_plan("a")
+
+    extractor._remember("c", {})
+
+    assert list(extractor._layouts) == ["a", "c"]
@@ -0,0 +1,91 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import http_client
+
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    """Installs an AsyncClient on a MockTransport as the shared client.
+
+    Yields a function taking the async request handler.
+    """
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(http_client, "_client", client)
+        return client
+
+    monkeypatch.setattr(http_client, "_host_semaphores", {})
+    return install
+
+
+def test_requests_are_capped_per_host(mock_client):
+    in_flight, peak = {}, {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, text=request.url.path)
+
+    mock_client(handler)
+
+    async def crawl():
+        urls = [f"http://{host}/p/{n}" for host in ("a.example", "b.example") for n in range(10)]
+        try:
+            return await asyncio.gather(*(http_client.fetch(url) for url in urls))
+        finally:
+            await http_client.close_client()
+
+    responses = asyncio.run(crawl())
+
+    assert [r.text for r in responses[:2]] == ["/p/0", "/p/1"]
+    assert peak == {"a.example": http_client.MAX_CONNECTIONS_PER_HOST, "b.example": http_client.MAX_CONNECTIONS_PER_HOST}
+
+
+def test_headers_and_timeouts_are_passed_through(mock_client):
+    seen = []
+
+    async def handler(request):
+        seen.append((request.headers.get("X-Test"), request.extensions["timeout"]["read"]))
+        return httpx.Response(204)
+
+    mock_client(handler)
+
+    async def fetch_twice():
+        try:
+            await http_client.fetch("http://a.example/", headers={"X-Test": "1"})
+            await http_client.fetch("http://a.example/", timeout=2.0)
+        finally:
+            await http_client.close_client()
+
+    asyncio.run(fetch_twice())
+
+    assert [header for header, _ in seen] == ["1", None]
+    assert seen[1][1] == 2.0
+
+
+def test_client_is_shared_until_closed(monkeypatch):
+    monkeypatch.setattr(http_client, "_client", None)
+
+    async def lifecycle():
+        first = http_client.get_client()
+        same = http_client.get_client()
+        http_client._host_semaphore("http://a.example/")
+        await http_client.close_client()
+        closed = first.is_closed
+        semaphores = dict(http_client._host_semaphores)
+        second = http_client.get_client()
+        await http_client.close_client()
+        return first, same, closed, semaphores, second
+
+    first, same, closed, semaphores, second = asyncio.run(lifecycle())
+
+    assert same is first
+    assert closed and semaphores == {}
+    assert second is not first
+    assert http_client._client is None
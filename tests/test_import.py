@@ -0,0 +1,155 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from services.review_import import (
+    ImportFormatError,
+    coerce_review,
+    detect_format,
+    import_file,
+    import_reviews,
+    iter_rows,
+    open_import_file,
+)
+
+
+def row(**fields):
+    return {"product_id": "P1", "review_text": "Works well", **fields}
+
+
+@pytest.mark.parametrize("fields", [
+    {"product_id": ""},
+    {"product_id": None},
+    {"review_text": "   "},
+    {"rating": "five"},
+    {"rating": "0"},
+    {"rating": "6"},
+])
+def test_unusable_rows_are_rejected(fields):
+    assert coerce_review(row(**fields)) is None
+
+
+def test_rows_are_coerced():
+    review = coerce_review(row(rating=" 4 ", sentiment="positive", polarity="0.25", extra="ignored"))
+
+    assert (review["rating"], review["sentiment"], review["polarity"]) == (4.0, "Positive", 0.25)
+    assert "extra" not in review
+    assert coerce_review(row(rating=""))["rating"] is None
+
+
+@pytest.mark.parametrize("name, fmt", [("a.csv", "csv"), ("A.CSV.GZ", "csv"), ("a.jsonl", "jsonl"),
+                                       ("a.ndjson.gz", "jsonl")])
+def test_detect_format(name, fmt):
+    assert detect_format(name) == fmt
+
+
+def test_unknown_format_is_an_error():
+    with pytest.raises(ImportFormatError):
+        detect_format("reviews.xlsx")
+
+
+def test_gzipped_jsonl_is_read():
+    lines = "\n".join(json.dumps(row(review_text=f"r{n}")) for n in range(3)) + "\n\n"
+    stream = open_import_file(io.BytesIO(gzip.compress(lines.encode("utf-8"))), "reviews.jsonl.gz")
+
+    assert [r["review_text"] for r in iter_rows(stream, "jsonl")] == ["r0", "r1", "r2"]
+
+
+def test_bad_json_line_is_an_error():
+    with pytest.raises(ImportFormatError, match="Line 2"):
+        list(iter_rows(io.StringIO('{"a": 1}\n[1]\n'), "jsonl"))
+
+
+def test_import_creates_missing_products_and_counts_invalid_rows(db):
+    rows = [row(product_id="P1", sentiment="Positive", polarity=0.5),
+            row(product_id="P2", review_text="Unscored review"),
+            row(rating="9")]
+
+    result = list(import_reviews(rows, chunk_size=2))[-1]
+
+    assert {k: result[k] for k in ("rows", "inserted", "invalid", "scored", "products")} == \
+        {"rows": 3, "inserted": 2, "invalid": 1, "scored": 1, "products": 2}
+    products = db.execute("SELECT product_id, product_name, product_url FROM products ORDER BY product_id").fetchall()
+    assert [tuple(p) for p in products] == [("P1", "P1", None), ("P2", "P2", None)]
+    # Products already stored are left alone
+    assert list(import_reviews([row(review_text="Another one")]))[-1]["products"] == 0
+
+
+def test_sample_file_creates_its_products(db):
+    result = list(import_file("data/s23_reviews.csv"))[-1]
+
+    stored = db.execute("SELECT COUNT(DISTINCT product_id) FROM reviews").fetchone()[0]
+    assert result["products"] == stored
+    assert db.execute("SELECT COUNT(*) FROM products").fetchone()[0] == stored
+
+
+def test_import_api_streams_progress(client, db):
+    body = "product_id,review_text,rating\n" + "".join(f"P1,Review {n},{n % 5 + 1}\n" for n in range(7))
+
+    response = client.post("/api/import", files={"file": ("reviews.csv", body.encode("utf-8"))})
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert events[-1]["type"] == "completed"
+    assert (events[-1]["inserted"], events[-1]["products"]) == (7, 1)
+    assert db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 7
+
+
+def test_import_api_rejects_unknown_formats(client):
+    response = client.post("/api/import", files={"file": ("reviews.txt", b"x")})
+
+    assert response.status_code == 400
+    assert "Cannot tell the format" in response.json()["error"]
+
+
+def test_refreshing_an_imported_product_is_refused(client, db):
+    list(import_reviews([row()]))
+
+    response = client.post("/api/refresh", params={"product_id": "P1"})
+
+    assert response.status_code == 400
+    assert client.post("/api/refresh").json() == {"jobs": [], "not_queued": []}
+
+
+def write_csv(path, *texts):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("product_id,review_text,rating,created_at\n"
+                    + "".join(f"P1,{text},4,2026-03-02 10:00:00\n" for text in texts))
+    return str(path)
+
+
+def imported(path, **kwargs):
+    result = list(import_file(path, **kwargs))[-1]
+    return result["inserted"], result["skipped"]
+
+
+def test_a_different_file_with_the_same_name_is_imported(db, tmp_path):
+    assert imported(write_csv(tmp_path / "d1" / "reviews.csv", "Monday batch: great battery")) == (1, 0)
+
+    assert imported(write_csv(tmp_path / "d2" / "reviews.csv", "Tuesday batch: screen cracked")) == (1, 0)
+
+
+def test_a_renamed_file_is_not_imported_twice(db, tmp_path):
+    first = write_csv(tmp_path / "reviews.csv", "Good product", "Broke in a week")
+    assert imported(first) == (2, 0)
+
+    renamed = tmp_path / "reviews-copy.csv"
+    renamed.write_bytes((tmp_path / "reviews.csv").read_bytes())
+
+    assert imported(str(renamed)) == (0, 2)
+
+
+def test_identical_rows_in_one_file_are_all_kept(db, tmp_path):
+    path = write_csv(tmp_path / "reviews.csv", "Good product", "Good product", "Good product")
+
+    # Split across chunks too
+    assert imported(path, chunk_size=2) == (3, 0)
+    assert imported(path) == (0, 3)
+
+
+def test_a_cumulative_export_only_adds_the_new_rows(db, tmp_path):
+    imported(write_csv(tmp_path / "monday.csv", "Good product", "Great camera"))
+
+    assert imported(write_csv(tmp_path / "tuesday.csv", "Good product", "Great camera", "Good product")) == (1, 2)
+    assert db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 3
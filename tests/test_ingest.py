@@ -0,0 +1,39 @@
+from conftest import collect, run
+
+from services.ingest import ingest_product
+
+
+def test_ingest_persists_each_page_before_completing(db, site):
+    site.add_pages(3)
+
+    events = run(collect(ingest_product(site.url(), limit=100)))
+
+    persisted = [e for e in events if e.get("stage") == "persist"]
+    assert [e["saved"] for e in persisted] == [10, 20, 30]
+    # Every page is saved before the final event
+    assert events.index(persisted[-1]) < len(events) - 1
+    assert events[-1]["type"] == "completed"
+    assert events[-1]["saved"] == 30
+    assert db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 30
+    product = db.execute("SELECT product_id, product_name FROM products").fetchone()
+    assert product["product_name"] == "Fake Phone"
+    assert db.execute("SELECT COUNT(*) FROM reviews WHERE product_id = ?", (product["product_id"],)).fetchone()[0] == 30
+
+
+def test_ingest_stops_at_the_limit(db, site):
+    site.add_pages(3)
+
+    events = run(collect(ingest_product(site.url(), limit=15)))
+
+    assert events[-1]["type"] == "completed"
+    assert db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 15
+
+
+def test_ingest_skips_a_stored_product(db, site):
+    site.add_pages(1)
+    run(collect(ingest_product(site.url())))
+
+    events = run(collect(ingest_product(site.url())))
+
+    assert events == [{"type": "completed", "message": "Product already exists"}]
+    assert db.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
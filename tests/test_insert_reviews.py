@@ -0,0 +1,55 @@
+from conftest import make_review
+
+from configs.database import get_data_version, insert_reviews, review_fingerprint
+from services.review_import import import_file
+
+
+def count(db):
+    return db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+
+def test_duplicates_in_a_batch_and_in_the_table_are_skipped(db):
+    assert insert_reviews(db, [make_review(text="a"), make_review(text="a"), make_review(text="b")]) == \
+        {"inserted": 2, "skipped": 1, "products": 0}
+
+    assert insert_reviews(db, [make_review(text="b"), make_review(text="c")])["inserted"] == 1
+    assert count(db) == 3
+
+
+def test_identical_text_from_different_reviews_is_kept(db):
+    reviews = [make_review(text="Good product", amazon_review_id="R1AAAAA"),
+               make_review(text="Good product", amazon_review_id="R2BBBBB")]
+
+    assert insert_reviews(db, reviews)["inserted"] == 2
+    assert insert_reviews(db, reviews)["skipped"] == 2
+
+
+def test_same_text_in_another_product_is_a_different_review(db):
+    insert_reviews(db, [make_review(product_id="P1"), make_review(product_id="P2")])
+
+    assert count(db) == 2
+
+
+def test_fingerprint_prefers_the_amazon_id_then_the_source_row():
+    assert review_fingerprint("P1", "t", "x", "R1AAAAA", "f.csv:3") == "P1:amazon:R1AAAAA"
+    assert review_fingerprint("P1", "t", "x", None, "ab12:0") == "P1:row:ab12:0"
+    assert review_fingerprint("P1", "t", "x") == review_fingerprint("P1", "t", "x")
+    assert review_fingerprint("P1", "t", "x") != review_fingerprint("P1", "t", "y")
+
+
+def test_inserting_bumps_the_data_versions(db):
+    insert_reviews(db, [make_review(product_id="P1")])
+
+    assert get_data_version(db) == 1
+    assert get_data_version(db, "P1") == 1
+    assert get_data_version(db, "P2") == 0
+
+
+def test_sample_file_imports_every_review_once(db):
+    result = list(import_file("data/s23_reviews.csv"))[-1]
+    assert (result["rows"], result["inserted"], result["skipped"]) == (100, 100, 0)
+    assert count(db) == 100
+
+    again = list(import_file("data/s23_reviews.csv"))[-1]
+    assert (again["inserted"], again["skipped"]) == (0, 100)
+    assert count(db) == 100
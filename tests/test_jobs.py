@@ -0,0 +1,142 @@
+from conftest import collect, run
+
+
+def test_submitting_an_active_url_joins_its_job(jobs, site):
+    async def submit_twice():
+        jobs.start_job_workers()
+        try:
+            first = await jobs.submit_job(site.url())
+            second = await jobs.submit_job(site.url())
+        finally:
+            await jobs.stop_job_workers()
+        return first, second
+
+    (job_id, coalesced), (again, joined) = run(submit_twice())
+
+    assert again == job_id
+    assert (coalesced, joined) == (False, True)
+    assert len(jobs.list_jobs()) == 1
+
+
+def test_job_runs_to_completion(jobs, site, db):
+    site.add_pages(2)
+
+    async def scrape():
+        jobs.start_job_workers()
+        try:
+            job_id, _ = await jobs.submit_job(site.url())
+            return job_id, await collect(jobs.job_events(job_id))
+        finally:
+            await jobs.stop_job_workers()
+
+    job_id, events = run(scrape())
+
+    assert events[0]["stage"] == "queued"
+    assert events[-1] == {"type": "job", "job_id": job_id, "status": "completed"}
+    state = jobs.get_job(job_id)
+    assert (state["status"], state["saved"]) == ("completed", 20)
+    assert state["started_at"] and state["finished_at"]
+    assert db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 20
+    # Finished jobs no longer hold their URL
+    assert site.url() not in jobs._active_by_url
+
+
+def test_finished_job_events_come_from_its_row(jobs, db):
+    db.execute("INSERT INTO scrape_jobs (id, url, status, message, saved) VALUES ('old', 'u', 'failed', 'boom', 3)")
+    db.commit()
+
+    events = run(collect(jobs.job_events("old")))
+
+    assert events[0]["type"] == "error" and events[0]["saved"] == 3
+    assert events[-1] == {"type": "job", "job_id": "old", "status": "failed"}
+    assert run(collect(jobs.job_events("missing"))) == [{"type": "error", "message": "Unknown job"}]
+
+
+def test_restart_requeues_what_fits_and_fails_the_rest(jobs, db, monkeypatch):
+    monkeypatch.setattr(jobs, "SCRAPE_QUEUE_SIZE", 2)
+    db.executemany("INSERT INTO scrape_jobs (id, url, status, created_at) VALUES (?, ?, ?, ?)", [
+        ("running", "u0", "running", "2026-01-01 00:00:00"),
+        ("q1", "u1", "queued", "2026-01-01 00:00:01"),
+        ("q2", "u2", "queued", "2026-01-01 00:00:02"),
+        ("q3", "u3", "queued", "2026-01-01 00:00:03"),
+    ])
+    db.commit()
+
+    async def restart():
+        jobs.start_job_workers()
+        queued = jobs._queue.qsize()
+        # Keep the resumed jobs from running
+        for task in jobs._workers:
+            task.cancel()
+        await jobs.stop_job_workers()
+        return queued
+
+    assert run(restart()) == 2
+    assert set(jobs._active_by_url) == {"u1", "u2"}
+    rows = {row["id"]: row for row in map(dict, db.execute("SELECT * FROM scrape_jobs"))}
+    assert rows["running"]["message"] == "Interrupted by a restart"
+    assert (rows["q3"]["status"], rows["q3"]["message"]) == ("failed", "Dropped on restart: job queue full")
+    assert rows["q1"]["status"] == rows["q2"]["status"] == "queued"
+
+
+def test_jobs_beyond_the_host_limit_wait_their_turn(jobs, site, monkeypatch):
+    monkeypatch.setattr(jobs, "SCRAPE_CONCURRENCY", 3)
+    monkeypatch.setattr(jobs, "SCRAPE_JOBS_PER_HOST", 1)
+    site.add_pages(1)
+    running = []
+    run_job = jobs._run
+
+    async def recording(job):
+        running.append(sum(jobs._running_by_host.values()))
+        await run_job(job)
+
+    monkeypatch.setattr(jobs, "_run", recording)
+
+    async def scrape():
+        jobs.start_job_workers()
+        try:
+            ids = [job_id for job_id, _ in await jobs.submit_jobs([site.url(product=f"P{i}") for i in range(3)])]
+            for job_id in ids:
+                await collect(jobs.job_events(job_id))
+            return ids
+        finally:
+            await jobs.stop_job_workers()
+
+    ids = run(scrape())
+
+    assert running == [1, 1, 1]
+    assert [jobs.get_job(job_id)["status"] for job_id in ids] == ["completed"] * 3
+
+
+def test_a_batch_is_written_in_one_transaction(jobs, db, monkeypatch):
+    monkeypatch.setattr(jobs, "SCRAPE_QUEUE_SIZE", 3)
+    writes = []
+    insert_jobs = jobs._insert_jobs
+
+    def recording(rows):
+        writes.append([url for _, url, _ in rows])
+        return insert_jobs(rows)
+
+    monkeypatch.setattr(jobs, "_insert_jobs", recording)
+
+    async def submit():
+        jobs.start_job_workers()
+        # Another process starts scraping u2
+        db.execute("INSERT INTO scrape_jobs (id, url, status) VALUES ('elsewhere', 'u2', 'running')")
+        db.commit()
+        try:
+            return await jobs.submit_jobs(["u1", "u2", "u1", "u3", "u4"])
+        finally:
+            for task in jobs._workers:
+                task.cancel()
+            await jobs.stop_job_workers()
+
+    results = run(submit())
+
+    assert writes == [["u1", "u2", "u3"]]
+    # u2 is scraped by another process; u4 no longer fits in the queue
+    assert results[1] == ("elsewhere", True)
+    assert results[2] == (results[0][0], True)
+    assert results[4] is None
+    assert sorted(job["url"] for job in jobs.list_jobs() if job["status"] == "queued") == ["u1", "u3"]
+    assert "u2" not in jobs._active_by_url
@@ -0,0 +1,88 @@
+import sqlite3
+
+import configs.database as database
+from configs.aggregates import load_aggregates
+from configs.database import MIGRATIONS, migrate, schema_version
+
+LATEST = MIGRATIONS[-1][0]
+
+# The schema as init_db created it before migrations existed
+LEGACY_SCHEMA = [
+    """
+    CREATE TABLE products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id TEXT DEFAULT (lower(hex(randomblob(8)))) UNIQUE,
+        product_name TEXT,
+        product_url TEXT UNIQUE,
+        product_image TEXT,
+        product_price TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE reviews (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id TEXT,
+        review_title TEXT,
+        review_text TEXT,
+        rating REAL,
+        sentiment TEXT,
+        polarity REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (product_id) REFERENCES products (product_id)
+    )
+    """,
+]
+
+
+def test_versions_are_increasing():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == list(range(1, LATEST + 1))
+
+
+def test_fresh_database_reaches_the_latest_version(db):
+    assert schema_version(db.cursor()) == LATEST
+    indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_reviews_product_id", "idx_reviews_fingerprint", "idx_reviews_rating",
+            "idx_reviews_created_at", "idx_scrape_jobs_active_url"} <= indexes
+
+
+def test_migrating_twice_is_a_no_op(db):
+    applied = db.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0]
+
+    assert migrate(db) == LATEST
+    assert db.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == applied
+
+
+def test_legacy_database_is_upgraded_in_place(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    legacy = sqlite3.connect(path)
+    for statement in LEGACY_SCHEMA:
+        legacy.execute(statement)
+    legacy.execute("INSERT INTO products (product_id, product_name) VALUES ('P1', 'Phone')")
+    rows = [("P1", "Good", "Nice phone", 5.0, "Positive", 0.6),
+            ("P1", "Good", "Nice phone", 5.0, "Positive", 0.6),  # an old duplicate
+            ("P1", "Bad", "Broke quickly", 1.0, "Negative", -0.7)]
+    legacy.executemany(
+        "INSERT INTO reviews (product_id, review_title, review_text, rating, sentiment, polarity) VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    legacy.commit()
+    legacy.close()
+
+    monkeypatch.setattr(database, "DB_NAME", path)
+    try:
+        database.init_db()
+        conn = database.get_db()
+        try:
+            assert schema_version(conn.cursor()) == LATEST
+            assert conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0] == 3
+            fingerprints = [row[0] for row in conn.execute("SELECT review_fingerprint FROM reviews ORDER BY id")]
+            # Only the first copy of the duplicate is fingerprinted
+            assert fingerprints[0] and fingerprints[2] and fingerprints[1] is None
+            totals = load_aggregates(conn, "P1")["totals"]
+            assert (totals["total"], totals["positive"], totals["negative"]) == (3, 2, 1)
+        finally:
+            conn.close()
+    finally:
+        database.close_pool()
@@ -0,0 +1,93 @@
+import httpx
+import pytest
+from conftest import run
+
+from services import page_cache
+from services.scraper import fetch_page
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """An empty, enabled page cache in a temp directory."""
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(page_cache, "_total_bytes", None)
+    monkeypatch.setattr(page_cache, "counters", dict.fromkeys(page_cache.counters, 0))
+    return page_cache
+
+
+def response(url, body, etag='"v1"'):
+    return httpx.Response(200, headers={"ETag": etag, "Content-Type": "text/html"}, content=body,
+                          request=httpx.Request("GET", url))
+
+
+def test_normalize_url():
+    assert page_cache.normalize_url("HTTP://Example.COM?b=2&a=1#reviews") == "http://example.com/?a=1&b=2"
+    assert page_cache.normalize_url("http://x/p?q=") == "http://x/p?q="
+
+
+def test_store_and_load_round_trip(cache):
+    cache.store("http://x/p?b=2&a=1", response("http://x/p", b"<html>hi</html>"))
+
+    entry = cache.load("http://X/p?a=1&b=2")
+
+    assert entry.body == b"<html>hi</html>"
+    assert entry.age < 5
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert entry.to_response().text == "<html>hi</html>"
+    assert cache.load("http://x/other") is None
+
+
+def test_overwrites_keep_the_byte_total_exact(cache):
+    for n in range(5):
+        cache.store("http://x/p", response("http://x/p", b"x" * 1000 * n + bytes(range(256)) * n))
+        cache.store(f"http://x/{n}", response("http://x/p", b"page"))
+    entry = cache.load("http://x/p")
+    cache.touch(entry)
+
+    assert cache.page_cache_stats()["bytes"] == cache._scan_total()
+    assert cache.counters["stored"] == 10
+
+
+def test_least_recently_used_pages_are_evicted(cache, monkeypatch):
+    cache.store("http://x/0", response("http://x/0", b"seed"))
+    monkeypatch.setattr(cache, "PAGE_CACHE_MAX_BYTES", cache._scan_total() * 3)
+
+    for n in range(1, 6):
+        cache.store(f"http://x/{n}", response(f"http://x/{n}", b"seed"))
+
+    assert cache.counters["evicted"] > 0
+    assert cache.load("http://x/0") is None
+    assert cache.load("http://x/5") is not None
+    assert cache._total_bytes == cache._scan_total() <= cache.PAGE_CACHE_MAX_BYTES
+
+
+def test_fresh_pages_are_served_without_a_request(cache, site):
+    site.add_pages(1)
+
+    first = run(fetch_page(site.url(), {}))
+    second = run(fetch_page(site.url(), {}))
+
+    assert second.text == first.text
+    assert len(site.requests) == 1
+    assert (cache.counters["misses"], cache.counters["hits"]) == (1, 1)
+
+
+@pytest.mark.parametrize("ttl, revalidate", [(0, False), (3600, True)])
+def test_stale_or_revalidated_pages_send_their_etag(cache, site, monkeypatch, ttl, revalidate):
+    monkeypatch.setattr(cache, "PAGE_CACHE_TTL", ttl)
+    site.add_pages(1)
+    first = run(fetch_page(site.url(), {}))
+
+    again = run(fetch_page(site.url(), {}, revalidate=revalidate))
+
+    assert again.status_code == 200 and again.text == first.text
+    assert site.requests[1][1] == first.headers["etag"]
+    assert cache.counters["revalidated"] == 1
+
+
+def test_offline_misses_fail_without_a_request(cache, site, monkeypatch):
+    monkeypatch.setattr(cache, "OFFLINE", True)
+
+    assert run(fetch_page(site.url(), {})).status_code == 504
+    assert site.requests == []
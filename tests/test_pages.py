@@ -0,0 +1,98 @@
+import html
+import re
+
+import pytest
+from conftest import make_review
+
+from configs.database import insert_reviews
+from services.review_queries import decode_cursor, encode_cursor, product_listing, review_listing
+
+TITLE = re.compile(r"<h4>(T\d+)</h4>")
+NEXT = re.compile(r'<a href="([^"]+)" class="btn-primary">Next page</a>')
+
+
+def seed(db, n=25):
+    """Ratings cycle 1-5, so every rating is shared by several reviews."""
+    insert_reviews(db, [make_review(text=f"review {i}", review_title=f"T{i}", rating=float(i % 5 + 1))
+                        for i in range(n)])
+
+
+def all_pages(listing, **kwargs):
+    rows, cursor = [], None
+    while True:
+        page = listing(cursor=cursor, **kwargs)
+        rows.extend(dict(row) for row in page)
+        cursor = page.next_cursor
+        if cursor is None:
+            return rows
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([4.0, 17])) == [4.0, 17]
+
+
+@pytest.mark.parametrize("cursor", [None, "", "not base64!", encode_cursor({"a": 1}), encode_cursor([1, 2, 3])])
+def test_invalid_cursor_decodes_to_none(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.mark.parametrize("sort, key", [
+    ("newest", lambda r: -r["id"]),
+    ("oldest", lambda r: r["id"]),
+    ("rating_high", lambda r: (-r["rating"], -r["id"])),
+    ("rating_low", lambda r: (r["rating"], r["id"])),
+])
+def test_review_sorts_page_through_ties(db, sort, key):
+    seed(db)
+
+    rows = all_pages(lambda **kw: review_listing(db, **kw), sort=sort, limit=4)
+
+    assert len(rows) == 25
+    assert rows == sorted(rows, key=key)
+
+
+def test_product_listing_filters_by_name(db):
+    db.executemany("INSERT INTO products (product_id, product_name) VALUES (?, ?)",
+                   [(f"P{i}", f"{'Phone' if i % 2 else 'Case'} {i}") for i in range(9)])
+    db.commit()
+
+    rows = all_pages(lambda **kw: product_listing(db, **kw), sort="name", limit=2, q="Phone")
+
+    assert [r["product_name"] for r in rows] == ["Phone 1", "Phone 3", "Phone 5", "Phone 7"]
+
+
+def test_reviews_page_follows_next_links(client, db):
+    seed(db, 70)
+
+    titles, url = [], "/reviews?sort=rating_low"
+    while url:
+        body = client.get(url).text
+        titles.extend(TITLE.findall(body))
+        link = NEXT.search(body)
+        url = html.unescape(link.group(1)) if link else None
+
+    assert len(titles) == len(set(titles)) == 70
+
+
+def test_invalid_cursor_shows_the_first_page(client, db):
+    seed(db, 5)
+
+    body = client.get("/reviews", params={"cursor": "garbage"}).text
+
+    assert TITLE.findall(body) == ["T4", "T3", "T2", "T1", "T0"]
+    assert not NEXT.search(body)
+
+
+def test_products_page_follows_next_links(client, db):
+    db.executemany("INSERT INTO products (product_id, product_name) VALUES (?, ?)",
+                   [(f"P{i:02}", f"Phone {i:02}") for i in range(45)])
+    db.commit()
+
+    names, url = [], "/products?sort=name"
+    while url:
+        body = client.get(url).text
+        names.extend(re.findall(r"<h3>(Phone \d+)</h3>", body))
+        link = NEXT.search(body)
+        url = html.unescape(link.group(1)) if link else None
+
+    assert names == [f"Phone {i:02}" for i in range(45)]
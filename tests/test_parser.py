@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from services import extractor, parser
+from services.parser import BACKENDS, available_backends, make_soup, run_parser, shutdown_parser_pool
+from services.scraper import parse_review_page
+
+FIXTURE = "data/html_fixtures/review_page.html"
+
+
+@pytest.fixture
+def html(monkeypatch):
+    """The committed review page, with an empty layout cache."""
+    monkeypatch.setattr(extractor, "_layouts", type(extractor._layouts)())
+    with open(FIXTURE, encoding="utf-8") as f:
+        return f.read()
+
+
+def parse_with(backend, html, monkeypatch):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} is not installed")
+    monkeypatch.setattr(parser, "DEFAULT_BACKEND", backend)
+    return parse_review_page(html, "P1")
+
+
+def test_fixture_page_is_extracted(html):
+    page = parse_review_page(html, "P1")
+
+    assert page["block_count"] == len(page["reviews"]) == 10
+    assert page["reviews"][0] == {
+        "product_id": "P1",
+        "review_title": "Amazing camera",
+        "review_text": "Build quality feels very premium in hand. Build quality feels very premium in hand. "
+                       "Overall amazing camera.",
+        "rating": 4.0,
+        "amazon_review_id": "R1000XYZ",
+    }
+    assert page["next_url"].endswith("pageNumber=2")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_backends_extract_the_same_reviews(html, monkeypatch, backend):
+    expected = parse_with("html.parser", html, monkeypatch)
+    extractor._layouts.clear()
+
+    assert parse_with(backend, html, monkeypatch) == expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_get_text_matches_beautifulsoup(backend):
+    if backend not in available_backends():
+        pytest.skip(f"{backend} is not installed")
+    html = "<div id='r'><p> Great <b>phone</b> </p>\n<p>\n  really  </p></div>"
+
+    node = make_soup(html, backend).select_one("#r")
+    reference = make_soup(html, "html.parser").select_one("#r")
+
+    assert node.get_text(" ", strip=True) == reference.get_text(" ", strip=True) == "Great phone really"
+    assert node.get("id") == node["id"] == "r"
+    assert node.get("missing", "-") == "-"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown parser backend"):
+        make_soup("<p></p>", "regex")
+
+
+def test_worker_processes_parse_like_the_event_loop_thread(html, monkeypatch):
+    expected = parse_review_page(html, "P1")
+    monkeypatch.setattr(parser, "PARSE_WORKERS", 1)
+
+    try:
+        page = asyncio.run(run_parser(parse_review_page, html, "P1"))
+        assert parser._pool is not None
+    finally:
+        shutdown_parser_pool()
+
+    assert page == expected
@@ -0,0 +1,69 @@
+from conftest import make_review
+
+from configs.database import insert_reviews
+from services import plot_cache
+from services.plot_cache import etag_matches, plot_etag, plot_key
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def test_etag_depends_on_the_whole_key():
+    key = plot_key("review_length", ("*", None, None), 3, "default")
+
+    assert plot_etag(key) == plot_etag(plot_key("review_length", ("*", None, None), 3, "default"))
+    assert plot_etag(key) != plot_etag(plot_key("review_length", ("*", None, None), 4, "default"))
+    assert plot_etag(key) != plot_etag(plot_key("review_length", ("*", None, None), 3, "large"))
+
+
+def test_etag_matching():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches('W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    monkeypatch.setattr(plot_cache, "PLOT_CACHE_ENTRIES", 2)
+    plot_cache.clear_plot_cache()
+    plot_cache.put_cached("a", b"1")
+    plot_cache.put_cached("b", b"2")
+    plot_cache.get_cached("a")
+    plot_cache.put_cached("c", b"3")
+
+    assert plot_cache.get_cached("b") is None
+    assert plot_cache.get_cached("a") == b"1"
+    assert plot_cache.plot_cache_stats()["entries"] == 2
+    plot_cache.clear_plot_cache()
+
+
+def test_plots_are_revalidated_with_their_etag(client, db):
+    insert_reviews(db, [make_review(text="short"), make_review(text="a much longer review text", rating=2.0)])
+
+    first = client.get("/plots/review_length")
+    assert first.status_code == 200
+    assert first.content.startswith(PNG_MAGIC)
+    assert first.headers["cache-control"] == plot_cache.REVALIDATE_CACHE_CONTROL
+
+    again = client.get("/plots/review_length", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_new_reviews_change_the_etag(client, db):
+    insert_reviews(db, [make_review(text="one")])
+    before = client.get("/plots/review_length").headers["etag"]
+
+    insert_reviews(db, [make_review(text="two")])
+    after = client.get("/plots/review_length", headers={"If-None-Match": before})
+
+    assert after.status_code == 200
+    assert after.headers["etag"] != before
+
+
+def test_versioned_urls_are_immutable(client, db):
+    insert_reviews(db, [make_review()])
+
+    response = client.get("/plots/rating_spread", params={"v": "1"})
+
+    assert response.headers["cache-control"] == plot_cache.IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,125 @@
+import asyncio
+import types
+
+import httpx
+import pytest
+
+from services import http_client, page_cache, rate_limiter
+from services.rate_limiter import BACKOFF_BASE, BACKOFF_MAX, TokenBucket, get_limiter
+from services.scraper import fetch_page
+
+
+class Clock:
+    """Stands in for time.monotonic and asyncio.sleep; sleeping advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(rate_limiter, "time", types.SimpleNamespace(monotonic=fake.monotonic))
+    monkeypatch.setattr(rate_limiter, "asyncio", types.SimpleNamespace(Lock=asyncio.Lock, sleep=fake.sleep))
+    monkeypatch.setattr(rate_limiter, "JITTER", 0)
+    return fake
+
+
+def acquire(bucket, times=1):
+    async def go():
+        for _ in range(times):
+            await bucket.acquire()
+    asyncio.run(go())
+
+
+def test_burst_is_served_without_waiting(clock):
+    bucket = TokenBucket(rate=0.5, burst=3)
+
+    acquire(bucket, 3)
+
+    assert clock.sleeps == []
+    assert bucket.tokens == 0
+
+
+def test_requests_past_the_burst_wait_for_the_refill(clock):
+    bucket = TokenBucket(rate=0.5, burst=2)
+
+    acquire(bucket, 4)
+
+    assert clock.sleeps == [2.0, 2.0]
+    assert clock.now == 1004.0
+
+
+def test_idle_time_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    acquire(bucket, 2)
+
+    clock.now += 1.5
+    acquire(bucket)
+    assert clock.sleeps == []
+    assert bucket.tokens == pytest.approx(0.5)
+
+    clock.now += 60
+    acquire(bucket, 2)
+    assert clock.sleeps == []
+
+
+def test_backoff_doubles_up_to_the_maximum(clock):
+    bucket = TokenBucket()
+
+    delays = [bucket.penalize() for _ in range(8)]
+
+    assert delays[:3] == [BACKOFF_BASE, BACKOFF_BASE * 2, BACKOFF_BASE * 4]
+    assert delays[-1] == BACKOFF_MAX
+    bucket.reward()
+    assert bucket.penalize() == BACKOFF_BASE
+
+
+def test_requests_wait_out_the_backoff(clock):
+    bucket = TokenBucket(rate=0.125, burst=5)
+    bucket.penalize()
+
+    acquire(bucket)
+
+    # Blocked for the backoff (refilling 0.625 tokens), then the rest of a token
+    assert clock.sleeps == [BACKOFF_BASE, 3.0]
+    assert clock.now == 1000.0 + BACKOFF_BASE + 3.0
+
+
+def test_limiters_are_shared_per_host(monkeypatch):
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+
+    first = get_limiter("https://Shop.example/a")
+
+    assert get_limiter("https://shop.example/b?page=2") is first
+    assert get_limiter("https://other.example/a") is not first
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_throttled_fetches_back_off_and_retry(clock, monkeypatch, status):
+    statuses = [status, status, 200]
+    limiter = TokenBucket(rate=1, burst=5)
+    monkeypatch.setattr(rate_limiter, "_limiters", {"shop.example": limiter})
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(http_client, "_host_semaphores", {})
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(statuses.pop(0), text="page"))))
+
+    async def fetch():
+        try:
+            return await fetch_page("https://shop.example/p", {})
+        finally:
+            await http_client.close_client()
+
+    assert asyncio.run(fetch()).status_code == 200
+    # Two backoffs, the second twice as long; the success resets it
+    assert clock.sleeps[:2] == [BACKOFF_BASE, BACKOFF_BASE * 2]
+    assert limiter.backoff == 0
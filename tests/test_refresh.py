@@ -0,0 +1,88 @@
+import json
+
+import pytest
+from conftest import collect, run
+
+from services import page_cache
+from services.ingest import ingest_product
+
+
+def post(site, *reviews, per_page=10):
+    """Put `reviews` in front of the site's newest-first listing."""
+    listing = list(reviews) + [review for n in sorted(site.pages) for review in site.pages[n]]
+    site.pages = {n // per_page + 1: listing[n:n + per_page] for n in range(0, len(listing), per_page)}
+
+
+def refresh(site):
+    return run(collect(ingest_product(site.url(), refresh=True)))[-1]
+
+
+@pytest.fixture
+def stored(db, site):
+    """The site's product, scraped with 25 reviews."""
+    site.add_pages(3)
+    site.pages[3] = site.pages[3][:5]
+    run(collect(ingest_product(site.url())))
+    site.requests.clear()
+    return site
+
+
+def count(db):
+    return db.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+
+def test_refresh_stops_at_the_first_stored_review(db, stored):
+    post(stored, *[(f"N{i}", f"New {i}", f"Brand new review {i}", 5) for i in range(3)])
+
+    result = refresh(stored)
+
+    assert (result["message"], result["saved"]) == ("Refreshed: 3 new reviews", 3)
+    assert count(db) == 28
+    # Only the first review page was needed
+    assert [path for path, _ in stored.requests if "sortBy=recent" in path] == ["/item/X?sortBy=recent"]
+
+
+def test_new_review_with_stored_text_does_not_end_the_refresh(db, stored):
+    _, title, text, stars = stored.pages[1][0]
+    post(stored, ("N1", "Fresh", "Another fresh review", 4), ("N2", title, text, stars))
+
+    assert refresh(stored)["saved"] == 2
+    assert db.execute("SELECT COUNT(*) FROM reviews WHERE review_text = ?", (text,)).fetchone()[0] == 2
+
+
+def test_refresh_with_nothing_new(db, stored):
+    result = refresh(stored)
+
+    assert (result["type"], result["message"], result["saved"]) == ("completed", "Already up to date", 0)
+    assert count(db) == 25
+
+
+def test_refresh_revalidates_a_fresh_cached_page(db, stored, tmp_path, monkeypatch):
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_DIR", str(tmp_path / "pages"))
+    monkeypatch.setattr(page_cache, "PAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(page_cache, "_total_bytes", None)
+    monkeypatch.setattr(page_cache, "counters", dict.fromkeys(page_cache.counters, 0))
+    refresh(stored)
+    post(stored, ("N1", "Fresh", "Posted since the last refresh", 5))
+
+    result = refresh(stored)
+
+    assert result["saved"] == 1
+    # The second refresh asked the site instead of trusting the cached page
+    recent = [etag for path, etag in stored.requests if "sortBy=recent" in path]
+    assert len(recent) == 2 and recent[1] is not None
+    # Unchanged since: answered 304 from the cached copy
+    assert refresh(stored)["message"] == "Already up to date"
+    assert page_cache.counters["revalidated"] == 1
+
+
+def test_refresh_api_queues_a_job_per_product(jobs, client, db, stored):
+    product_id = db.execute("SELECT product_id FROM products").fetchone()[0]
+
+    queued = client.post("/api/refresh", params={"product_id": product_id}).json()["jobs"]
+
+    assert [job["url"] for job in queued] == [stored.url()]
+    events = [json.loads(line) for line in client.get(f"/api/jobs/{queued[0]['job_id']}/stream").text.splitlines()]
+    assert events[-1]["status"] == "completed"
+    assert jobs.get_job(queued[0]["job_id"])["message"] == "Already up to date"
+    assert client.post("/api/refresh", params={"product_id": "nope"}).status_code == 404
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from services import render
+from services.render import RenderBusyError, RenderTimeoutError, render_plot
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+REVIEWS = [{"review_text": "x" * n, "rating": n % 5 + 1.0, "polarity": (n % 7 - 3) / 3} for n in range(1, 60)]
+
+
+@pytest.fixture
+def worker_pool(monkeypatch):
+    monkeypatch.setattr(render, "RENDER_WORKERS", 1)
+    yield
+    render.shutdown_render_pool()
+
+
+@pytest.mark.parametrize("plot", ["review_length", "sentiment_polarity", "length_by_rating", "rating_spread"])
+def test_every_plot_renders_a_png(plot):
+    assert render_plot(plot, REVIEWS, (4, 3)).startswith(PNG_MAGIC)
+
+
+def test_worker_pool_renders_the_same_image(worker_pool):
+    png = render_plot("review_length", REVIEWS, (4, 3), timeout=60)
+
+    assert png == render.render_png("review_length", REVIEWS, (4, 3))
+
+
+def test_a_full_backlog_is_refused(monkeypatch):
+    monkeypatch.setattr(render, "_slots", threading.BoundedSemaphore(1))
+    render._slots.acquire()
+
+    with pytest.raises(RenderBusyError):
+        render_plot("review_length", REVIEWS, (4, 3))
+
+
+def test_slow_renders_time_out(worker_pool):
+    # The first job also waits for the worker to start up
+    with pytest.raises(RenderTimeoutError):
+        render_plot("review_length", REVIEWS, (4, 3), timeout=0.001)
@@ -0,0 +1,69 @@
+import json
+
+from conftest import make_review
+
+from configs.database import insert_reviews
+from services.review_queries import fetch_review_page
+
+
+def seed(db, n=25):
+    """P1 gets the odd reviews, P2 the even ones; ratings cycle 1-5."""
+    insert_reviews(db, [
+        make_review(product_id="P1" if i % 2 else "P2", text=f"review {i}", rating=float(i % 5 + 1),
+                    sentiment="Positive" if i % 3 else "Negative")
+        for i in range(n)
+    ])
+
+
+def test_keyset_pages_cover_every_review_once(db):
+    seed(db)
+    seen, after = [], None
+    while True:
+        page = fetch_review_page(db, limit=7, after=after)
+        seen.extend(review["id"] for review in page["reviews"])
+        after = page["next_after"]
+        if after is None:
+            break
+
+    assert seen == sorted(seen)
+    assert len(seen) == len(set(seen)) == 25
+
+
+def test_rows_added_while_paging_do_not_shift_pages(db):
+    seed(db, 10)
+    first = fetch_review_page(db, limit=5)
+    insert_reviews(db, [make_review(text="late arrival")])
+
+    second = fetch_review_page(db, limit=5, after=first["next_after"])
+
+    assert second["reviews"][0]["id"] == first["reviews"][-1]["id"] + 1
+    assert second["next_after"] is not None
+
+
+def test_paginated_api_applies_filters(client, db):
+    seed(db)
+
+    page = client.get("/api/reviews", params={"limit": 5, "product_id": "P1", "sentiment": "negative"}).json()
+
+    assert page["reviews"]
+    assert all(r["product_id"] == "P1" and r["sentiment"] == "Negative" for r in page["reviews"])
+
+
+def test_unpaginated_api_streams_a_json_list(client, db):
+    seed(db)
+
+    reviews = client.get("/api/reviews", params={"min_rating": 4}).json()
+
+    assert len(reviews) == 10
+    assert all(r["rating"] >= 4 for r in reviews)
+
+
+def test_ndjson_stream(client, db):
+    seed(db)
+
+    response = client.get("/api/reviews/stream", params={"product_id": "P2"})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == 13
+    assert {r["product_id"] for r in lines} == {"P2"}
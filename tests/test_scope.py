@@ -0,0 +1,60 @@
+import re
+
+import pytest
+from conftest import make_review
+
+from configs.database import get_data_version, insert_reviews
+from services.stats_sql import calculate_dashboard_sql
+
+STAT = re.compile(r'<div class="stat-value">([^<]+)</div>')
+
+
+@pytest.fixture
+def reviews(db):
+    """P1 has one review a day from Jan 1 to Jan 5, alternating 5 and 1 stars; P2 has two more."""
+    rows = [make_review(text=f"p1 {day}", created_at=f"2026-01-0{day} 18:30:00",
+                        **({} if day % 2 else {"rating": 1.0, "sentiment": "Negative", "polarity": -0.5}))
+            for day in range(1, 6)]
+    rows += [make_review(product_id="P2", text=f"p2 {day}", created_at=f"2026-01-0{day} 09:00:00") for day in (2, 3)]
+    insert_reviews(db, rows)
+    return rows
+
+
+def test_date_range_is_inclusive(db, reviews):
+    stats = calculate_dashboard_sql(db, date_from="2026-01-02", date_to="2026-01-03")["stats"]
+
+    assert stats["total"] == 4
+
+
+def test_product_and_date_range_combine(db, reviews):
+    stats = calculate_dashboard_sql(db, product_id="P1", date_from="2026-01-03")["stats"]
+
+    assert (stats["total"], stats["positive"], stats["negative"]) == (3, 2, 1)
+
+
+@pytest.mark.parametrize("params, totals", [
+    ({}, ["7", "5", "0", "2"]),
+    ({"product_id": "P1"}, ["5", "3", "0", "2"]),
+    ({"product_id": "P2"}, ["2", "2", "0", "0"]),
+    ({"product_id": "P1", "date_from": "2026-01-02", "date_to": "2026-01-02"}, ["1", "0", "0", "1"]),
+])
+def test_dashboard_shows_the_scoped_totals(client, reviews, params, totals):
+    body = client.get("/dashboard", params=params).text
+
+    assert STAT.findall(body)[:4] == totals
+
+
+def test_dashboard_plots_carry_the_scope(client, db, reviews):
+    body = client.get("/dashboard", params={"product_id": "P2", "date_to": "2026-01-02"}).text
+
+    version = get_data_version(db, "P2")
+    assert f'src="/plots/rating_spread?v={version}&amp;product_id=P2&amp;date_to=2026-01-02"' in body
+
+
+def test_chart_data_reads_only_the_rows_in_scope(client, reviews):
+    everything = client.get("/api/charts/rating_spread").json()
+    scoped = client.get("/api/charts/rating_spread", params={"product_id": "P1", "date_to": "2026-01-02"}).json()
+
+    assert sum(everything["counts"]) == 7
+    assert scoped["counts"] == [1, 0, 0, 0, 1]
+    assert client.get("/api/charts/rating_spread", params={"date_from": "2027-01-01"}).json() == {"empty": True}
@@ -0,0 +1,103 @@
+import pytest
+
+from services import sentiment
+from services.sentiment import FALLBACK_SCORE, analyze_sentiment_batch
+
+TEXTS = [
+    "Absolutely love this phone, the camera is great",
+    "Terrible battery, worst purchase ever",
+    "It is a phone",
+    "",
+    "Good value for the price",
+    "The screen cracked after a week, awful",
+    "Okay",
+]
+
+
+def test_batch_matches_single_text_scores_in_order():
+    expected = [sentiment._score_text(text) for text in TEXTS]
+
+    assert analyze_sentiment_batch(TEXTS, workers=1, use_cache=False) == expected
+
+
+def test_process_pool_gives_the_same_scores(monkeypatch):
+    monkeypatch.setattr(sentiment, "MIN_PARALLEL_BATCH", 2)
+    try:
+        scores = analyze_sentiment_batch(TEXTS, workers=2, chunk_size=3, use_cache=False)
+    finally:
+        sentiment.shutdown_sentiment_pool()
+
+    assert scores == [sentiment._score_text(text) for text in TEXTS]
+
+
+def test_failing_text_scores_neutral_without_failing_the_batch(monkeypatch):
+    score_text = sentiment._score_text
+
+    def flaky(text):
+        if text == "boom":
+            raise ValueError("scorer crashed")
+        return score_text(text)
+
+    monkeypatch.setattr(sentiment, "_score_text", flaky)
+
+    scores = analyze_sentiment_batch(["Great phone", "boom", "Awful phone"], workers=1, use_cache=False)
+
+    assert scores[1] == FALLBACK_SCORE
+    assert scores[0][0] == "Positive"
+    assert scores[2][0] == "Negative"
+
+
+@pytest.mark.parametrize("polarity, label", [(0.5, "Positive"), (0.1, "Neutral"), (-0.1, "Neutral"), (-0.2, "Negative")])
+def test_classify_thresholds(polarity, label):
+    assert sentiment._classify(polarity) == label
+
+
+@pytest.fixture
+def scored_texts(db, monkeypatch):
+    """Empty memory cache; records every text actually sent to the scorer."""
+    monkeypatch.setattr(sentiment, "_memory_cache", type(sentiment._memory_cache)())
+    calls = []
+    score_chunk = sentiment._score_chunk
+
+    def recording(texts):
+        calls.extend(texts)
+        return score_chunk(texts)
+
+    monkeypatch.setattr(sentiment, "_score_chunk", recording)
+    return calls
+
+
+def test_repeated_texts_are_scored_once(scored_texts):
+    first = analyze_sentiment_batch(["Great phone", "Great phone", "Bad  phone"], workers=1)
+    second = analyze_sentiment_batch(["Great phone", "Bad phone "], workers=1)
+
+    assert scored_texts == ["Great phone", "Bad  phone"]
+    assert second == [first[0], first[2]]
+
+
+def test_scores_survive_in_the_database(scored_texts, db):
+    first = analyze_sentiment_batch(["Great phone"], workers=1)
+    sentiment._memory_cache.clear()
+
+    assert analyze_sentiment_batch(["Great phone"], workers=1) == first
+    assert scored_texts == ["Great phone"]
+    assert db.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0] == 1
+
+
+def test_failed_texts_are_not_cached(scored_texts, db, monkeypatch):
+    monkeypatch.setattr(sentiment, "_score_text", lambda text: 1 / 0)
+
+    assert analyze_sentiment_batch(["boom"], workers=1) == [FALLBACK_SCORE]
+    assert analyze_sentiment_batch(["boom"], workers=1) == [FALLBACK_SCORE]
+    assert scored_texts == ["boom", "boom"]
+    assert db.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0] == 0
+
+
+def test_scores_from_another_scorer_are_purged(scored_texts, db):
+    db.execute("INSERT INTO sentiment_cache (text_hash, scorer, sentiment, polarity) VALUES ('old', 'textblob-0.1', 'Positive', 1.0)")
+    db.commit()
+    analyze_sentiment_batch(["Great phone"], workers=1)
+
+    sentiment.init_sentiment_cache()
+
+    assert [row[0] for row in db.execute("SELECT scorer FROM sentiment_cache")] == [sentiment.scorer_tag()]
@@ -0,0 +1,49 @@
+import pytest
+import reference_stats as reference
+from conftest import assert_close, random_reviews
+
+from services import stats
+
+METRICS = {
+    "stats": (stats.calculate_stats, reference.calculate_stats),
+    "correlations": (stats.calculate_correlations, reference.calculate_correlations),
+    "detailed_sentiment": (stats.calculate_detailed_sentiment_distribution,
+                           reference.calculate_detailed_sentiment_distribution),
+    "advanced_metrics": (stats.calculate_advanced_metrics, reference.calculate_advanced_metrics),
+    "sentiment_by_rating": (stats.get_sentiment_by_rating, reference.get_sentiment_by_rating),
+}
+
+
+@pytest.fixture(scope="module")
+def reviews():
+    return random_reviews(3000)
+
+
+@pytest.mark.parametrize("key", METRICS)
+def test_single_pass_matches_the_original_functions(reviews, key):
+    _, baseline = METRICS[key]
+
+    assert_close(stats.calculate_all_stats(reviews)[key], baseline(reviews))
+
+
+@pytest.mark.parametrize("key", METRICS)
+def test_per_metric_functions_match_the_single_pass(reviews, key):
+    function, _ = METRICS[key]
+
+    assert_close(function(reviews), stats.calculate_all_stats(reviews)[key])
+
+
+@pytest.mark.parametrize("key", METRICS)
+def test_no_reviews(key):
+    _, baseline = METRICS[key]
+
+    assert_close(stats.calculate_all_stats([])[key], baseline([]))
+
+
+def test_constant_ratings_have_insufficient_variance(reviews):
+    flat = [{**r, "rating": 4.0} for r in reviews[:50]]
+
+    result = stats.calculate_all_stats(flat)
+
+    assert result["correlations"]["rating_sentiment"]["text"] == "Insufficient variance"
+    assert_close(result, {key: baseline(flat) for key, (_, baseline) in METRICS.items()})
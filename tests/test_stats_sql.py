@@ -0,0 +1,60 @@
+import random
+
+import pytest
+from conftest import assert_close, assert_matches_full_scan, make_review, random_reviews
+
+from configs.aggregates import load_aggregates, polarity_value, polarity_value_sql
+from configs.database import insert_reviews
+from services import stats_sql
+from services.stats import calculate_all_stats
+
+
+@pytest.fixture
+def dated(db):
+    reviews = random_reviews(400)
+    for i, review in enumerate(reviews):
+        review["created_at"] = f"2024-0{i % 3 + 1}-15 12:00:00"
+    insert_reviews(db, reviews)
+    return db
+
+
+def test_sql_aggregates_match_the_maintained_ones(dated):
+    assert_close(stats_sql.query_aggregates(dated), load_aggregates(dated))
+    assert_close(stats_sql.query_aggregates(dated, "P2"), load_aggregates(dated, "P2"))
+
+
+def test_date_range_is_inclusive(dated):
+    reviews = [dict(row) for row in dated.execute(
+        "SELECT * FROM reviews WHERE product_id = 'P1' AND created_at >= '2024-02-01' AND created_at < '2024-03-16'"
+    )]
+
+    result = stats_sql.calculate_dashboard_sql(dated, "P1", "2024-02-01", "2024-03-15")
+
+    assert result["stats"]["total"] == len(reviews) > 0
+    assert_matches_full_scan(result, reviews)
+
+
+def test_metric_wrappers_take_dates_and_shared_aggregates(dated):
+    aggregates = stats_sql.query_aggregates(dated, date_from="2024-03-01")
+    whole = stats_sql.calculate_dashboard_from_aggregates(aggregates)
+
+    assert stats_sql.sql_calculate_stats(dated, date_from="2024-03-01") == whole["stats"]
+    assert stats_sql.sql_calculate_stats(dated, aggregates=aggregates) == whole["stats"]
+    assert stats_sql.sql_get_sentiment_by_rating(dated, aggregates=aggregates) == whole["sentiment_by_rating"]
+    assert stats_sql.sql_calculate_stats(dated, date_to="2023-12-31")["total"] == 0
+
+
+def test_half_star_ratings_round_like_python(db):
+    insert_reviews(db, [make_review(text=str(rating), rating=rating) for rating in (1.5, 2.5, 3.5, 4.5, 4.4)])
+
+    assert stats_sql.sql_calculate_stats(db)["stars"] == calculate_all_stats(
+        [dict(row) for row in db.execute("SELECT * FROM reviews")])["stats"]["stars"]
+
+
+def test_polarity_buckets_match_python(db):
+    rnd = random.Random(3)
+    values = [rnd.uniform(-1, 1) for _ in range(2000)] + [k / 200 for k in range(-200, 201)]
+    expression = polarity_value_sql("value")
+
+    for value in values:
+        assert db.execute(f"SELECT {expression} FROM (SELECT ? AS value)", (value,)).fetchone()[0] == polarity_value(value)
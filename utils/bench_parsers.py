@@ -0,0 +1,82 @@
+"""Benchmark review-page parsing for each HTML parser backend.
+
+Run from the project root:
+    python -m utils.bench_parsers [fixture_dir] [--seconds N] [--workers N]
+"""
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import services.parser as parser
+from services.scraper import parse_review_page
+
+FIXTURE_DIR = os.path.join("data", "html_fixtures")
+
+
+def _parse_with(backend, html):
+    parser.DEFAULT_BACKEND = backend
+    return parse_review_page(html)
+
+
+def bench_inline(backend, pages, seconds):
+    """Pages/second parsing in the calling process."""
+    parser.DEFAULT_BACKEND = backend
+    reviews = parse_review_page(pages[0])["reviews"]
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for html in pages:
+            parse_review_page(html)
+            count += 1
+    return count / (time.perf_counter() - start), len(reviews)
+
+
+def bench_pool(backend, pages, seconds, workers):
+    """Pages/second parsing in a process pool, as the scraper does."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(_parse_with, [backend] * workers, pages[:1] * workers))
+        batch = pages * max(1, (workers * 8) // len(pages))
+        count = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for _ in pool.map(_parse_with, [backend] * len(batch), batch):
+                count += 1
+        return count / (time.perf_counter() - start)
+
+
+def main():
+    args = sys.argv[1:]
+    seconds = 3.0
+    workers = os.cpu_count() or 2
+    if "--seconds" in args:
+        i = args.index("--seconds")
+        seconds = float(args[i + 1])
+        del args[i:i + 2]
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    fixture_dir = args[0] if args else FIXTURE_DIR
+
+    paths = sorted(glob.glob(os.path.join(fixture_dir, "*.html")))
+    if not paths:
+        print(f"No .html fixtures found in {fixture_dir}")
+        return
+    pages = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    size_kb = sum(len(p) for p in pages) / len(pages) / 1024
+
+    print(f"{len(pages)} fixture page(s), avg {size_kb:.0f} KB, {workers} pool workers")
+    print(f"{'backend':<12} {'reviews':>8} {'pages/s':>10} {'pool pages/s':>14}")
+    for backend in parser.available_backends():
+        rate, found = bench_inline(backend, pages, seconds)
+        pool_rate = bench_pool(backend, pages, seconds, workers)
+        print(f"{backend:<12} {found:>8} {rate:>10.1f} {pool_rate:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
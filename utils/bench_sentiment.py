@@ -0,0 +1,53 @@
+"""Benchmark batch sentiment scoring throughput against worker count.
+
+Run from the project root:
+    python -m utils.bench_sentiment [n_reviews] [--workers 1,2,4]
+
+The sentiment cache is bypassed so only raw scoring is measured.
+"""
+import csv
+import os
+import sys
+import time
+
+from services.sentiment import analyze_sentiment_batch, shutdown_sentiment_pool
+
+SAMPLE_CSV = os.path.join("data", "s23_reviews.csv")
+
+
+def load_texts(n):
+    with open(SAMPLE_CSV, newline="", encoding="utf-8") as f:
+        sample = [f"{row['review_title']}. {row['review_text']}" for row in csv.DictReader(f)]
+    # Vary the texts so repeated samples are not byte-identical
+    return [f"{sample[i % len(sample)]} #{i}" for i in range(n)]
+
+
+def main():
+    args = sys.argv[1:]
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, cpus} | {w for w in (4, 8) if w <= cpus})
+    if "--workers" in args:
+        i = args.index("--workers")
+        worker_counts = [int(w) for w in args[i + 1].split(",")]
+        del args[i:i + 2]
+    n = int(args[0]) if args else 20000
+
+    texts = load_texts(n)
+    print(f"{n} reviews, {cpus} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'reviews/s':>11} {'speedup':>8}")
+    baseline = None
+    for workers in worker_counts:
+        # Warm the pool so process start-up is not part of the measurement
+        analyze_sentiment_batch(texts[:workers * 1000], workers=workers, use_cache=False)
+        start = time.perf_counter()
+        results = analyze_sentiment_batch(texts, workers=workers, use_cache=False)
+        elapsed = time.perf_counter() - start
+        assert len(results) == n
+        rate = n / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {elapsed:>9.2f} {rate:>11.0f} {rate / baseline:>7.2f}x")
+    shutdown_sentiment_pool()
+
+
+if __name__ == "__main__":
+    main()
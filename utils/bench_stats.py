@@ -0,0 +1,65 @@
+"""Benchmark the dashboard statistics on synthetic reviews.
+
+Run from the project root:
+    python -m utils.bench_stats [sizes]      e.g. 10000,100000,1000000
+
+Times the five per-metric functions called one after another, each
+loading its own arrays, against calculate_all_stats, which builds the
+arrays once and reuses them for every metric.
+"""
+import random
+import sys
+import time
+
+from services.stats import (
+    calculate_advanced_metrics,
+    calculate_all_stats,
+    calculate_correlations,
+    calculate_detailed_sentiment_distribution,
+    calculate_stats,
+    get_sentiment_by_rating,
+)
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def make_reviews(n, seed=42):
+    rnd = random.Random(seed)
+    reviews = []
+    for _ in range(n):
+        polarity = round(rnd.uniform(-1, 1), 3)
+        reviews.append({
+            "rating": float(rnd.randint(1, 5)),
+            "polarity": polarity,
+            "sentiment": "Positive" if polarity > 0.1 else "Negative" if polarity < -0.1 else "Neutral",
+            "review_text": "x" * rnd.randint(10, 400),
+        })
+    return reviews
+
+
+def separate(reviews):
+    calculate_stats(reviews)
+    calculate_correlations(reviews)
+    calculate_detailed_sentiment_distribution(reviews)
+    calculate_advanced_metrics(reviews)
+    get_sentiment_by_rating(reviews)
+
+
+def timed(func, reviews):
+    start = time.perf_counter()
+    func(reviews)
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [int(s) for s in sys.argv[1].split(",")] if len(sys.argv) > 1 else DEFAULT_SIZES
+    print(f"{'reviews':>9} {'separate s':>11} {'single s':>9} {'reviews/s':>11} {'speedup':>8}")
+    for n in sizes:
+        reviews = make_reviews(n)
+        before = timed(separate, reviews)
+        after = timed(calculate_all_stats, reviews)
+        print(f"{n:>9} {before:>11.3f} {after:>9.3f} {n / after:>11.0f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
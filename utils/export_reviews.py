@@ -0,0 +1,61 @@
+"""Export reviews or products to CSV, JSONL, Parquet or Arrow.
+
+Run from the project root:
+    python -m utils.export_reviews <output file> [--table reviews|products] [--format F]
+        [--columns a,b,c] [--product-id ID] [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+
+The format defaults to the output file's extension (.csv, .jsonl,
+.parquet, .arrows); Parquet and Arrow need pyarrow.
+"""
+import os
+import sys
+import time
+
+from configs.database import open_db
+from services.review_export import EXPORT_FORMATS, ExportError, export_chunks
+
+OPTIONS = {"--table": "table", "--format": "format", "--columns": "columns",
+           "--product-id": "product_id", "--from": "date_from", "--to": "date_to"}
+
+
+def main():
+    args = sys.argv[1:]
+    options = {"table": "reviews"}
+    for flag, name in OPTIONS.items():
+        if flag in args:
+            i = args.index(flag)
+            options[name] = args[i + 1]
+            del args[i:i + 2]
+    if not args:
+        print(__doc__)
+        return
+    path = args[0]
+
+    fmt = options.pop("format", None)
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lstrip(".").lower()
+        fmt = next((name for name, (_, ext) in EXPORT_FORMATS.items() if ext == extension), extension)
+    columns = options.pop("columns", None)
+    columns = columns.split(",") if columns else None
+    table = options.pop("table")
+
+    conn = open_db()
+    try:
+        chunks = export_chunks(conn, table, fmt, columns, **options)
+        start = time.perf_counter()
+        size = 0
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"✅ Exported {table} to {path} ({fmt}, {size / 1024 / 1024:.1f} MB in {elapsed:.2f}s)")
+    except ExportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
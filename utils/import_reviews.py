@@ -0,0 +1,49 @@
+"""Bulk import CSV / JSONL review files (optionally .gz) into the database.
+
+Run from the project root:
+    python -m utils.import_reviews <file> [<file> ...] [--format csv|jsonl] [--chunk N]
+
+Rows missing sentiment or polarity are scored on the way in; reviews that
+are already stored are skipped.
+"""
+import sys
+
+from configs.database import init_db
+from services.review_import import import_file
+from services.sentiment import shutdown_sentiment_pool
+
+
+def main():
+    args = sys.argv[1:]
+    fmt = None
+    chunk_size = None
+    if "--format" in args:
+        i = args.index("--format")
+        fmt = args[i + 1]
+        del args[i:i + 2]
+    if "--chunk" in args:
+        i = args.index("--chunk")
+        chunk_size = int(args[i + 1])
+        del args[i:i + 2]
+    if not args:
+        print(__doc__)
+        return
+
+    init_db()
+    try:
+        for path in args:
+            print(f"📥 Importing {path}")
+            for progress in import_file(path, fmt, chunk_size):
+                print(
+                    f"{'✅' if progress['done'] else '  '} {progress['rows']:>10,} rows  "
+                    f"{progress['inserted']:>10,} inserted  {progress['skipped']:>8,} duplicates  "
+                    f"{progress['invalid']:>6,} invalid  {progress['scored']:>8,} scored  "
+                    f"{progress['products']:>5,} new products  "
+                    f"{progress['rows_per_sec']:>10,.0f} rows/s"
+                )
+    finally:
+        shutdown_sentiment_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Replay a scrape from the page cache, without the network.
+
+Scrape the URL once normally (or with the app) to fill the cache, then run
+from the project root:
+    python -m utils.replay_scrape <product_url> [--limit N] [--runs N]
+"""
+import asyncio
+import sys
+import time
+
+import services.page_cache as page_cache
+from services.http_client import close_client
+from services.parser import shutdown_parser_pool
+from services.scraper import scrape_reviews
+
+
+async def replay(url, limit):
+    pages = reviews = 0
+    async for event in scrape_reviews(url, limit=limit):
+        if event["type"] == "page":
+            pages += 1
+            reviews += len(event["reviews"])
+        elif event["type"] == "error":
+            print(f"❌ {event['message']}")
+    return pages, reviews
+
+
+async def main():
+    args = sys.argv[1:]
+    limit = 100
+    runs = 3
+    if "--limit" in args:
+        i = args.index("--limit")
+        limit = int(args[i + 1])
+        del args[i:i + 2]
+    if "--runs" in args:
+        i = args.index("--runs")
+        runs = int(args[i + 1])
+        del args[i:i + 2]
+    if not args:
+        print(__doc__)
+        return
+
+    page_cache.OFFLINE = True
+    try:
+        for run in range(1, runs + 1):
+            start = time.perf_counter()
+            pages, reviews = await replay(args[0], limit)
+            elapsed = time.perf_counter() - start
+            print(f"run {run}: {pages} pages, {reviews} reviews in {elapsed:.2f}s ({pages / elapsed:.1f} pages/s)")
+        print(page_cache.page_cache_stats())
+    finally:
+        await close_client()
+        shutdown_parser_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())